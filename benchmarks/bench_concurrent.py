@@ -0,0 +1,140 @@
+"""
+Бенчмарк чтения под нагрузкой записи: потокобезопасный контейнер с
+версиями (читатели без блокировки) против обычного контейнера под
+общей блокировкой для чтения и записи.
+
+Запуск из корня проекта:
+    python benchmarks/bench_concurrent.py --events 100000 --readers 4 --writers 2
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Callable, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# pylint: disable=wrong-import-position
+from container import EventContainer  # noqa: E402
+from concurrent_container import ConcurrentEventContainer  # noqa: E402
+from conditions import FieldEquals  # noqa: E402
+from historical_event import Battle  # noqa: E402
+
+
+class LockedContainer:
+    """Обычный контейнер, все операции которого идут под одной блокировкой."""
+
+    def __init__(self):
+        """Инициализация пустого контейнера и блокировки."""
+        self._container = EventContainer()
+        self._lock = threading.Lock()
+
+    def add_many(self, events):
+        """Добавить пакет событий под блокировкой."""
+        with self._lock:
+            self._container.add_many(events)
+
+    def remove(self, condition):
+        """Удалить события под блокировкой."""
+        with self._lock:
+            return self._container.remove(condition)
+
+    def read(self) -> int:
+        """Перебрать все события под блокировкой."""
+        with self._lock:
+            # pylint: disable=protected-access
+            return sum(1 for _ in self._container._events)
+
+
+class VersionedContainer:
+    """Потокобезопасный контейнер: чтение опубликованной версии."""
+
+    def __init__(self):
+        """Инициализация пустого контейнера."""
+        self._container = ConcurrentEventContainer()
+        self.add_many = self._container.add_many
+        self.remove = self._container.remove
+
+    def read(self) -> int:
+        """Перебрать все события опубликованной версии."""
+        return sum(1 for _ in self._container.snapshot())
+
+
+def measure(factory: Callable[[], object], events: int, readers: int,
+            writers: int, duration: float) -> Tuple[float, float]:
+    """
+    Измерить число полных чтений и записей в секунду.
+
+    Args:
+        factory: Создание контейнера
+        events: Начальное число событий
+        readers: Число потоков-читателей (полный перебор событий)
+        writers: Число потоков-писателей (добавление и удаление пакета)
+        duration: Длительность замера в секундах
+
+    Returns:
+        Пара (чтений в секунду, записей в секунду)
+    """
+    container = factory()
+    container.add_many([Battle(f"Битва {i}", str(1000 + i % 1000), "Место")
+                        for i in range(events)])
+    stop = threading.Event()
+    counts: List[int] = [0, 0]
+    lock = threading.Lock()
+
+    def reader():
+        done = 0
+        while not stop.is_set():
+            container.read()
+            done += 1
+        with lock:
+            counts[0] += done
+
+    def writer(number):
+        done = 0
+        while not stop.is_set():
+            tag = f"{number}-{done}"
+            container.add_many([Battle(f"Новая {tag}", "2000", tag)
+                                for _ in range(10)])
+            container.remove(FieldEquals("place", tag))
+            done += 1
+        with lock:
+            counts[1] += done
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts[0] / duration, counts[1] / duration
+
+
+def main():
+    """Запуск бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--events', type=int, default=100_000,
+                        help="начальное число событий (по умолчанию: 100000)")
+    parser.add_argument('--readers', type=int, default=4,
+                        help="потоков-читателей (по умолчанию: 4)")
+    parser.add_argument('--writers', type=int, default=2,
+                        help="потоков-писателей (по умолчанию: 2)")
+    parser.add_argument('--duration', type=float, default=3.0,
+                        help="длительность замера, с (по умолчанию: 3)")
+    args = parser.parse_args()
+
+    print(f"Событий: {args.events}, читателей: {args.readers}, "
+          f"писателей: {args.writers}")
+    for title, factory in (("Общая блокировка", LockedContainer),
+                           ("Версии без блокировки", VersionedContainer)):
+        reads, writes = measure(factory, args.events, args.readers,
+                                args.writers, args.duration)
+        print(f"{title:>22}: чтений {reads:8.1f}/с, записей {writes:8.1f}/с")
+
+
+if __name__ == "__main__":
+    main()
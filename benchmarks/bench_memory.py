@@ -0,0 +1,95 @@
+"""
+Бенчмарк памяти на одно событие: классы событий со __slots__
+против прежних классов с __dict__ и атрибутом type в экземпляре.
+
+Запуск из корня проекта:
+    python benchmarks/bench_memory.py --count 1000000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# pylint: disable=wrong-import-position
+from historical_event import Battle, Treaty, make_date_key  # noqa: E402
+
+
+class DictHistoricalEvent:
+    """Прежний базовый класс события (с __dict__)."""
+
+    def __init__(self, name: str, date: str):
+        self.name = name
+        self.date = date
+        self.date_key = make_date_key(date)
+
+
+class DictBattle(DictHistoricalEvent):
+    """Прежний класс битвы: type хранится в каждом экземпляре."""
+
+    def __init__(self, name: str, date: str, place: str):
+        super().__init__(name, date)
+        self.place = place
+        self.type = "Битва"
+
+
+class DictTreaty(DictHistoricalEvent):
+    """Прежний класс договора: type хранится в каждом экземпляре."""
+
+    def __init__(self, name: str, date: str, parties: str):
+        super().__init__(name, date)
+        self.parties = parties
+        self.type = "Договор"
+
+
+def measure(battle_cls, treaty_cls, count: int) -> float:
+    """
+    Измерить память на одно событие.
+
+    Строковые поля создаются заранее и общие для обоих вариантов,
+    поэтому в результат попадают только сами объекты событий,
+    их ключи дат и список, который их хранит.
+
+    Args:
+        battle_cls: Класс битвы
+        treaty_cls: Класс договора
+        count: Количество событий
+
+    Returns:
+        Байт на событие
+    """
+    names = [f"Событие {i % 1000}" for i in range(1000)]
+    dates = [str(1000 + i) for i in range(1000)]
+    gc.collect()
+    tracemalloc.start()
+    events = []
+    for i in range(count):
+        cls = battle_cls if i % 2 == 0 else treaty_cls
+        events.append(cls(names[i % 1000], dates[i % 1000], "Место"))
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return current / count
+
+
+def main():
+    """Запуск бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=1_000_000,
+                        help="количество событий (по умолчанию: 1000000)")
+    args = parser.parse_args()
+
+    before = measure(DictBattle, DictTreaty, args.count)
+    after = measure(Battle, Treaty, args.count)
+    print(f"Событий: {args.count}")
+    print(f"До (__dict__, type в экземпляре): {before:.1f} байт/событие")
+    print(f"После (__slots__, type в классе): {after:.1f} байт/событие")
+    print(f"Экономия: {before - after:.1f} байт/событие "
+          f"({(1 - after / before) * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
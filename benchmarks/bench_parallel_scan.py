@@ -0,0 +1,109 @@
+"""
+Бенчмарк проверки условий REM по столбцам колоночного хранилища:
+последовательная проверка в текущем процессе против проверки участков
+столбца из разделяемой памяти в пуле процессов. Показывает размер
+контейнера, начиная с которого параллельная проверка выгоднее (порог
+parallel_threshold контейнера, --parallel-threshold в main.py).
+
+Запуск из корня проекта:
+    python benchmarks/bench_parallel_scan.py --workers 4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# pylint: disable=wrong-import-position
+from columnar_container import ColumnarEventContainer  # noqa: E402
+from conditions import DateCompare, FieldEquals, NameContains  # noqa: E402
+from historical_event import Battle, Treaty  # noqa: E402
+
+DEFAULT_SIZES = (100_000, 250_000, 500_000, 1_000_000, 2_000_000)
+
+# Условия без индекса: короткая подстрока, равенство места, диапазон дат
+CONDITIONS = (NameContains("77"), FieldEquals("place", "Место 3"),
+              DateCompare("<", "1100"))
+
+
+def build(size: int, scan_workers: int) -> ColumnarEventContainer:
+    """
+    Построить колоночный контейнер с заданным числом событий.
+
+    Args:
+        size: Количество событий
+        scan_workers: Число процессов проверки
+
+    Returns:
+        Заполненный контейнер
+    """
+    container = ColumnarEventContainer(scan_workers=scan_workers,
+                                       parallel_threshold=0)
+    container.add_many([
+        (Battle if i % 3 else Treaty)(f"Сражение номер {i}",
+                                      str(1000 + i % 1000), f"Место {i % 7}")
+        for i in range(size)])
+    return container
+
+
+def best_time(container: ColumnarEventContainer, repeat: int) -> float:
+    """
+    Лучшее суммарное время проверки условий (без удаления) из нескольких
+    повторов.
+
+    Args:
+        container: Контейнер
+        repeat: Число повторов
+
+    Returns:
+        Время в секундах
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for condition in CONDITIONS:
+            container._scan(condition)  # pylint: disable=protected-access
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """Запуск бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help="число рабочих процессов (по умолчанию: число CPU)")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="размеры контейнера")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="число повторов (по умолчанию: 3)")
+    args = parser.parse_args()
+    workers = max(2, args.workers)
+
+    print(f"Процессов: {workers}, CPU: {os.cpu_count()}")
+    print(f"{'Событий':>10} {'Последов., мс':>15} {'Паралл., мс':>13} {'Ускорение':>10}")
+    crossover = None
+    for size in args.sizes:
+        serial = best_time(build(size, 1), args.repeat)
+        container = build(size, workers)
+        try:
+            # Первый вызов запускает пул процессов и в замер не входит
+            best_time(container, 1)
+            parallel = best_time(container, args.repeat)
+        finally:
+            container.close()
+        speedup = serial / parallel
+        if crossover is None and speedup > 1:
+            crossover = size
+        print(f"{size:>10} {serial * 1000:>15.1f} {parallel * 1000:>13.1f} "
+              f"{speedup:>9.2f}x")
+
+    if crossover is None:
+        print("Точка безубыточности не достигнута на заданных размерах.")
+    else:
+        print(f"Параллельный перебор выгоднее начиная с ~{crossover} событий.")
+
+
+if __name__ == "__main__":
+    main()
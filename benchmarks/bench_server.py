@@ -0,0 +1,168 @@
+"""
+Генератор нагрузки для сервера команд: несколько соединений отправляют
+команды конвейером и измеряют пропускную способность и задержку ответа
+(от отправки команды до строки "." ее ответа).
+
+Запуск из корня проекта (сервер запускается в этом же процессе):
+    python benchmarks/bench_server.py --connections 8 --commands 20000
+Нагрузка на уже запущенный сервер (python main.py --serve 127.0.0.1:7000):
+    python benchmarks/bench_server.py --connect 127.0.0.1:7000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# pylint: disable=wrong-import-position
+from container import EventContainer  # noqa: E402
+from server import CommandServer, RESPONSE_END  # noqa: E402
+
+END_LINE = (RESPONSE_END + '\n').encode('utf-8')
+
+
+def make_commands(count: int, client: int, rem_ratio: float) -> List[bytes]:
+    """
+    Сгенерировать команды одного клиента: в основном ADD, изредка REM.
+
+    Args:
+        count: Количество команд
+        client: Номер клиента (для уникальных названий)
+        rem_ratio: Доля команд REM
+
+    Returns:
+        Строки команд в байтах
+    """
+    rng = random.Random(client)
+    commands = []
+    for i in range(count):
+        year = rng.randint(800, 2000)
+        if rng.random() < rem_ratio:
+            line = f'REM name == "Битва {client}-{rng.randrange(max(1, i))}"'
+        else:
+            line = f"ADD Битва|Битва {client}-{i}|{year}|Место {year % 97}"
+        commands.append((line + '\n').encode('utf-8'))
+    return commands
+
+
+async def run_client(host: Optional[str], port: Optional[int],
+                     path: Optional[str], commands: List[bytes],
+                     pipeline: int) -> List[float]:
+    """
+    Отправить команды конвейером и собрать задержки ответов.
+
+    Args:
+        host: Адрес TCP
+        port: Порт TCP
+        path: Путь Unix-сокета (вместо host и port)
+        commands: Строки команд
+        pipeline: Максимальное число команд без ответа
+
+    Returns:
+        Задержки ответов в секундах
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    window = asyncio.Semaphore(pipeline)
+    sent: Deque[float] = deque()
+    latencies: List[float] = []
+
+    async def send() -> None:
+        for command in commands:
+            await window.acquire()
+            sent.append(time.perf_counter())
+            writer.write(command)
+            await writer.drain()
+
+    async def receive() -> None:
+        while len(latencies) < len(commands):
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("сервер закрыл соединение")
+            if line == END_LINE:
+                latencies.append(time.perf_counter() - sent.popleft())
+                window.release()
+
+    await asyncio.gather(send(), receive())
+    writer.close()
+    await writer.wait_closed()
+    return latencies
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Значение перцентиля по отсортированному списку."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(args: argparse.Namespace) -> Tuple[float, List[float]]:
+    """
+    Запустить нагрузку (и при необходимости сервер).
+
+    Args:
+        args: Аргументы командной строки
+
+    Returns:
+        Пара (общее время в секундах, все задержки)
+    """
+    host, port, path = None, None, args.unix
+    server = None
+    if args.connect:
+        host, _, port_str = args.connect.rpartition(':')
+        port = int(port_str)
+    elif path is None:
+        container = EventContainer(trigram_index=False)
+        server = await CommandServer(container).start('127.0.0.1', 0)
+        host, port = server.sockets[0].getsockname()[:2]
+
+    workloads = [make_commands(args.commands, client, args.rem_ratio)
+                 for client in range(args.connections)]
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        run_client(host, port, path, commands, args.pipeline)
+        for commands in workloads))
+    elapsed = time.perf_counter() - start
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    return elapsed, [latency for result in results for latency in result]
+
+
+def main():
+    """Запуск генератора нагрузки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--connect', metavar='HOST:PORT',
+                        help="адрес запущенного сервера (по умолчанию сервер "
+                             "запускается в этом процессе)")
+    parser.add_argument('--unix', metavar='PATH',
+                        help="Unix-сокет запущенного сервера")
+    parser.add_argument('--connections', type=int, default=8,
+                        help="число соединений (по умолчанию: 8)")
+    parser.add_argument('--commands', type=int, default=10_000,
+                        help="команд на соединение (по умолчанию: 10000)")
+    parser.add_argument('--pipeline', type=int, default=32,
+                        help="команд без ответа на соединение (по умолчанию: 32)")
+    parser.add_argument('--rem-ratio', type=float, default=0.05,
+                        help="доля команд REM (по умолчанию: 0.05)")
+    args = parser.parse_args()
+
+    elapsed, latencies = asyncio.run(run(args))
+    latencies.sort()
+    print(f"Соединений: {args.connections}, команд: {len(latencies)}, "
+          f"конвейер: {args.pipeline}")
+    print(f"Время: {elapsed:.2f} с, пропускная способность: "
+          f"{len(latencies) / elapsed:.0f} команд/с")
+    print(f"Задержка: p50 {percentile(latencies, 0.5) * 1000:.2f} мс, "
+          f"p99 {percentile(latencies, 0.99) * 1000:.2f} мс, "
+          f"макс. {latencies[-1] * 1000:.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
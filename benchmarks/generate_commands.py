@@ -0,0 +1,274 @@
+"""
+Генератор синтетических файлов команд для замеров производительности.
+
+Файл воспроизводим (задается зерном генератора): смесь команд ADD, REM и
+PRINT, распределение видов условий REM и длины названий настраиваются.
+Условия REM ссылаются на ранее добавленные события, поэтому удаления
+действительно находят события, как в реальном потоке команд.
+
+Запуск из корня проекта:
+    python benchmarks/generate_commands.py workload.txt --lines 1000000
+    python benchmarks/generate_commands.py workload.txt --lines 100000 \\
+        --mix add=0.8,rem=0.2 --conditions name=0.5,date=0.5 --name-length 10:60
+"""
+
+import argparse
+import random
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Sequence, Tuple
+
+# Доли видов команд по умолчанию
+DEFAULT_MIX = {'add': 0.9, 'rem': 0.0999, 'print': 0.0001}
+
+# Доли видов условий REM по умолчанию: равенства полей, вхождение
+# подстроки в название, сравнения дат (before, after - по краям
+# диапазона лет) и составные условия
+DEFAULT_CONDITIONS = {
+    'name': 0.35, 'date': 0.15, 'place': 0.15, 'parties': 0.1,
+    'contains': 0.1, 'before': 0.05, 'after': 0.05, 'compound': 0.05,
+    'type': 0.0,
+}
+
+# Длина названия события по умолчанию (минимум, максимум символов)
+DEFAULT_NAME_LENGTH = (12, 40)
+
+# Диапазон лет событий
+FIRST_YEAR, LAST_YEAR = 800, 2000
+
+# Число различных мест битв и сторон договоров
+PLACE_COUNT = 2000
+PARTIES_COUNT = 500
+
+# Сколько последних названий помнит генератор для условий REM
+RECENT_NAMES = 10_000
+
+_SYLLABLES = (
+    'бо', 'ро', 'ди', 'но', 'ку', 'ли', 'ко', 'во', 'по', 'лта', 'ва', 'сла',
+    'вян', 'ска', 'мо', 'ск', 'ов', 'ев', 'град', 'гор', 'ре', 'ка', 'ня',
+    'та', 'ми', 'ра', 'зе', 'ле', 'ну', 'жа', 'ст', 'ан', 'ер', 'ин',
+)
+
+_PREFIXES = {
+    "Битва": ("Битва при", "Сражение у", "Осада", "Оборона"),
+    "Договор": ("Договор в", "Мир в", "Соглашение в", "Союз в"),
+}
+
+
+def parse_weights(text: str, allowed: Sequence[str]) -> Dict[str, float]:
+    """
+    Разобрать доли вида "add=0.9,rem=0.1".
+
+    Args:
+        text: Строка долей через запятую
+        allowed: Допустимые имена
+
+    Returns:
+        Словарь долей (не нормирован)
+
+    Raises:
+        ValueError: Если имя неизвестно или доля не является
+            неотрицательным числом
+    """
+    weights: Dict[str, float] = {}
+    for item in text.split(','):
+        name, _, value = item.partition('=')
+        name = name.strip()
+        if name not in allowed:
+            raise ValueError(f"Неизвестное имя доли: {name}")
+        weight = float(value)
+        if weight < 0:
+            raise ValueError(f"Отрицательная доля: {item}")
+        weights[name] = weight
+    if not any(weights.values()):
+        raise ValueError("Все доли равны нулю")
+    return weights
+
+
+class WorkloadGenerator:
+    """Генератор строк файла команд."""
+
+    def __init__(self, seed: int = 1,
+                 mix: Dict[str, float] = DEFAULT_MIX,
+                 conditions: Dict[str, float] = DEFAULT_CONDITIONS,
+                 name_length: Tuple[int, int] = DEFAULT_NAME_LENGTH):
+        """
+        Инициализация генератора.
+
+        Args:
+            seed: Зерно генератора случайных чисел
+            mix: Доли видов команд (add, rem, print)
+            conditions: Доли видов условий REM
+            name_length: Минимальная и максимальная длина названия
+        """
+        self._rng = random.Random(seed)
+        self._kinds, self._kind_weights = self._split(mix)
+        self._conditions, self._condition_weights = self._split(conditions)
+        self.name_length = name_length
+        self._places = [self._words(1, 3) for _ in range(PLACE_COUNT)]
+        self._parties = [f"{self._words(1, 2)} и {self._words(1, 2)}"
+                         for _ in range(PARTIES_COUNT)]
+        self._recent: Deque[Tuple[str, str, str]] = deque(maxlen=RECENT_NAMES)
+        self._added = 0
+
+    @staticmethod
+    def _split(weights: Dict[str, float]) -> Tuple[List[str], List[float]]:
+        """Имена и доли с ненулевыми долями."""
+        items = [(name, weight) for name, weight in weights.items() if weight > 0]
+        return [name for name, _ in items], [weight for _, weight in items]
+
+    def lines(self, count: int) -> Iterator[str]:
+        """
+        Строки команд (без переводов строк).
+
+        Args:
+            count: Количество строк
+
+        Yields:
+            Строки команд
+        """
+        choices = self._rng.choices
+        generated = 0
+        while generated < count:
+            # Виды команд выбираются пакетами: один вызов choices на
+            # тысячу строк
+            for kind in choices(self._kinds, self._kind_weights,
+                                k=min(1024, count - generated)):
+                generated += 1
+                if kind == 'add' or (kind == 'rem' and not self._recent):
+                    yield self.add_line()
+                elif kind == 'rem':
+                    yield f"REM {self.condition()}"
+                else:
+                    yield "PRINT"
+
+    def add_line(self) -> str:
+        """Строка команды ADD нового события."""
+        rng = self._rng
+        event_type = "Битва" if rng.random() < 0.6 else "Договор"
+        self._added += 1
+        name = self._name(event_type)
+        year = rng.randint(FIRST_YEAR, LAST_YEAR)
+        if rng.random() < 0.2:
+            date = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        else:
+            date = str(year)
+        if event_type == "Битва":
+            param = rng.choice(self._places)
+        else:
+            param = rng.choice(self._parties)
+        self._recent.append((name, date, param))
+        return f"ADD {event_type}|{name}|{date}|{param}"
+
+    def condition(self) -> str:
+        """Условие REM по распределению видов условий."""
+        rng = self._rng
+        kind = rng.choices(self._conditions, self._condition_weights)[0]
+        name, date, param = rng.choice(self._recent)
+        if kind == 'name':
+            return f'name == "{name}"'
+        if kind == 'date':
+            return f'date == "{date}"'
+        if kind == 'place':
+            return f'place == "{rng.choice(self._places)}"'
+        if kind == 'parties':
+            return f'parties == "{rng.choice(self._parties)}"'
+        if kind == 'contains':
+            # Последнее слово названия - уникальный номер, он не берется
+            word = rng.choice(name.split()[:-1] or [name])
+            start = rng.randrange(max(1, len(word) - 3))
+            return f'name contains "{word[start:start + 4]}"'
+        if kind == 'before':
+            return f'date < "{rng.randint(FIRST_YEAR, FIRST_YEAR + 20)}"'
+        if kind == 'after':
+            return f'date > "{rng.randint(LAST_YEAR - 20, LAST_YEAR)}"'
+        if kind == 'compound':
+            return (f'place == "{param}" AND date < "{date}" '
+                    f'OR name == "{name}"')
+        return f'type == "{rng.choice(("Битва", "Договор"))}"'
+
+    def _name(self, event_type: str) -> str:
+        """Название события заданной длины с уникальным номером."""
+        rng = self._rng
+        low, high = self.name_length
+        prefix = rng.choice(_PREFIXES[event_type])
+        suffix = f" {self._added}"
+        target = rng.randint(low, high) - len(suffix)
+        parts = [prefix]
+        length = len(prefix)
+        while length < target:
+            word = self._words(1, 1)
+            parts.append(word)
+            length += len(word) + 1
+        return ' '.join(parts)[:max(target, len(prefix))].rstrip() + suffix
+
+    def _words(self, low: int, high: int) -> str:
+        """Несколько слов из слогов, с заглавной буквы."""
+        rng = self._rng
+        return ' '.join(
+            ''.join(rng.choice(_SYLLABLES)
+                    for _ in range(rng.randint(2, 4))).capitalize()
+            for _ in range(rng.randint(low, high)))
+
+
+def write_commands(filename: str, count: int, **options) -> None:
+    """
+    Записать файл команд.
+
+    Args:
+        filename: Имя файла
+        count: Количество строк
+        **options: Параметры WorkloadGenerator
+    """
+    generator = WorkloadGenerator(**options)
+    with open(filename, 'w', encoding='utf-8') as f:
+        batch: List[str] = []
+        for line in generator.lines(count):
+            batch.append(line)
+            if len(batch) >= 65536:
+                f.write('\n'.join(batch) + '\n')
+                batch = []
+        if batch:
+            f.write('\n'.join(batch) + '\n')
+
+
+def _name_length(text: str) -> Tuple[int, int]:
+    """Разобрать диапазон длин вида "12:40"."""
+    low, _, high = text.partition(':')
+    bounds = (int(low), int(high or low))
+    if bounds[0] < 1 or bounds[0] > bounds[1]:
+        raise argparse.ArgumentTypeError(f"Неверный диапазон длин: {text}")
+    return bounds
+
+
+def main():
+    """Запуск генератора."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('filename', help="имя создаваемого файла команд")
+    parser.add_argument('--lines', type=int, default=100_000,
+                        help="количество строк (от 10 тыс. до 10 млн; "
+                             "по умолчанию: 100000)")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="зерно генератора (по умолчанию: 1)")
+    parser.add_argument('--mix', default=None,
+                        help="доли команд, например add=0.9,rem=0.0999,print=0.0001")
+    parser.add_argument('--conditions', default=None,
+                        help="доли условий REM: " + ', '.join(DEFAULT_CONDITIONS))
+    parser.add_argument('--name-length', type=_name_length,
+                        default=DEFAULT_NAME_LENGTH, metavar='MIN:MAX',
+                        help="длина названий (по умолчанию: 12:40)")
+    args = parser.parse_args()
+
+    try:
+        mix = (parse_weights(args.mix, tuple(DEFAULT_MIX))
+               if args.mix else DEFAULT_MIX)
+        conditions = (parse_weights(args.conditions, tuple(DEFAULT_CONDITIONS))
+                      if args.conditions else DEFAULT_CONDITIONS)
+    except ValueError as e:
+        parser.error(str(e))
+    write_commands(args.filename, args.lines, seed=args.seed, mix=mix,
+                   conditions=conditions, name_length=args.name_length)
+    print(f"Файл команд создан: {args.filename} (строк: {args.lines})")
+
+
+if __name__ == "__main__":
+    main()
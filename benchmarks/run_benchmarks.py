@@ -0,0 +1,307 @@
+"""
+Набор воспроизводимых замеров производительности на синтетических
+файлах команд разного размера.
+
+Для каждого размера замеряются: CommandParser.process_file на файле
+команд без метрик и с метриками (--stats), EventContainer.add по
+одному событию, EventContainer.remove на выборке условий, print_all и
+пиковая память обработки файла (tracemalloc). Время - лучшее из нескольких повторов. Результаты
+сохраняются в JSON вместе с порогами регрессии; при сравнении с прежним
+результатом (--baseline) замедление или рост памяти больше порога
+считается регрессией, и скрипт завершается с кодом 1.
+
+Запуск из корня проекта:
+    python benchmarks/run_benchmarks.py --sizes 10000,100000 --output new.json
+    python benchmarks/run_benchmarks.py --sizes 10000,100000 --baseline old.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# pylint: disable=wrong-import-position
+from columnar_container import ColumnarEventContainer  # noqa: E402
+from command_parser import EVENT_TYPES, CommandParser, parse_add_fields  # noqa: E402
+from conditions import parse_condition  # noqa: E402
+from container import EventContainer  # noqa: E402
+from generate_commands import WorkloadGenerator, write_commands  # noqa: E402
+from historical_event import HistoricalEvent  # noqa: E402
+from metrics import Metrics  # noqa: E402
+from output import create_sink  # noqa: E402
+
+# Версия формата файла результатов
+RESULTS_FORMAT = 1
+
+# Размеры по умолчанию (строк файла команд)
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+
+# Пороги регрессии по умолчанию: допустимый относительный рост
+DEFAULT_THRESHOLDS = {'time': 0.15, 'memory': 0.10}
+
+# Число условий REM в замере remove
+REMOVE_SAMPLE = 1000
+
+STORAGES: Dict[str, Callable[[], EventContainer]] = {
+    'objects': EventContainer,
+    'columnar': ColumnarEventContainer,
+}
+
+# Результат замера: словарь с ключами benchmark, size, metric, value, unit
+Result = Dict[str, Any]
+
+
+def best_time(action: Callable[[Any], None], setup: Callable[[], Any],
+              repeat: int) -> float:
+    """
+    Лучшее время выполнения из нескольких повторов.
+
+    Args:
+        action: Замеряемое действие; получает результат setup
+        setup: Подготовка перед каждым повтором (не замеряется)
+        repeat: Число повторов
+
+    Returns:
+        Минимальное время в секундах
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        action(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_events(size: int, seed: int) -> List[HistoricalEvent]:
+    """
+    События команд ADD синтетического потока.
+
+    Args:
+        size: Количество событий
+        seed: Зерно генератора
+
+    Returns:
+        События в порядке добавления
+    """
+    generator = WorkloadGenerator(seed=seed)
+    events = []
+    for _ in range(size):
+        event_type, name, date, param = parse_add_fields(generator.add_line())
+        events.append(EVENT_TYPES[event_type](name, date, param))  # type: ignore[index]
+    return events
+
+
+def make_conditions(count: int, seed: int) -> List[str]:
+    """
+    Условия REM по распределению генератора.
+
+    Args:
+        count: Количество условий
+        seed: Зерно генератора (то же, что у событий, - условия
+            ссылаются на добавленные события)
+
+    Returns:
+        Строки условий
+    """
+    generator = WorkloadGenerator(seed=seed)
+    for _ in range(REMOVE_SAMPLE * 10):
+        generator.add_line()
+    return [generator.condition() for _ in range(count)]
+
+
+def process_file(filename: str, storage: str, stats: bool = False) -> None:
+    """Обработать файл команд с выводом в никуда (stats - со сбором метрик)."""
+    sink = create_sink('buffered', quiet=True, stream=io.StringIO())
+    CommandParser(STORAGES[storage](), output=sink,
+                  metrics=Metrics() if stats else None).process_file(filename)
+    sink.close()
+
+
+def run_size(size: int, args: argparse.Namespace, workdir: str) -> List[Result]:
+    """
+    Все замеры для одного размера.
+
+    Args:
+        size: Размер (строк файла команд и событий в контейнере)
+        args: Аргументы командной строки
+        workdir: Каталог для файлов команд
+
+    Returns:
+        Результаты замеров
+    """
+    results: List[Result] = []
+
+    def record(benchmark: str, metric: str, value: float, unit: str) -> None:
+        results.append({'benchmark': benchmark, 'size': size, 'metric': metric,
+                        'value': value, 'unit': unit})
+        print(f"  {benchmark:<14} {size:>10} {value:>14.4f} {unit}", flush=True)
+
+    filename = os.path.join(workdir, f"commands_{size}.txt")
+    write_commands(filename, size, seed=args.seed)
+    storage = args.storage
+    record('process_file', 'time',
+           best_time(lambda _: process_file(filename, storage),
+                     lambda: None, args.repeat), 's')
+    record('process_stats', 'time',
+           best_time(lambda _: process_file(filename, storage, stats=True),
+                     lambda: None, args.repeat), 's')
+
+    events = make_events(size, args.seed)
+
+    def filled() -> EventContainer:
+        container = STORAGES[storage]()
+        container.add_many(events)
+        return container
+
+    def add_all(container: EventContainer) -> None:
+        add = container.add
+        for event in events:
+            add(event)
+
+    record('add', 'time', best_time(add_all, STORAGES[storage], args.repeat), 's')
+
+    conditions = [parse_condition(text)
+                  for text in make_conditions(REMOVE_SAMPLE, args.seed)]
+
+    def remove_all(container: EventContainer) -> None:
+        for condition in conditions:
+            container.remove(condition)
+
+    record('remove', 'time', best_time(remove_all, filled, args.repeat), 's')
+
+    def print_all(container: EventContainer) -> None:
+        container.print_all(create_sink('buffered', stream=io.StringIO()))
+
+    record('print_all', 'time', best_time(print_all, filled, args.repeat), 's')
+
+    if not args.no_memory:
+        tracemalloc.start()
+        process_file(filename, storage)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        record('process_file', 'memory', peak / (1 << 20), 'MiB')
+    os.remove(filename)
+    return results
+
+
+def compare(baseline: Dict[str, Any], results: List[Result],
+            thresholds: Dict[str, float]) -> List[Tuple[Result, float, bool]]:
+    """
+    Сравнить результаты с прежними.
+
+    Args:
+        baseline: Прежний файл результатов
+        results: Новые результаты
+        thresholds: Допустимый относительный рост по метрикам
+
+    Returns:
+        Тройки (результат, относительное изменение, регрессия ли это)
+        для замеров, которые есть в обоих наборах
+    """
+    previous = {(r['benchmark'], r['size'], r['metric']): r['value']
+                for r in baseline.get('results', ())}
+    compared = []
+    for result in results:
+        old = previous.get((result['benchmark'], result['size'], result['metric']))
+        if not old:
+            continue
+        change = result['value'] / old - 1
+        limit = thresholds.get(result['metric'], DEFAULT_THRESHOLDS['time'])
+        compared.append((result, change, change > limit))
+    return compared
+
+
+def _sizes(text: str) -> List[int]:
+    """Разобрать список размеров через запятую."""
+    sizes = [int(item) for item in text.split(',')]
+    if any(size <= 0 for size in sizes):
+        raise argparse.ArgumentTypeError(f"Неверные размеры: {text}")
+    return sizes
+
+
+def main() -> int:
+    """Запуск замеров."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=_sizes, default=list(DEFAULT_SIZES),
+                        help="размеры через запятую (по умолчанию: "
+                             "10000,100000,1000000)")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="число повторов замера времени (по умолчанию: 3)")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="зерно генератора команд (по умолчанию: 1)")
+    parser.add_argument('--storage', choices=tuple(STORAGES), default='objects',
+                        help="реализация хранилища (по умолчанию: objects)")
+    parser.add_argument('--no-memory', action='store_true',
+                        help="не замерять пиковую память")
+    parser.add_argument('--output', help="файл для результатов в JSON")
+    parser.add_argument('--baseline', help="прежний файл результатов для сравнения")
+    parser.add_argument('--time-threshold', type=float, default=None,
+                        help="допустимое замедление (по умолчанию из baseline "
+                             "или 0.15)")
+    parser.add_argument('--memory-threshold', type=float, default=None,
+                        help="допустимый рост памяти (по умолчанию из baseline "
+                             "или 0.10)")
+    args = parser.parse_args()
+
+    baseline: Optional[Dict[str, Any]] = None
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        thresholds.update(baseline.get('thresholds', {}))  # type: ignore[union-attr]
+    if args.time_threshold is not None:
+        thresholds['time'] = args.time_threshold
+    if args.memory_threshold is not None:
+        thresholds['memory'] = args.memory_threshold
+
+    print(f"  {'замер':<14} {'размер':>10} {'значение':>14}")
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            results.extend(run_size(size, args, workdir))
+
+    report = {
+        'format': RESULTS_FORMAT,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'parameters': {'sizes': args.sizes, 'repeat': args.repeat,
+                       'seed': args.seed, 'storage': args.storage},
+        'thresholds': thresholds,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.output}")
+
+    if baseline is None:
+        return 0
+    regressions = 0
+    print(f"\nСравнение с {args.baseline} (пороги: время "
+          f"+{thresholds['time']:.0%}, память +{thresholds['memory']:.0%})")
+    for result, change, regressed in compare(baseline, results, thresholds):
+        regressions += regressed
+        status = "РЕГРЕССИЯ" if regressed else "ok"
+        print(f"  {result['benchmark']:<14} {result['metric']:<7} "
+              f"{result['size']:>10} {change:>+8.1%}  {status}")
+    print(f"Регрессий: {regressions}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Модуль контрольных точек обработки файла команд.
+
+Контрольная точка - небольшой JSON-файл с позицией возобновления
+(смещение в байтах и номер строки) и ссылкой на двоичный снимок
+контейнера, сделанный в этой позиции. Снимок каждой точки пишется в
+отдельный файл до записи JSON, поэтому точка всегда ссылается на
+полностью записанный снимок.
+"""
+
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+from command_reader import Position
+from container import EventContainer
+from snapshot import atomic_write, save_snapshot, load_snapshot
+
+CHECKPOINT_VERSION = 1
+
+# Интервал контрольных точек по умолчанию (в строках файла команд)
+DEFAULT_CHECKPOINT_LINES = 100_000
+
+
+class Checkpointer:
+    """
+    Периодическое сохранение контрольных точек.
+
+    Точка сохраняется, когда с предыдущей прочитано не меньше every_lines
+    строк или прошло не меньше every_seconds секунд (ограничение, которое
+    не задано, не проверяется).
+    """
+
+    def __init__(self, path: str, every_lines: Optional[int] = None,
+                 every_seconds: Optional[float] = None):
+        """
+        Инициализация.
+
+        Args:
+            path: Имя JSON-файла контрольной точки; снимки сохраняются
+                рядом с ним
+            every_lines: Интервал в строках файла команд
+            every_seconds: Интервал в секундах
+        """
+        if every_lines is None and every_seconds is None:
+            every_lines = DEFAULT_CHECKPOINT_LINES
+        self.path = path
+        self.every_lines = every_lines
+        self.every_seconds = every_seconds
+        self.saved = 0
+        self._last_line = 0
+        self._last_time = time.monotonic()
+
+    def start(self, position: Position) -> None:
+        """
+        Начать отсчет интервала с позиции.
+
+        Args:
+            position: Позиция, с которой начинается обработка
+        """
+        self._last_line = position[1]
+        self._last_time = time.monotonic()
+
+    def due(self, position: Position) -> bool:
+        """
+        Пора ли сохранять контрольную точку в позиции.
+
+        Args:
+            position: Текущая позиция возобновления
+
+        Returns:
+            True если интервал истек
+        """
+        if (self.every_lines is not None
+                and position[1] - self._last_line >= self.every_lines):
+            return True
+        return (self.every_seconds is not None
+                and time.monotonic() - self._last_time >= self.every_seconds)
+
+    def save(self, container: EventContainer, filename: str,
+             position: Position) -> None:
+        """
+        Сохранить контрольную точку: снимок контейнера и позицию.
+
+        Args:
+            container: Контейнер в состоянии после команд до позиции
+            filename: Имя обрабатываемого файла команд
+            position: Позиция возобновления
+
+        Raises:
+            OSError: Если файлы не удалось записать
+        """
+        previous = read_checkpoint(self.path)
+        offset, line_num = position
+        snapshot = f"{self.path}.{line_num}.snap"
+        save_snapshot(container, snapshot)
+
+        state = {
+            'version': CHECKPOINT_VERSION,
+            'file': os.path.abspath(filename),
+            'offset': offset,
+            'line': line_num,
+            'snapshot': os.path.abspath(snapshot),
+            'events': len(container),
+        }
+        with atomic_write(self.path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+
+        # Предыдущий снимок больше не нужен
+        if previous is not None and previous['snapshot'] != state['snapshot']:
+            try:
+                os.remove(previous['snapshot'])
+            except OSError:
+                pass
+        self.saved += 1
+        self.start(position)
+
+    def restore(self, container: EventContainer, filename: str) -> Position:
+        """
+        Восстановить контейнер из последней контрольной точки.
+
+        Args:
+            container: Контейнер, содержимое которого заменяется снимком
+            filename: Имя обрабатываемого файла команд
+
+        Returns:
+            Позиция, с которой продолжается обработка; (0, 0), если
+            контрольной точки еще нет
+
+        Raises:
+            ValueError: Если точка относится к другому файлу, файл
+                короче сохраненной позиции или снимок поврежден
+            OSError: Если снимок не удалось прочитать
+        """
+        state = read_checkpoint(self.path)
+        if state is None:
+            return (0, 0)
+        if state['file'] != os.path.abspath(filename):
+            raise ValueError(
+                f"Контрольная точка относится к другому файлу: {state['file']}")
+        if os.path.getsize(filename) < state['offset']:
+            raise ValueError(
+                "Файл команд короче позиции контрольной точки")
+        load_snapshot(container, state['snapshot'])
+        position = (state['offset'], state['line'])
+        self.start(position)
+        return position
+
+
+def read_checkpoint(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Прочитать контрольную точку.
+
+    Args:
+        path: Имя JSON-файла контрольной точки
+
+    Returns:
+        Содержимое точки или None, если файла нет
+
+    Raises:
+        ValueError: Если файл поврежден или его версия не поддерживается
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    if not isinstance(state, dict) or state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Неподдерживаемая контрольная точка: {path}")
+    return state
@@ -0,0 +1,531 @@
+"""
+Модуль колоночного хранилища исторических событий.
+События хранятся не объектами, а столбцами компактных массивов;
+объекты HistoricalEvent, Battle и Treaty создаются только по запросу
+(например, для вывода на экран).
+"""
+
+import sys
+from array import array
+from itertools import compress
+from typing import (
+    Dict, List, Callable, Iterator, Optional, Sequence, Set, Tuple)
+from historical_event import HistoricalEvent, Battle, Treaty, DateKey, make_date_key
+from conditions import FieldEquals, NameContains, DateCompare
+from container import EventContainer, DEFAULT_COMPACT_RATIO
+from parallel_scan import DEFAULT_PARALLEL_THRESHOLD, ParallelScanner
+
+# Код типа события - позиция класса в кортеже
+EVENT_CLASSES = (HistoricalEvent, Battle, Treaty)
+TYPE_CODES = {cls: code for code, cls in enumerate(EVENT_CLASSES)}
+BATTLE_CODE = TYPE_CODES[Battle]
+TREATY_CODE = TYPE_CODES[Treaty]
+
+# Значения поля type и соответствующие им коды
+TYPE_NAME_CODES = {"Битва": BATTLE_CODE, "Договор": TREATY_CODE}
+
+# Поле специфичного параметра и код типа, для которого оно определено
+PARAM_FIELDS = {'place': BATTLE_CODE, 'parties': TREATY_CODE}
+
+# Столбец, подходящие значения столбца и код типа, которым дополнительно
+# ограничены строки (None - без ограничения)
+ColumnFilter = Tuple[array, Set[int], Optional[int]]
+
+
+class StringTable:
+    """Таблица интернированных строк: строка <-> целочисленный id."""
+
+    def __init__(self):
+        """Инициализация таблицы; id 0 зарезервирован за пустой строкой."""
+        self._ids: Dict[str, int] = {"": 0}
+        self._values: List[str] = [""]
+        self.reclaimed = 0
+
+    def __len__(self) -> int:
+        """Количество строк в таблице."""
+        return len(self._values)
+
+    def __getitem__(self, string_id: int) -> str:
+        """Строка по идентификатору."""
+        return self._values[string_id]
+
+    def intern(self, value: str) -> int:
+        """
+        Получить идентификатор строки, добавив ее при необходимости.
+
+        Args:
+            value: Строка
+
+        Returns:
+            Идентификатор строки
+        """
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = len(self._values)
+            self._ids[value] = string_id
+            self._values.append(value)
+        return string_id
+
+    def lookup(self, value: str) -> int:
+        """
+        Идентификатор строки без добавления.
+
+        Args:
+            value: Строка
+
+        Returns:
+            Идентификатор или -1, если строки нет в таблице
+        """
+        return self._ids.get(value, -1)
+
+    def sweep(self, used: Set[int]) -> array:
+        """
+        Удалить строки, на которые нет ссылок, и перенумеровать остальные.
+
+        Args:
+            used: Идентификаторы строк, на которые есть ссылки
+
+        Returns:
+            Новые идентификаторы по старым (0 для удаленных строк)
+        """
+        remap = array('I', [0]) * len(self._values)
+        values = [""]
+        for string_id in sorted(used):
+            if string_id:
+                remap[string_id] = len(values)
+                values.append(self._values[string_id])
+        self.reclaimed += len(self._values) - len(values)
+        self._values = values
+        self._ids = {value: string_id for string_id, value in enumerate(values)}
+        return remap
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Статистика таблицы.
+
+        Returns:
+            Словарь с ключами strings, string_bytes, reclaimed
+        """
+        return {
+            'strings': len(self._values) - 1,
+            'string_bytes': sum(map(sys.getsizeof, self._values)),
+            'reclaimed': self.reclaimed,
+        }
+
+
+class ColumnarEventContainer(EventContainer):
+    """
+    Контейнер с колоночным хранением событий.
+
+    Столбцы: идентификаторы интернированных строк названия, даты и
+    специфичного параметра (место или стороны), однобайтовый код типа
+    и битовая карта действительных строк. Идентификатор события -
+    номер строки. По умолчанию вторичные индексы не ведутся: условия
+    REM проверяются по столбцам без создания объектов событий.
+    Удаленные строки остаются в столбцах со сброшенным битом
+    действительности до отложенного сжатия. На больших столбцах условия
+    REM могут проверяться участками в пуле процессов (scan_workers).
+    """
+
+    def __init__(self, trigram_index: bool = False, indexed: bool = False,
+                 compact_ratio: float = DEFAULT_COMPACT_RATIO,
+                 scan_workers: int = 1,
+                 parallel_threshold: int = DEFAULT_PARALLEL_THRESHOLD):
+        """
+        Инициализация пустого колоночного контейнера.
+
+        Args:
+            trigram_index: Поддерживать ли индекс триграмм названий
+            indexed: Поддерживать ли вторичные индексы
+            compact_ratio: Доля удаленных строк, после которой столбцы
+                сжимаются
+            scan_workers: Число процессов проверки условий REM по
+                столбцам (1 - проверка в текущем процессе)
+            parallel_threshold: Число строк столбцов, начиная с которого
+                проверка выполняется параллельно
+        """
+        # Строки столбцов уже хранятся по одному экземпляру в таблице
+        super().__init__(trigram_index=trigram_index, indexed=indexed,
+                         compact_ratio=compact_ratio, intern_strings=False)
+        self._strings = StringTable()
+        self._date_keys: Dict[int, DateKey] = {}
+        self._name_ids = array('I')
+        self._date_ids = array('I')
+        self._param_ids = array('I')
+        self._type_codes = array('B')
+        self._valid = bytearray()
+        self.parallel_threshold = parallel_threshold
+        self._scanner: Optional[ParallelScanner] = None
+        if scan_workers > 1:
+            self._scanner = ParallelScanner(scan_workers)
+
+    def close(self) -> None:
+        """Освободить ресурсы контейнера (пул процессов проверки)."""
+        if self._scanner is not None:
+            self._scanner.close()
+
+    # Примитивы хранилища
+
+    def _put(self, event: HistoricalEvent) -> int:
+        """
+        Разложить событие по столбцам.
+
+        Args:
+            event: Сохраняемое событие
+
+        Returns:
+            Номер строки события
+
+        Raises:
+            TypeError: Если тип события не поддерживается
+        """
+        type_code = TYPE_CODES.get(type(event))
+        if type_code is None:
+            raise TypeError(
+                f"Неподдерживаемый тип события: {type(event).__name__}")
+        if type_code == BATTLE_CODE:
+            param = event.place  # type: ignore[attr-defined]
+        elif type_code == TREATY_CODE:
+            param = event.parties  # type: ignore[attr-defined]
+        else:
+            param = ""
+
+        row = len(self._type_codes)
+        date_id = self._strings.intern(event.date)
+        if date_id not in self._date_keys:
+            self._date_keys[date_id] = event.date_key
+        self._name_ids.append(self._strings.intern(event.name))
+        self._date_ids.append(date_id)
+        self._param_ids.append(self._strings.intern(param))
+        self._type_codes.append(type_code)
+        if row % 8 == 0:
+            self._valid.append(0)
+        self._valid[row >> 3] |= 1 << (row & 7)
+        self._live += 1
+        return row
+
+    def _put_many(self, events: Sequence[HistoricalEvent]) -> Sequence[int]:
+        """
+        Разложить пакет событий по столбцам.
+
+        Args:
+            events: Сохраняемые события
+
+        Returns:
+            Номера строк событий в том же порядке
+        """
+        return [self._put(event) for event in events]
+
+    def _pop(self, event_id: int) -> HistoricalEvent:
+        """
+        Пометить строку недействительной.
+
+        Args:
+            event_id: Номер строки
+
+        Returns:
+            Материализованное удаленное событие
+        """
+        event = self._get(event_id)
+        self._valid[event_id >> 3] &= ~(1 << (event_id & 7)) & 0xFF
+        self._live -= 1
+        return event
+
+    def _get(self, event_id: int) -> HistoricalEvent:
+        """
+        Материализовать событие из столбцов.
+
+        Args:
+            event_id: Номер строки
+
+        Returns:
+            Новый объект события
+        """
+        strings = self._strings
+        name = strings[self._name_ids[event_id]]
+        date = strings[self._date_ids[event_id]]
+        type_code = self._type_codes[event_id]
+        if type_code == BATTLE_CODE:
+            return Battle(name, date, strings[self._param_ids[event_id]])
+        if type_code == TREATY_CODE:
+            return Treaty(name, date, strings[self._param_ids[event_id]])
+        return HistoricalEvent(name, date)
+
+    def _items(self) -> Iterator[Tuple[int, HistoricalEvent]]:
+        """Пары (номер строки, материализованное событие)."""
+        for row in self._rows():
+            yield row, self._get(row)
+
+    def _rows(self) -> Iterator[int]:
+        """Номера действительных строк по порядку."""
+        for byte_index, byte in enumerate(self._valid):
+            if not byte:
+                continue
+            base = byte_index << 3
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield base + bit
+
+    def _needs_scan(self, condition: Callable[[HistoricalEvent], bool]) -> bool:
+        """
+        Требует ли условие материализации каждого события.
+
+        Структурированные условия проверяются по столбцам отдельными
+        быстрыми проходами, поэтому объединять их не нужно.
+
+        Args:
+            condition: Функция-условие
+
+        Returns:
+            True если условие проверяется на материализованных событиях
+        """
+        return not isinstance(condition, (FieldEquals, NameContains, DateCompare))
+
+    def _scan(self, condition: Callable[[HistoricalEvent], bool]) -> List[int]:
+        """
+        Проверка условия по столбцам.
+
+        Структурированные условия сравнивают целочисленные идентификаторы
+        строк; строковые операции выполняются один раз на каждое
+        различное значение, а не на каждое событие. Если задан пул
+        процессов и в столбцах не меньше parallel_threshold строк,
+        столбец проверяется участками параллельно. Прочие условия
+        проверяются на материализованных событиях.
+
+        Args:
+            condition: Функция-условие для проверки событий
+
+        Returns:
+            Номера подходящих строк
+        """
+        if isinstance(condition, (FieldEquals, NameContains, DateCompare)):
+            if (self._scanner is not None
+                    and len(self._type_codes) >= self.parallel_threshold):
+                return self._scan_parallel(condition)
+            return list(self._scan_columns(condition))
+        return super()._scan(condition)
+
+    def _matches(self, condition: Callable[[HistoricalEvent], bool],
+                 ordered: bool = True) -> Iterator[int]:
+        """
+        Ленивый поток номеров подходящих строк.
+
+        Структурированное условие, для которого нет индекса, проверяется
+        по столбцам по мере перебора строк; строки сравнения дат
+        сортируются по дате, если нужен порядок выдачи.
+
+        Args:
+            condition: Функция-условие для проверки событий
+            ordered: Нужен ли порядок выдачи
+
+        Returns:
+            Итератор номеров строк
+        """
+        if (not isinstance(condition, (FieldEquals, NameContains, DateCompare))
+                or not super()._needs_scan(condition)):
+            return super()._matches(condition, ordered)
+        rows = self._scan_columns(condition)
+        if ordered and isinstance(condition, DateCompare):
+            # Сравнение дат выдает строки в порядке дат, как индекс дат
+            date_keys, column = self._date_keys, self._date_ids
+            return iter(sorted(rows, key=lambda row: (date_keys[column[row]], row)))
+        return rows
+
+    def _scan_columns(self, condition: Callable[[HistoricalEvent], bool]
+                      ) -> Iterator[int]:
+        """
+        Номера строк, подходящих под структурированное условие.
+
+        Args:
+            condition: Структурированное условие
+
+        Returns:
+            Итератор номеров строк по порядку
+        """
+        column, ids, type_code = self._column_filter(condition)
+        if not ids:
+            return iter(())
+        if type_code is None:
+            return (row for row in self._rows() if column[row] in ids)
+        codes = self._type_codes
+        return (row for row in self._rows()
+                if column[row] in ids and codes[row] == type_code)
+
+    def _scan_parallel(self, condition: Callable[[HistoricalEvent], bool]
+                       ) -> List[int]:
+        """
+        Номера строк, подходящих под структурированное условие, по маске
+        столбца из пула процессов.
+
+        Маска не учитывает удаленные строки и код типа, поэтому они
+        проверяются только для строк, отмеченных в маске.
+
+        Args:
+            condition: Структурированное условие
+
+        Returns:
+            Номера строк по порядку
+        """
+        column, ids, type_code = self._column_filter(condition)
+        if not ids:
+            return []
+        mask = self._scanner.mask(column, ids)  # type: ignore[union-attr]
+        valid, codes = self._valid, self._type_codes
+        return [row for row in compress(range(len(mask)), mask)
+                if valid[row >> 3] >> (row & 7) & 1
+                and (type_code is None or codes[row] == type_code)]
+
+    def _column_filter(self, condition: Callable[[HistoricalEvent], bool]
+                       ) -> ColumnFilter:
+        """
+        Столбец и подходящие значения столбца для структурированного
+        условия.
+
+        Подходящие идентификаторы строк находятся по таблице строк: для
+        каждого различного значения условие проверяется один раз.
+
+        Args:
+            condition: Структурированное условие (FieldEquals,
+                NameContains или DateCompare)
+
+        Returns:
+            Столбец, множество подходящих значений (пустое - ни одна
+            строка не подходит) и код типа для полей place и parties
+        """
+        if isinstance(condition, NameContains):
+            strings = self._strings
+            return self._name_ids, {
+                string_id for string_id in set(self._name_ids)
+                if condition.match_value(strings[string_id])}, None
+        if isinstance(condition, DateCompare):
+            if condition.operator == '<':
+                date_ids = {date_id for date_id, key in self._date_keys.items()
+                            if key < condition.date_key}
+            else:
+                date_ids = {date_id for date_id, key in self._date_keys.items()
+                            if key > condition.date_key}
+            return self._date_ids, date_ids, None
+
+        field, value = condition.field, condition.value  # type: ignore[attr-defined]
+        if field == 'type':
+            type_code = TYPE_NAME_CODES.get(value)
+            return self._type_codes, set() if type_code is None else {type_code}, None
+        string_id = self._strings.lookup(value)
+        ids = set() if string_id < 0 else {string_id}
+        if field == 'name':
+            return self._name_ids, ids, None
+        if field == 'date':
+            return self._date_ids, ids, None
+        if field in PARAM_FIELDS:
+            return self._param_ids, ids, PARAM_FIELDS[field]
+        return self._name_ids, set(), None
+
+    def _tombstones(self) -> int:
+        """Количество недействительных строк в столбцах."""
+        return len(self._type_codes) - self._live
+
+    def _compact(self) -> None:
+        """
+        Удалить недействительные строки из столбцов и перестроить индексы.
+
+        Строки таблицы, на которые не осталось ссылок из столбцов (значения
+        только удаленных событий), удаляются, а идентификаторы остальных
+        строк перенумеровываются.
+        """
+        rows = list(self._rows())
+        self._name_ids = array('I', (self._name_ids[row] for row in rows))
+        self._date_ids = array('I', (self._date_ids[row] for row in rows))
+        self._param_ids = array('I', (self._param_ids[row] for row in rows))
+        self._type_codes = array('B', (self._type_codes[row] for row in rows))
+        self._valid = bytearray(b'\xff' * (len(rows) >> 3))
+        if len(rows) & 7:
+            self._valid.append((1 << (len(rows) & 7)) - 1)
+
+        date_ids = set(self._date_ids)
+        used = date_ids.union(self._name_ids, self._param_ids)
+        if len(used | {0}) < len(self._strings):
+            remap = self._strings.sweep(used)
+            self._name_ids = array('I', map(remap.__getitem__, self._name_ids))
+            self._date_ids = array('I', map(remap.__getitem__, self._date_ids))
+            self._param_ids = array('I', map(remap.__getitem__, self._param_ids))
+            self._date_keys = {remap[date_id]: key
+                               for date_id, key in self._date_keys.items()
+                               if date_id in date_ids}
+
+        self._reindex()
+
+    def intern_stats(self) -> Dict[str, int]:
+        """
+        Статистика таблицы строк столбцов.
+
+        Returns:
+            Словарь StringTable.stats и число ссылок на строки из столбцов
+        """
+        stats = self._strings.stats()
+        stats['references'] = 3 * self._live
+        return stats
+
+    def clear(self) -> None:
+        """Удалить все события, строки и очистить индексы."""
+        self._strings = StringTable()
+        self._date_keys = {}
+        self._name_ids = array('I')
+        self._date_ids = array('I')
+        self._param_ids = array('I')
+        self._type_codes = array('B')
+        self._valid = bytearray()
+        self._live = 0
+        self._clear_indexes()
+
+    def restore_columns(self, strings: Sequence[str], type_codes: array,
+                        name_ids: array, date_ids: array,
+                        param_ids: array) -> None:
+        """
+        Добавить события готовыми столбцами (например, из снимка).
+
+        Идентификаторы строк переводятся в идентификаторы таблицы
+        контейнера одним проходом по каждому столбцу; объекты событий
+        создаются только для построения вторичных индексов, если они
+        включены.
+
+        Args:
+            strings: Таблица строк, на которую ссылаются столбцы
+            type_codes: Коды типов событий
+            name_ids: Идентификаторы строк названий
+            date_ids: Идентификаторы строк дат
+            param_ids: Идентификаторы строк специфичных параметров
+        """
+        remap = array('I', map(self._strings.intern, strings)).__getitem__
+        start = len(self._type_codes)
+        for date_id in set(date_ids):
+            own_id = remap(date_id)
+            if own_id not in self._date_keys:
+                self._date_keys[own_id] = make_date_key(strings[date_id])
+        self._name_ids.extend(map(remap, name_ids))
+        self._date_ids.extend(map(remap, date_ids))
+        self._param_ids.extend(map(remap, param_ids))
+        self._type_codes.extend(type_codes)
+        self._live += len(type_codes)
+
+        # Биты действительности: сначала дополняется неполный последний
+        # байт, затем дописываются целые байты единиц
+        total = len(self._type_codes)
+        row = start
+        while row < total and row & 7:
+            self._valid[row >> 3] |= 1 << (row & 7)
+            row += 1
+        full_bytes = (total - row) >> 3
+        self._valid.extend(b'\xff' * full_bytes)
+        row += full_bytes << 3
+        if row < total:
+            self._valid.append((1 << (total - row)) - 1)
+        if self._indexes:
+            for row in range(start, total):
+                self._index(row, self._get(row))
+
+    def _reindex(self) -> None:
+        """Перестроить индексы по действительным строкам."""
+        self._clear_indexes()
+        if self._indexes:
+            for row, event in self._items():
+                self._index(row, event)
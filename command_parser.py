@@ -3,22 +3,187 @@
 """
 
 import re
-from typing import Callable
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Type)
 from historical_event import HistoricalEvent, Battle, Treaty
 from container import EventContainer
+from conditions import AnyCondition, parse_condition
+from output import OutputSink
+from metrics import STATS_FORMATS, Metrics
+from memprofile import MemoryProfiler
+from command_reader import (
+    ADD, REM, PRINT, SAVE, LOAD, FIND, COUNT, EXPLAIN, STATS, Command,
+    Position, open_commands)
+from checkpoint import Checkpointer
+from follow import DEFAULT_POLL_INTERVAL, FileFollower
+from snapshot import save_snapshot, load_snapshot
+
+# Размер кеша разобранных условий по умолчанию
+DEFAULT_CONDITION_CACHE_SIZE = 1024
+
+# Максимальное число команд ADD в одном пакете
+DEFAULT_ADD_BATCH_SIZE = 4096
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Завершающее предложение LIMIT или OFFSET команды FIND
+_PAGINATION = re.compile(r'\s+(LIMIT|OFFSET)\s+([^\s"]+)$')
+
+
+def normalize_condition(condition_str: str) -> str:
+    """
+    Нормализовать строку условия для использования в качестве ключа кеша.
+
+    Пробелы вне кавычек сжимаются до одного, значения в кавычках
+    не изменяются.
+
+    Args:
+        condition_str: Строка с условием
+
+    Returns:
+        Нормализованная строка
+    """
+    parts = condition_str.strip().split('"')
+    parts[::2] = [_WHITESPACE.sub(' ', part) for part in parts[::2]]
+    return '"'.join(parts)
+
+
+def parse_pagination(query: str) -> Tuple[str, int, Optional[int]]:
+    """
+    Отделить от запроса FIND предложения LIMIT и OFFSET.
+
+    Предложения стоят после условия в любом порядке; значение условия
+    заканчивается кавычкой, поэтому слова LIMIT и OFFSET внутри кавычек
+    предложениями не считаются.
+
+    Args:
+        query: Запрос без имени команды
+
+    Returns:
+        Тройка (условие, offset, limit); limit None - без ограничения
+
+    Raises:
+        ValueError: Если значение предложения не является неотрицательным
+            целым числом или предложение повторяется
+    """
+    clauses: Dict[str, int] = {}
+    match = _PAGINATION.search(query)
+    while match is not None:
+        keyword, value = match.groups()
+        if keyword in clauses:
+            raise ValueError(f"Повторное предложение {keyword}")
+        if not value.isdigit():
+            raise ValueError(f"Неверное значение {keyword}: {value}")
+        clauses[keyword] = int(value)
+        query = query[:match.start()]
+        match = _PAGINATION.search(query)
+    return query.strip(), clauses.get('OFFSET', 0), clauses.get('LIMIT')
+
+
+# Классы событий по значению поля <тип> команды ADD
+EVENT_TYPES: Dict[str, Type[HistoricalEvent]] = {
+    "Битва": Battle,
+    "Договор": Treaty,
+}
+
+# Разобранная команда ADD: (тип, название, дата, параметр) при успехе
+# или (None, сообщение об ошибке, "", "") - компактный кортеж строк,
+# который дешево передается между процессами
+AddFields = Tuple[Optional[str], str, str, str]
+
+# Сегмент выполнения: (вид команд, номер первой строки, строки команд,
+# позиция возобновления после сегмента или None)
+Segment = Tuple[str, int, List[str], Optional[Position]]
+
+
+def parse_add_fields(line: str) -> AddFields:
+    """
+    Разбор строки команды ADD в поля без создания объекта события.
+
+    Формат: ADD <тип>|<название>|<дата>|<специфичный_параметр>
+
+    Args:
+        line: Строка с командой ADD
+
+    Returns:
+        Кортеж полей или (None, сообщение об ошибке, "", "")
+    """
+    # Убираем "ADD " из начала строки
+    data = line[4:].strip()
+
+    # Разделяем по символу |
+    parts = [part.strip() for part in data.split('|')]
+
+    if len(parts) < 4:
+        return None, f"Ошибка: Неверный формат команды ADD: {line}", "", ""
+
+    event_type = parts[0]
+    if event_type not in EVENT_TYPES:
+        return None, f"Ошибка: Неизвестный тип события: {event_type}", "", ""
+    return event_type, parts[1], parts[2], parts[3]
+
+
+def parse_add_segment(lines: List[str]) -> List[AddFields]:
+    """
+    Разбор пакета команд ADD (выполняется и в рабочих процессах).
+
+    Args:
+        lines: Строки с командами ADD
+
+    Returns:
+        Разобранные поля в порядке команд
+    """
+    return [parse_add_fields(line) for line in lines]
 
 
 class CommandParser:
     """Парсер команд для обработки файла с командами."""
 
-    def __init__(self, container: EventContainer):
+    def __init__(self, container: EventContainer,
+                 condition_cache_size: int = DEFAULT_CONDITION_CACHE_SIZE,
+                 output: Optional[OutputSink] = None,
+                 add_batch_size: int = DEFAULT_ADD_BATCH_SIZE,
+                 reader: str = 'text', workers: int = 1,
+                 checkpointer: Optional[Checkpointer] = None,
+                 metrics: Optional[Metrics] = None,
+                 memory_profiler: Optional[MemoryProfiler] = None):
         """
         Инициализация парсера.
 
         Args:
             container: Контейнер для хранения событий
+            condition_cache_size: Максимальное число разобранных условий
+                в кеше (0 - без кеширования)
+            output: Приемник вывода (по умолчанию - стандартный вывод)
+            add_batch_size: Максимальное число подряд идущих команд ADD,
+                добавляемых в контейнер одним пакетом
+            reader: Способ чтения файла команд: text или mmap
+            workers: Число процессов для разбора пакетов ADD при обработке
+                файла (1 - без пула процессов)
+            checkpointer: Сохранение контрольных точек при обработке
+                файла (None - без контрольных точек)
+            metrics: Сбор метрик выполнения команд (None - без метрик;
+                время команд тогда не замеряется)
+            memory_profiler: Профилировщик памяти, получающий каждый
+                выполненный сегмент (None - без профилирования)
         """
         self.container = container
+        self.output = output if output is not None else OutputSink()
+        self.add_batch_size = max(1, add_batch_size)
+        self.reader = reader
+        self.workers = workers
+        self.checkpointer = checkpointer
+        self.metrics = metrics
+        self.memory_profiler = memory_profiler
+        self._filename = ""
+        self.condition_cache_size = condition_cache_size
+        self._condition_cache: 'OrderedDict[str, AnyCondition]' = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def parse_add_command(self, line: str) -> bool:
         """
@@ -34,38 +199,87 @@ class CommandParser:
         Returns:
             True если команда успешно обработана, False иначе
         """
-        # Убираем "ADD " из начала строки
-        data = line[4:].strip()
+        event, error = self._build_event(line)
+        if event is None:
+            self.output.write(error)
+            return False
 
-        # Разделяем по символу |
-        parts = [part.strip() for part in data.split('|')]
+        self.container.add(event)
+        self.output.echo(f"Добавлено событие: {event}")
+        return True
 
-        if len(parts) < 4:
-            print(f"Ошибка: Неверный формат команды ADD: {line}")
-            return False
+    def parse_add_commands(self, lines: List[str]) -> int:
+        """
+        Пакетная обработка подряд идущих команд ADD.
 
-        event_type = parts[0]
-        name = parts[1]
-        date = parts[2]
-        specific_param = parts[3]
+        Все события пакета добавляются одним вызовом add_many, а сообщения
+        выводятся в том же порядке, что и при поштучной обработке.
 
-        try:
-            event: HistoricalEvent
-            if event_type == "Битва":
-                event = Battle(name, date, specific_param)
-            elif event_type == "Договор":
-                event = Treaty(name, date, specific_param)
+        Args:
+            lines: Строки с командами ADD
+
+        Returns:
+            Количество добавленных событий
+        """
+        return self._add_parsed(parse_add_segment(lines))
+
+    def _add_parsed(self, rows: List[AddFields]) -> int:
+        """
+        Добавить в контейнер пакет уже разобранных команд ADD.
+
+        Args:
+            rows: Результаты parse_add_fields в порядке команд
+
+        Returns:
+            Количество добавленных событий
+        """
+        results = [self._event_from_fields(fields) for fields in rows]
+        events = [event for event, _ in results if event is not None]
+        self.container.add_many(events)
+
+        quiet = self.output.quiet
+        for event, error in results:
+            if event is None:
+                self.output.write(error)
             else:
-                print(f"Ошибка: Неизвестный тип события: {event_type}")
-                return False
+                # В тихом режиме эхо только учитывается, строка не нужна
+                self.output.echo(
+                    "" if quiet else f"Добавлено событие: {event}")
+        return len(events)
 
-            self.container.add(event)
-            print(f"Добавлено событие: {event}")
-            return True
+    def _build_event(
+            self, line: str) -> Tuple[Optional[HistoricalEvent], str]:
+        """
+        Разбор команды ADD в объект события без добавления в контейнер.
+
+        Args:
+            line: Строка с командой ADD
+
+        Returns:
+            Пара (событие, "") при успехе или (None, сообщение об ошибке)
+        """
+        return self._event_from_fields(parse_add_fields(line))
+
+    @staticmethod
+    def _event_from_fields(
+            fields: AddFields) -> Tuple[Optional[HistoricalEvent], str]:
+        """
+        Создание объекта события из разобранных полей команды ADD.
+
+        Args:
+            fields: Результат parse_add_fields
 
+        Returns:
+            Пара (событие, "") при успехе или (None, сообщение об ошибке)
+        """
+        event_type, name, date, specific_param = fields
+        if event_type is None:
+            return None, name
+
+        try:
+            return EVENT_TYPES[event_type](name, date, specific_param), ""
         except (ValueError, TypeError) as e:
-            print(f"Ошибка при добавлении события: {e}")
-            return False
+            return None, f"Ошибка при добавлении события: {e}"
 
     def parse_rem_command(self, line: str) -> bool:
         """
@@ -77,13 +291,15 @@ class CommandParser:
         - place == "<место>" (только для битв)
         - parties == "<стороны>" (только для договоров)
         - name contains "<подстрока>"
-        - date > "<дата>" или date < "<дата>" (лексикографическое сравнение)
+        - date > "<дата>" или date < "<дата>" (год сравнивается как число)
+        Условия объединяются операциями AND, OR, NOT и скобками.
 
         Примеры:
         REM type == "Битва"
         REM name == "Куликовская битва"
         REM date > "1500"
         REM name contains "война"
+        REM type == "Битва" AND (date < "1500" OR NOT place == "Бородино")
 
         Args:
             line: Строка с командой REM
@@ -97,113 +313,594 @@ class CommandParser:
         try:
             condition = self._parse_condition(condition_str)
             removed_count = self.container.remove(condition)
-            print(f"Удалено событий: {removed_count}")
+            self.output.write(f"Удалено событий: {removed_count}")
             return True
 
         except (ValueError, AttributeError) as e:
-            print(f"Ошибка при удалении событий: {e}")
+            self.output.write(f"Ошибка при удалении событий: {e}")
             return False
 
-    def _parse_condition(
-            self, condition_str: str) -> Callable[[HistoricalEvent], bool]:
+    def parse_rem_commands(self, lines: List[str]) -> int:
         """
-        Парсинг условия в функцию-предикат.
+        Обработка серии подряд идущих команд REM.
+
+        Условия всей серии проверяются контейнером за один проход
+        (remove_many); каждая команда получает свое количество удаленных
+        событий, как при последовательном выполнении. Сообщения выводятся
+        в исходном порядке команд.
+
+        Args:
+            lines: Строки с командами REM
+
+        Returns:
+            Количество команд, завершившихся ошибкой
+        """
+        if len(lines) == 1:
+            return 0 if self.parse_rem_command(lines[0]) else 1
+
+        parsed: List[Optional[AnyCondition]] = []
+        errors: List[str] = []
+        for line in lines:
+            try:
+                parsed.append(self._parse_condition(line[4:].strip()))
+                errors.append("")
+            except ValueError as e:
+                parsed.append(None)
+                errors.append(f"Ошибка при удалении событий: {e}")
+
+        conditions = [condition for condition in parsed if condition is not None]
+        if not self.container.shares_scan(conditions):
+            # Без общего прохода условия выполняются по одному; команды
+            # выполняются здесь же, чтобы ошибка в одной из них не
+            # затронула уже выполненные
+            return sum(not self.parse_rem_command(line) for line in lines)
+        try:
+            counts = iter(self.container.remove_many(conditions))
+        except (ValueError, AttributeError):
+            # Общий проход не меняет контейнер до конца проверки,
+            # поэтому можно безопасно выполнить команды по одной
+            return sum(not self.parse_rem_command(line) for line in lines)
+
+        for condition, error in zip(parsed, errors):
+            if condition is None:
+                self.output.write(error)
+            else:
+                self.output.write(f"Удалено событий: {next(counts)}")
+        return len(lines) - len(conditions)
+
+    def parse_find_command(self, line: str) -> bool:
+        """
+        Парсинг команды FIND: вывод событий по условию без удаления.
+        Формат: FIND <условие> [LIMIT <число>] [OFFSET <число>]
+        Условия те же, что у REM.
+
+        Примеры:
+        FIND type == "Битва" LIMIT 10
+        FIND date > "1800" LIMIT 10 OFFSET 20
+
+        Args:
+            line: Строка с командой FIND
+
+        Returns:
+            True если команда успешно обработана, False иначе
+        """
+        try:
+            condition_str, offset, limit = parse_pagination(line[5:].strip())
+            condition = self._parse_condition(condition_str)
+            events = self.container.find(condition, offset, limit)
+        except (ValueError, AttributeError) as e:
+            self.output.write(f"Ошибка при поиске событий: {e}")
+            return False
+
+        # Строки формируются по мере перебора и записываются порциями,
+        # поэтому большой результат не собирается в памяти целиком
+        found = 0
+
+        def numbered() -> Iterator[str]:
+            """Строки найденных событий с подсчетом их количества."""
+            nonlocal found
+            for found, event in enumerate(events, 1):
+                yield f"{offset + found}. {event}"
+
+        try:
+            self.output.write_lines(numbered())
+        except (ValueError, AttributeError) as e:
+            self.output.write(f"Ошибка при поиске событий: {e}")
+            return False
+        self.output.write(f"Найдено событий: {found}")
+        return True
+
+    def parse_count_command(self, line: str) -> bool:
+        """
+        Парсинг команды COUNT: количество событий по условию.
+        Формат: COUNT <условие> (условия те же, что у REM)
+
+        Args:
+            line: Строка с командой COUNT
+
+        Returns:
+            True если команда успешно обработана, False иначе
+        """
+        try:
+            condition = self._parse_condition(line[6:].strip())
+            count = self.container.count(condition)
+        except (ValueError, AttributeError) as e:
+            self.output.write(f"Ошибка при подсчете событий: {e}")
+            return False
+        self.output.write(f"Количество событий: {count}")
+        return True
+
+    def parse_explain_command(self, line: str) -> bool:
+        """
+        Парсинг команды EXPLAIN: вывод плана выполнения условия.
+        Формат: EXPLAIN <условие> (условия те же, что у REM)
+
+        Args:
+            line: Строка с командой EXPLAIN
+
+        Returns:
+            True если команда успешно обработана, False иначе
+        """
+        condition_str = line[8:].strip()
+        try:
+            condition = self._parse_condition(condition_str)
+            plan = self.container.explain(condition)
+        except (ValueError, AttributeError) as e:
+            self.output.write(f"Ошибка при построении плана: {e}")
+            return False
+        self.output.write_lines([f"План запроса: {condition}", *plan])
+        return True
+
+    def parse_stats_command(self, line: str) -> bool:
+        """
+        Парсинг команды STATS: вывод собранных метрик.
+        Формат: STATS [json|prometheus]
+
+        Примеры:
+        STATS
+        STATS prometheus
+
+        Args:
+            line: Строка с командой STATS
+
+        Returns:
+            True если метрики выведены, False иначе
+        """
+        fmt = line[5:].strip().lower() or 'json'
+        if fmt not in STATS_FORMATS:
+            self.output.write(f"Ошибка: Неизвестный формат статистики: {fmt}")
+            return False
+        if self.metrics is None:
+            self.output.write("Ошибка: Сбор статистики не включен (--stats)")
+            return False
+        self.metrics.set_string_pool(self.container.intern_stats())
+        self.output.write(self.metrics.render(fmt))
+        return True
+
+    def parse_save_command(self, line: str) -> bool:
+        """
+        Парсинг команды SAVE: сохранение контейнера в двоичный снимок.
+        Формат: SAVE <имя файла>
+
+        Args:
+            line: Строка с командой SAVE
+
+        Returns:
+            True если снимок сохранен, False иначе
+        """
+        return self.save_snapshot(line[5:].strip())
+
+    def parse_load_command(self, line: str) -> bool:
+        """
+        Парсинг команды LOAD: замена содержимого контейнера снимком.
+        Формат: LOAD <имя файла>
+
+        Args:
+            line: Строка с командой LOAD
+
+        Returns:
+            True если снимок загружен, False иначе
+        """
+        return self.load_snapshot(line[5:].strip())
+
+    def save_snapshot(self, filename: str) -> bool:
+        """
+        Сохранение контейнера в двоичный снимок.
+
+        Args:
+            filename: Имя файла снимка
+
+        Returns:
+            True если снимок сохранен, False иначе
+        """
+        try:
+            count = save_snapshot(self.container, filename)
+        except (OSError, TypeError) as e:
+            self.output.write(f"Ошибка при сохранении снимка: {e}")
+            return False
+        self.output.write(f"Снимок сохранен: {filename} (событий: {count})")
+        return True
+
+    def load_snapshot(self, filename: str) -> bool:
+        """
+        Замена содержимого контейнера двоичным снимком.
+
+        Args:
+            filename: Имя файла снимка
+
+        Returns:
+            True если снимок загружен, False иначе
+        """
+        try:
+            count = load_snapshot(self.container, filename)
+        except (OSError, ValueError) as e:
+            self.output.write(f"Ошибка при загрузке снимка: {e}")
+            return False
+        self.output.write(f"Снимок загружен: {filename} (событий: {count})")
+        return True
+
+    def _parse_condition(self, condition_str: str) -> AnyCondition:
+        """
+        Парсинг условия в структурированное условие.
+
+        Результат остается функцией-предикатом, но дополнительно описывает
+        поле и значение (а комбинация - свои операнды), что позволяет
+        контейнеру использовать индексы.
+        Разобранные условия кешируются (LRU) по нормализованной строке:
+        в потоках команд одни и те же условия повторяются многократно.
 
         Args:
             condition_str: Строка с условием
 
         Returns:
-            Функция-предикат для проверки события
-        """
-        # pylint: disable=too-many-return-statements
-        # Множественные return необходимы для разных типов условий
-        # Удаляем кавычки из строки условия для упрощения парсинга
-        condition_str = condition_str.strip()
-
-        # Проверка на равенство типа
-        match = re.match(r'type\s*==\s*"([^"]+)"', condition_str)
-        if match:
-            target_type = match.group(1)
-            return lambda e: hasattr(e, 'type') and e.type == target_type
-
-        # Проверка на равенство названия
-        match = re.match(r'name\s*==\s*"([^"]+)"', condition_str)
-        if match:
-            target_name = match.group(1)
-            return lambda e: e.name == target_name
-
-        # Проверка на равенство даты
-        match = re.match(r'date\s*==\s*"([^"]+)"', condition_str)
-        if match:
-            target_date = match.group(1)
-            return lambda e: e.date == target_date
-
-        # Проверка на равенство места (для битв)
-        match = re.match(r'place\s*==\s*"([^"]+)"', condition_str)
-        if match:
-            target_place = match.group(1)
-            return lambda e: isinstance(e, Battle) and e.place == target_place
-
-        # Проверка на равенство сторон (для договоров)
-        match = re.match(r'parties\s*==\s*"([^"]+)"', condition_str)
-        if match:
-            target_parties = match.group(1)
-            return lambda e: isinstance(
-                e, Treaty) and e.parties == target_parties
-
-        # Проверка на вхождение подстроки в название
-        match = re.match(r'name\s+contains\s+"([^"]+)"', condition_str)
-        if match:
-            substring = match.group(1)
-            return lambda e: substring.lower() in e.name.lower()
-
-        # Проверка на сравнение дат (лексикографическое)
-        match = re.match(r'date\s*>\s*"([^"]+)"', condition_str)
-        if match:
-            target_date = match.group(1)
-            return lambda e: e.date > target_date
-
-        match = re.match(r'date\s*<\s*"([^"]+)"', condition_str)
-        if match:
-            target_date = match.group(1)
-            return lambda e: e.date < target_date
-
-        # Если условие не распознано, выбрасываем исключение
-        raise ValueError(f"Неизвестный формат условия: {condition_str}")
-
-    def process_file(self, filename: str) -> None:
+            Структурированное условие для проверки события
+        """
+        key = normalize_condition(condition_str)
+        cache = self._condition_cache
+        condition = cache.get(key)
+        if condition is not None:
+            cache.move_to_end(key)
+            self.cache_hits += 1
+            return condition
+
+        self.cache_misses += 1
+        condition = parse_condition(key)
+        if self.condition_cache_size > 0:
+            cache[key] = condition
+            if len(cache) > self.condition_cache_size:
+                cache.popitem(last=False)
+        return condition
+
+    def condition_cache_info(self) -> Dict[str, int]:
+        """
+        Статистика кеша разобранных условий.
+
+        Returns:
+            Словарь с ключами hits, misses, size, maxsize
+        """
+        return {
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'size': len(self._condition_cache),
+            'maxsize': self.condition_cache_size,
+        }
+
+    def process_file(self, filename: str, resume: bool = False) -> None:
         """
         Обработка файла с командами.
 
+        Если задан checkpointer, после выполненных сегментов периодически
+        сохраняются контрольные точки.
+
         Args:
             filename: Имя файла с командами
+            resume: Продолжить с последней контрольной точки (контейнер
+                восстанавливается из ее снимка)
         """
+        start: Optional[Position] = None
+        if self.checkpointer is not None:
+            start = (0, 0)
+            if resume:
+                try:
+                    start = self.checkpointer.restore(self.container, filename)
+                except (OSError, ValueError) as e:
+                    self.output.write(f"Ошибка при возобновлении обработки: {e}")
+                    return
+                if start[1]:
+                    self.output.write(
+                        f"Возобновление со строки {start[1] + 1} "
+                        f"(событий: {len(self.container)})")
+            self.checkpointer.start(start)
+
+        self._filename = filename
         try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
+            with open_commands(filename, self.reader, start) as commands:
+                if self.workers > 1:
+                    self._process_parallel(commands)
+                else:
+                    self._process_commands(commands)
 
-                    # Пропускаем пустые строки и комментарии
-                    if not line or line.startswith('#'):
-                        continue
+        except FileNotFoundError:
+            self.output.write(f"Ошибка: Файл '{filename}' не найден.")
+        except (IOError, UnicodeDecodeError) as e:
+            self.output.write(f"Ошибка при обработке файла: {e}")
 
-                    # Обработка команды ADD
-                    if line.startswith('ADD '):
-                        self.parse_add_command(line)
+    def follow_file(self, filename: str,
+                    stop: Optional[threading.Event] = None,
+                    poll_interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        """
+        Обработка дописываемого файла с командами (режим слежения).
 
-                    # Обработка команды REM
-                    elif line.startswith('REM '):
-                        self.parse_rem_command(line)
+        Сначала выполняются уже записанные команды, затем - каждая
+        порция новых завершенных строк по мере ее появления. После
+        каждого пакета выводится число команд и задержка от обнаружения
+        данных до конца их обработки.
 
-                    # Обработка команды PRINT
-                    elif line == 'PRINT':
-                        self.container.print_all()
+        Args:
+            filename: Имя файла с командами
+            stop: Событие остановки (None - до прерывания, например Ctrl+C)
+            poll_interval: Интервал опроса файла в секундах
+        """
+        follower = FileFollower(filename, poll_interval=poll_interval,
+                                notify=self.output.write)
+        try:
+            for commands, detected in follower.batches(stop):
+                self._process_commands(commands)
+                latency = (time.perf_counter() - detected) * 1000
+                self.output.write(
+                    f"Пакет: команд {len(commands)}, задержка {latency:.1f} мс")
+                self.output.flush()
+
+        except FileNotFoundError:
+            self.output.write(f"Ошибка: Файл '{filename}' не найден.")
+        except IOError as e:
+            self.output.write(f"Ошибка при обработке файла: {e}")
+
+    def execute_command(self, line_num: int, kind: str, line: str) -> None:
+        """
+        Выполнение одной команды (например, полученной по сети).
+
+        Args:
+            line_num: Номер строки команды
+            kind: Вид команды
+            line: Строка команды
+        """
+        self._execute(kind, line_num, [line])
+
+    def _execute(self, kind: str, line_num: int, lines: List[str],
+                 rows: Optional[List[AddFields]] = None) -> None:
+        """
+        Выполнение сегмента с учетом в метриках и профиле памяти, если
+        они собираются.
+
+        Args:
+            kind: Вид команд сегмента
+            line_num: Номер первой строки сегмента
+            lines: Строки команд
+            rows: Уже разобранные команды ADD (из пула процессов); тогда
+                замеряется только добавление в контейнер
+        """
+        metrics = self.metrics
+        profiler = self.memory_profiler
+        if metrics is None and profiler is None:
+            self._dispatch(kind, line_num, lines, rows)
+            return
+        if profiler is not None:
+            profiler.before_segment()
+        start = time.perf_counter_ns()
+        errors = self._dispatch(kind, line_num, lines, rows)
+        elapsed = time.perf_counter_ns() - start
+        count = len(lines) if rows is None else len(rows)
+        if metrics is not None:
+            metrics.observe(kind, elapsed, count, errors, len(self.container))
+        if profiler is not None:
+            profiler.after_segment(kind, count, len(self.container))
+
+    def _dispatch(self, kind: str, line_num: int, lines: List[str],
+                  rows: Optional[List[AddFields]]) -> int:
+        """
+        Выполнение сегмента любого вида.
+
+        Args:
+            kind: Вид команд сегмента
+            line_num: Номер первой строки сегмента
+            lines: Строки команд
+            rows: Уже разобранные команды ADD или None
+
+        Returns:
+            Количество команд, завершившихся ошибкой
+        """
+        if kind != ADD:
+            return self._run_segment(kind, line_num, lines)
+        if rows is None:
+            rows = parse_add_segment(lines)
+        return len(rows) - self._add_parsed(rows)
+
+    def _process_commands(self, commands: Iterable[Command]) -> None:
+        """
+        Последовательное выполнение команд.
+
+        Args:
+            commands: Команды (номер строки, вид команды, строка)
+        """
+        for kind, line_num, lines, resume in self._segments(commands):
+            self._execute(kind, line_num, lines)
+            self._checkpoint(resume)
+
+    def _process_parallel(self, commands: Iterable[Command]) -> None:
+        """
+        Выполнение команд с разбором пакетов ADD в пуле процессов.
+
+        Пакеты ADD отправляются рабочим процессам с опережением (не более
+        чем на 2 * workers сегментов вперед), а результаты - компактные
+        кортежи строк - применяются к контейнеру строго в порядке команд.
+        Остальные команды выполняются в основном процессе, когда все
+        предшествующие им пакеты ADD уже добавлены, поэтому вывод
+        совпадает с последовательной обработкой.
+
+        Args:
+            commands: Команды (номер строки, вид команды, строка)
+        """
+        window = 2 * self.workers
+        pending: Deque[Tuple[str, int, Any, Optional[Position]]] = deque()
 
+        def run_head() -> None:
+            kind, line_num, payload, resume = pending.popleft()
+            if kind == ADD:
+                self._execute(kind, line_num, [], payload.result())
+            else:
+                self._execute(kind, line_num, payload)
+            self._checkpoint(resume)
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            try:
+                for kind, line_num, lines, resume in self._segments(commands):
+                    if kind == ADD:
+                        pending.append((kind, line_num,
+                                        pool.submit(parse_add_segment, lines),
+                                        resume))
                     else:
-                        print(
-                            f"Строка {line_num}: Неизвестная команда: {line}")
+                        pending.append((kind, line_num, lines, resume))
+                    while pending and (len(pending) > window
+                                       or pending[0][0] != ADD
+                                       or pending[0][2].done()):
+                        run_head()
+            finally:
+                # Сегменты, прочитанные до ошибки чтения файла, выполняются
+                while pending:
+                    run_head()
+
+    def _segments(self, commands: Iterable[Command]) -> Iterator[Segment]:
+        """
+        Разбиение потока команд на сегменты выполнения.
 
-        except FileNotFoundError:
-            print(f"Ошибка: Файл '{filename}' не найден.")
+        Подряд идущие команды ADD независимы друг от друга до ближайшей
+        команды другого вида, поэтому они объединяются в пакеты не длиннее
+        add_batch_size. Подряд идущие команды REM объединяются в серию,
+        выполняемую за один проход по контейнеру. PRINT, SAVE, LOAD, FIND,
+        COUNT, EXPLAIN, STATS и неизвестная команда - отдельные сегменты.
+
+        Если поток отслеживает позицию (CommandStream), каждый сегмент
+        получает позицию возобновления - после выполнения сегмента
+        выполнены все команды до нее: для сегмента, завершенного
+        командой другого вида, это позиция перед этой командой, для
+        остальных - позиция после последней прочитанной команды. Без
+        отслеживания позиции сегменты получают None.
+
+        Args:
+            commands: Команды (номер строки, вид команды, строка)
+
+        Yields:
+            Сегменты (вид команд, номер первой строки, строки команд,
+            позиция возобновления)
+
+        Raises:
+            IOError, UnicodeDecodeError: Ошибка чтения файла; возбуждается
+                после сегментов, прочитанных до нее
+        """
+        def position() -> Optional[Position]:
+            return getattr(commands, 'position', None)
+
+        def previous() -> Optional[Position]:
+            return getattr(commands, 'previous', None)
+
+        pending_adds: List[str] = []
+        pending_rems: List[str] = []
+        add_start = rem_start = 0
+        error: Optional[Exception] = None
+        try:
+            for line_num, kind, line in commands:
+                # Команда ADD
+                if kind == ADD:
+                    if pending_rems:
+                        yield REM, rem_start, pending_rems, previous()
+                        pending_rems = []
+                    if not pending_adds:
+                        add_start = line_num
+                    pending_adds.append(line)
+                    if len(pending_adds) >= self.add_batch_size:
+                        yield ADD, add_start, pending_adds, position()
+                        pending_adds = []
+                    continue
+
+                # Любая другая команда - граница пакета ADD
+                if pending_adds:
+                    yield ADD, add_start, pending_adds, previous()
+                    pending_adds = []
+
+                # Команда REM: серия REM выполняется совместно
+                if kind == REM:
+                    if not pending_rems:
+                        rem_start = line_num
+                    pending_rems.append(line)
+                    continue
+
+                if pending_rems:
+                    yield REM, rem_start, pending_rems, previous()
+                    pending_rems = []
+
+                # PRINT, SAVE, LOAD, FIND, COUNT, EXPLAIN, STATS или
+                # неизвестная команда
+                yield kind, line_num, [line], position()
         except (IOError, UnicodeDecodeError) as e:
-            print(f"Ошибка при обработке файла: {e}")
+            error = e
+
+        # Команды, прочитанные до ошибки чтения файла, выполняются
+        if pending_adds:
+            yield ADD, add_start, pending_adds, position()
+        if pending_rems:
+            yield REM, rem_start, pending_rems, position()
+        if error is not None:
+            raise error
+
+    def _checkpoint(self, resume: Optional[Position]) -> None:
+        """
+        Сохранить контрольную точку, если интервал истек.
+
+        Args:
+            resume: Позиция возобновления после выполненного сегмента
+                (None - поток команд не отслеживает позицию)
+        """
+        if (resume is None or self.checkpointer is None
+                or not self.checkpointer.due(resume)):
+            return
+        try:
+            self.checkpointer.save(self.container, self._filename, resume)
+        except (OSError, TypeError) as e:
+            self.output.write(f"Ошибка при сохранении контрольной точки: {e}")
+
+    def _run_segment(self, kind: str, line_num: int, lines: List[str]) -> int:
+        """
+        Выполнение сегмента REM, PRINT, SAVE, LOAD, FIND, COUNT, EXPLAIN,
+        STATS или неизвестной команды.
+
+        Args:
+            kind: Вид команд сегмента
+            line_num: Номер первой строки сегмента
+            lines: Строки команд
+
+        Returns:
+            Количество команд, завершившихся ошибкой
+        """
+        if kind == REM:
+            return self.parse_rem_commands(lines)
+        if kind == PRINT:
+            self.container.print_all(self.output)
+            return 0
+        if kind == SAVE:
+            ok = self.parse_save_command(lines[0])
+        elif kind == LOAD:
+            ok = self.parse_load_command(lines[0])
+        elif kind == FIND:
+            ok = self.parse_find_command(lines[0])
+        elif kind == COUNT:
+            ok = self.parse_count_command(lines[0])
+        elif kind == EXPLAIN:
+            ok = self.parse_explain_command(lines[0])
+        elif kind == STATS:
+            ok = self.parse_stats_command(lines[0])
+        else:
+            self.output.write(
+                f"Строка {line_num}: Неизвестная команда: {lines[0]}")
+            ok = False
+        return 0 if ok else 1
@@ -0,0 +1,229 @@
+"""
+Модуль чтения файла команд.
+Файл превращается в поток команд (номер строки, вид команды, строка);
+пустые строки и комментарии в поток не попадают.
+"""
+
+import mmap
+from contextlib import contextmanager
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple, Union
+
+# Виды команд
+ADD = 'ADD'
+REM = 'REM'
+PRINT = 'PRINT'
+SAVE = 'SAVE'
+LOAD = 'LOAD'
+FIND = 'FIND'
+COUNT = 'COUNT'
+EXPLAIN = 'EXPLAIN'
+STATS = 'STATS'
+UNKNOWN = 'UNKNOWN'
+
+# Команда: (номер строки, вид команды, строка без пробелов по краям)
+Command = Tuple[int, str, str]
+
+# Позиция возобновления: (смещение в байтах, номер последней прочитанной
+# строки) - место файла, с которого продолжается чтение
+Position = Tuple[int, int]
+
+# Способы чтения файла команд
+READERS = ('text', 'mmap')
+
+# Размер блока, которым разбирается отображенный в память файл
+MMAP_BLOCK_SIZE = 1 << 22
+
+_NEWLINE = ord('\n')
+
+
+def classify(line: str) -> Optional[str]:
+    """
+    Определить вид команды по строке без пробелов по краям.
+
+    Args:
+        line: Строка файла команд
+
+    Returns:
+        Вид команды или None для пустой строки и комментария
+    """
+    if not line or line.startswith('#'):
+        return None
+    if line.startswith('ADD '):
+        return ADD
+    if line.startswith('REM '):
+        return REM
+    if line == 'PRINT':
+        return PRINT
+    if line.startswith('SAVE '):
+        return SAVE
+    if line.startswith('LOAD '):
+        return LOAD
+    if line.startswith('FIND '):
+        return FIND
+    if line.startswith('COUNT '):
+        return COUNT
+    if line.startswith('EXPLAIN '):
+        return EXPLAIN
+    if line == 'STATS' or line.startswith('STATS '):
+        return STATS
+    return UNKNOWN
+
+
+def iter_text_commands(lines: Iterable[str]) -> Iterator[Command]:
+    """
+    Поток команд из строк текстового файла.
+
+    Args:
+        lines: Строки файла (например, открытый текстовый файл)
+
+    Yields:
+        Команды в порядке следования
+    """
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        kind = classify(line)
+        if kind is not None:
+            yield line_num, kind, line
+
+
+def iter_mmap_commands(buffer: mmap.mmap,
+                       block_size: int = MMAP_BLOCK_SIZE) -> Iterator[Command]:
+    """
+    Поток команд из отображенного в память файла.
+
+    Файл разбирается крупными блоками, выровненными по границе строки;
+    строки внутри блока отделяются в байтах, вид команды определяется по
+    байтовому префиксу, а в строку декодируются только команды ADD, REM
+    и нераспознанные строки. Пустые строки, комментарии и PRINT не
+    декодируются. Строки разделяются символом b'\n' (окончания \r\n
+    также поддерживаются).
+
+    Args:
+        buffer: Отображение файла в память
+        block_size: Примерный размер блока в байтах
+
+    Yields:
+        Команды в порядке следования
+
+    Raises:
+        UnicodeDecodeError: Если декодируемая строка не в UTF-8
+    """
+    size = len(buffer)
+    position = 0
+    line_num = 0
+    while position < size:
+        # stop - позиция перевода строки, завершающего блок
+        if position + block_size >= size:
+            stop = size - 1 if buffer[size - 1] == _NEWLINE else size
+        else:
+            stop = buffer.rfind(b'\n', position, position + block_size)
+            if stop < 0:
+                stop = buffer.find(b'\n', position + block_size)
+                if stop < 0:
+                    stop = size
+        block = buffer[position:stop]
+        position = stop + 1
+
+        for raw in block.split(b'\n'):
+            line_num += 1
+            raw = raw.strip()
+            if not raw or raw[:1] == b'#':
+                continue
+            prefix = raw[:4]
+            if prefix == b'ADD ':
+                yield line_num, ADD, raw.decode('utf-8').strip()
+            elif prefix == b'REM ':
+                yield line_num, REM, raw.decode('utf-8').strip()
+            elif raw == b'PRINT':
+                yield line_num, PRINT, 'PRINT'
+            else:
+                # Редкий случай (например, пробелы Unicode по краям строки):
+                # решение принимается так же, как при текстовом чтении
+                line = raw.decode('utf-8').strip()
+                kind = classify(line)
+                if kind is not None:
+                    yield line_num, kind, line
+
+
+class CommandStream:
+    """
+    Поток команд с отслеживанием позиции возобновления.
+
+    Файл читается построчно в байтах, поэтому известно смещение каждой
+    строки; атрибут position - позиция сразу после последней выданной
+    команды (после исчерпания потока - конец файла), атрибут previous -
+    позиция перед ней, то есть после всех команд до нее. Чтение можно
+    начать с сохраненной позиции.
+    """
+
+    def __init__(self, source: Union[BinaryIO, mmap.mmap],
+                 start: Position = (0, 0)):
+        """
+        Инициализация потока.
+
+        Args:
+            source: Двоичный файл или отображение файла в память
+            start: Позиция, с которой начинается чтение
+        """
+        self._source = source
+        self.position = start
+        self.previous = start
+
+    def __iter__(self) -> Iterator[Command]:
+        """Команды начиная с позиции position."""
+        offset, line_num = self.position
+        self._source.seek(offset)
+        for raw in iter(self._source.readline, b''):
+            offset += len(raw)
+            line_num += 1
+            line = raw.decode('utf-8').strip()
+            kind = classify(line)
+            if kind is not None:
+                self.previous = self.position
+                self.position = (offset, line_num)
+                yield line_num, kind, line
+        self.position = (offset, line_num)
+
+
+@contextmanager
+def open_commands(filename: str, reader: str = 'text',
+                  start: Optional[Position] = None) -> Iterator[Iterable[Command]]:
+    """
+    Открыть файл команд и получить поток команд.
+
+    Args:
+        filename: Имя файла с командами
+        reader: Способ чтения: text - построчное чтение текстового файла,
+            mmap - отображение файла в память и разбор байтов
+        start: Позиция возобновления; если задана, возвращается
+            CommandStream, начинающий чтение с нее
+
+    Yields:
+        Поток команд
+
+    Raises:
+        ValueError: Если способ чтения неизвестен
+        FileNotFoundError: Если файл не найден
+    """
+    if reader not in READERS:
+        raise ValueError(f"Неизвестный способ чтения: {reader}")
+    if start is not None:
+        with open(filename, 'rb') as f:
+            if reader == 'text' or not f.seek(0, 2):
+                yield CommandStream(f, start)
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield CommandStream(buffer, start)
+        return
+    if reader == 'text':
+        with open(filename, 'r', encoding='utf-8') as f:
+            yield iter_text_commands(f)
+        return
+
+    with open(filename, 'rb') as f:
+        # Пустой файл нельзя отобразить в память
+        if not f.seek(0, 2):
+            yield iter(())
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield iter_mmap_commands(buffer)
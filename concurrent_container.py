@@ -0,0 +1,228 @@
+"""
+Модуль потокобезопасного контейнера исторических событий.
+Писатели выполняются под блокировкой и публикуют неизменяемые версии
+содержимого; читатели перебирают опубликованную версию без блокировки.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+from historical_event import HistoricalEvent
+from container import EventContainer, event_lines
+from output import OutputSink
+
+# Число ячеек хранилища в одном сегменте версии
+SEGMENT_SIZE = 1024
+
+
+class EventSnapshot:
+    """
+    Неизменяемая версия содержимого контейнера.
+
+    Версия состоит из кортежей-сегментов; новые версии разделяют с
+    прежними все сегменты, которые запись не затронула.
+    """
+
+    __slots__ = ('segments', 'version', '_count')
+
+    def __init__(self, segments: Tuple[Tuple[HistoricalEvent, ...], ...],
+                 version: int):
+        """
+        Инициализация версии.
+
+        Args:
+            segments: Сегменты событий в порядке добавления
+            version: Номер версии (растет с каждой записью)
+        """
+        self.segments = segments
+        self.version = version
+        self._count = sum(map(len, segments))
+
+    def __len__(self) -> int:
+        """Количество событий в версии."""
+        return self._count
+
+    def __iter__(self) -> Iterator[HistoricalEvent]:
+        """События версии в порядке добавления."""
+        for segment in self.segments:
+            yield from segment
+
+    def iter_lines(self) -> Iterator[str]:
+        """Лениво перебрать строки вывода команды PRINT для этой версии."""
+        return event_lines(self, self._count)
+
+    def print_lines(self) -> List[str]:
+        """Строки вывода команды PRINT для этой версии."""
+        return list(self.iter_lines())
+
+
+class ConcurrentEventContainer(EventContainer):
+    """
+    Контейнер для совместного использования несколькими потоками.
+
+    Операции записи (add, add_many, remove, remove_many, clear)
+    выполняются последовательно под блокировкой и в конце публикуют
+    новую версию: заново собираются только сегменты, в которых
+    изменились ячейки, остальные переиспользуются (копирование при
+    записи). Чтение (snapshot, print_all, print_lines, _events) берет
+    текущую опубликованную версию одной операцией и не ждет писателей;
+    версия не меняется, пока читатель ее перебирает.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Инициализация пустого контейнера (аргументы EventContainer)."""
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._dirty: Set[int] = set()
+        self._all_dirty = False
+        self._snapshot = EventSnapshot((), 0)
+        super().__init__(*args, **kwargs)
+
+    def snapshot(self) -> EventSnapshot:
+        """
+        Текущая опубликованная версия содержимого.
+
+        Returns:
+            Неизменяемая версия
+        """
+        return self._snapshot
+
+    @property
+    def _events(self) -> List[HistoricalEvent]:
+        """Список событий опубликованной версии."""
+        return list(self._snapshot)
+
+    def add(self, event: HistoricalEvent) -> None:
+        """Добавить событие и опубликовать новую версию."""
+        with self._writing():
+            super().add(event)
+
+    def add_many(self, events: Sequence[HistoricalEvent]) -> None:
+        """Добавить пакет событий одной новой версией."""
+        with self._writing():
+            super().add_many(events)
+
+    def remove(self, condition: Callable[[HistoricalEvent], bool]) -> int:
+        """Удалить события по условию и опубликовать новую версию."""
+        with self._writing():
+            return super().remove(condition)
+
+    def remove_many(
+            self, conditions: Sequence[Callable[[HistoricalEvent], bool]]
+    ) -> List[int]:
+        """Удалить события по серии условий одной новой версией."""
+        with self._writing():
+            return super().remove_many(conditions)
+
+    def clear(self) -> None:
+        """Удалить все события и опубликовать пустую версию."""
+        with self._writing():
+            super().clear()
+            self._all_dirty = True
+
+    def find(self, condition: Callable[[HistoricalEvent], bool],
+             offset: int = 0,
+             limit: Optional[int] = None) -> Iterator[HistoricalEvent]:
+        """
+        Найти события по условию (аргументы EventContainer.find).
+
+        Индексы меняются писателями на месте, поэтому страница результатов
+        выбирается под блокировкой целиком и отдается уже готовым списком.
+        """
+        with self._lock:
+            return iter(list(super().find(condition, offset, limit)))
+
+    def count(self, condition: Callable[[HistoricalEvent], bool]) -> int:
+        """Количество событий по условию (под блокировкой писателей)."""
+        with self._lock:
+            return super().count(condition)
+
+    def explain(self, condition: Callable[[HistoricalEvent], bool]) -> List[str]:
+        """План выполнения условия (под блокировкой писателей)."""
+        with self._lock:
+            return super().explain(condition)
+
+    def intern_stats(self) -> Dict[str, int]:
+        """Статистика пула строк (под блокировкой писателей)."""
+        with self._lock:
+            return super().intern_stats()
+
+    def print_all(self, output: Optional[OutputSink] = None) -> None:
+        """Вывести события опубликованной версии без блокировки писателей."""
+        if output is None:
+            output = OutputSink()
+        output.write_lines(self._snapshot.iter_lines())
+
+    def iter_print_lines(self, detach: bool = False) -> Iterator[str]:
+        """
+        Лениво перебрать строки вывода PRINT опубликованной версии.
+
+        Версия неизменяема, поэтому перебор не зависит от последующих
+        изменений контейнера при любом detach.
+        """
+        return self._snapshot.iter_lines()
+
+    def print_lines(self) -> List[str]:
+        """Строки вывода команды PRINT для опубликованной версии."""
+        return self._snapshot.print_lines()
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Выполнить запись под блокировкой и опубликовать версию."""
+        with self._lock:
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if not self._depth:
+                    self._publish()
+
+    def _publish(self) -> None:
+        """Собрать измененные сегменты и опубликовать новую версию."""
+        if not self._dirty and not self._all_dirty:
+            return
+        slots = self._slots
+        segment_count = -(-len(slots) // SEGMENT_SIZE)
+        previous = self._snapshot.segments
+        if self._all_dirty:
+            rebuild = range(segment_count)
+            segments: List[Tuple[HistoricalEvent, ...]] = [()] * segment_count
+        else:
+            rebuild = sorted(index for index in self._dirty
+                             if index < segment_count)
+            segments = list(previous[:segment_count])
+            segments.extend([()] * (segment_count - len(segments)))
+        for index in rebuild:
+            start = index * SEGMENT_SIZE
+            segments[index] = tuple(
+                event for event in slots[start:start + SEGMENT_SIZE]
+                if event is not None)
+        self._dirty.clear()
+        self._all_dirty = False
+        self._snapshot = EventSnapshot(tuple(segments),
+                                       self._snapshot.version + 1)
+
+    # Примитивы хранилища: учет измененных сегментов
+
+    def _put(self, event: HistoricalEvent) -> int:
+        """Сохранить событие, пометив его сегмент измененным."""
+        self._dirty.add(len(self._slots) // SEGMENT_SIZE)
+        return super()._put(event)
+
+    def _put_many(self, events: Sequence[HistoricalEvent]) -> Sequence[int]:
+        """Сохранить пакет событий, пометив затронутые сегменты."""
+        start = len(self._slots)
+        self._dirty.update(range(start // SEGMENT_SIZE,
+                                 (start + len(events)) // SEGMENT_SIZE + 1))
+        return super()._put_many(events)
+
+    def _pop(self, event_id: int) -> HistoricalEvent:
+        """Пометить ячейку пустой, пометив ее сегмент измененным."""
+        self._dirty.add(self._position(event_id) // SEGMENT_SIZE)
+        return super()._pop(event_id)
+
+    def _compact(self) -> None:
+        """Сжать хранилище; позиции всех ячеек меняются."""
+        super()._compact()
+        self._all_dirty = True
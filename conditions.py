@@ -0,0 +1,460 @@
+"""
+Модуль структурированных условий для команды REM.
+Условие - это вызываемый объект-предикат, который дополнительно
+описывает себя (поле, операцию, значение), чтобы контейнер мог
+использовать индексы вместо полного перебора событий. Условия
+объединяются операциями AND, OR и NOT в дерево запроса.
+"""
+
+import re
+from typing import List, Optional, Sequence, Tuple, Union
+from historical_event import HistoricalEvent, make_date_key
+
+
+class Condition:
+    """
+    Базовый класс структурированного условия.
+
+    Условие зависит от одного поля события (field), поэтому его можно
+    проверить и по значению этого поля без объекта события
+    (match_value) - например, по столбцу значений.
+    """
+
+    field = ''
+
+    def __call__(self, event: HistoricalEvent) -> bool:
+        """
+        Проверка события на соответствие условию.
+
+        Args:
+            event: Проверяемое событие
+
+        Returns:
+            True если событие соответствует условию
+        """
+        raise NotImplementedError
+
+    def match_value(self, value: Optional[str]) -> bool:
+        """
+        Проверка значения поля field на соответствие условию.
+
+        Args:
+            value: Значение поля или None, если у события его нет
+
+        Returns:
+            True если значение соответствует условию
+        """
+        raise NotImplementedError
+
+    def _key(self) -> tuple:
+        """Ключ для сравнения условий между собой."""
+        raise NotImplementedError
+
+    def __eq__(self, other: object) -> bool:
+        """Условия равны, если совпадают их тип и параметры."""
+        if not isinstance(other, Condition):
+            return NotImplemented
+        return type(self) is type(other) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        """Хеш условия по его параметрам."""
+        return hash((type(self).__name__, self._key()))
+
+
+class FieldEquals(Condition):
+    """Условие точного равенства поля: <поле> == "<значение>"."""
+
+    def __init__(self, field: str, value: str):
+        """
+        Инициализация условия равенства.
+
+        Args:
+            field: Имя поля (type, name, date, place, parties)
+            value: Искомое значение
+        """
+        self.field = field
+        self.value = value
+
+    def __call__(self, event: HistoricalEvent) -> bool:
+        """Событие без такого поля условию не соответствует."""
+        return getattr(event, self.field, None) == self.value
+
+    def match_value(self, value: Optional[str]) -> bool:
+        """Сравнение значения поля с искомым."""
+        return value == self.value
+
+    def _key(self) -> tuple:
+        """Ключ для сравнения условий."""
+        return (self.field, self.value)
+
+    def __str__(self) -> str:
+        """Запись условия в грамматике команд."""
+        return f'{self.field} == "{self.value}"'
+
+    def __repr__(self) -> str:
+        """Представление для отладки."""
+        return f'FieldEquals({self})'
+
+
+class NameContains(Condition):
+    """Условие вхождения подстроки в название без учета регистра."""
+
+    field = 'name'
+
+    def __init__(self, substring: str):
+        """
+        Инициализация условия вхождения.
+
+        Args:
+            substring: Искомая подстрока
+        """
+        self.substring = substring
+        # Подстрока приводится к единому регистру один раз при разборе
+        self.needle = substring.casefold()
+
+    def __call__(self, event: HistoricalEvent) -> bool:
+        """Проверка вхождения подстроки в название."""
+        return self.needle in event.name.casefold()
+
+    def match_value(self, value: Optional[str]) -> bool:
+        """Проверка вхождения подстроки в значение названия."""
+        return value is not None and self.needle in value.casefold()
+
+    def _key(self) -> tuple:
+        """Ключ для сравнения условий."""
+        return (self.substring,)
+
+    def __str__(self) -> str:
+        """Запись условия в грамматике команд."""
+        return f'name contains "{self.substring}"'
+
+    def __repr__(self) -> str:
+        """Представление для отладки."""
+        return f'NameContains({self})'
+
+
+class DateCompare(Condition):
+    """Условие сравнения даты: date > "<дата>" или date < "<дата>"."""
+
+    OPERATORS = ('<', '>')
+    field = 'date'
+
+    def __init__(self, operator: str, value: str):
+        """
+        Инициализация условия сравнения дат.
+
+        Args:
+            operator: Оператор сравнения ("<" или ">")
+            value: Дата для сравнения
+
+        Raises:
+            ValueError: Если оператор не поддерживается
+        """
+        if operator not in self.OPERATORS:
+            raise ValueError(f"Неизвестный оператор сравнения: {operator}")
+        self.operator = operator
+        self.value = value
+        self.date_key = make_date_key(value)
+
+    def __call__(self, event: HistoricalEvent) -> bool:
+        """Сравнение нормализованных ключей дат (год - как число)."""
+        if self.operator == '<':
+            return event.date_key < self.date_key
+        return event.date_key > self.date_key
+
+    def match_value(self, value: Optional[str]) -> bool:
+        """Сравнение строки даты через ее нормализованный ключ."""
+        if value is None:
+            return False
+        if self.operator == '<':
+            return make_date_key(value) < self.date_key
+        return make_date_key(value) > self.date_key
+
+    def _key(self) -> tuple:
+        """Ключ для сравнения условий."""
+        return (self.operator, self.value)
+
+    def __str__(self) -> str:
+        """Запись условия в грамматике команд."""
+        return f'date {self.operator} "{self.value}"'
+
+    def __repr__(self) -> str:
+        """Представление для отладки."""
+        return f'DateCompare({self})'
+
+
+class BooleanCondition:
+    """
+    Логическая комбинация условий (узел дерева запроса).
+
+    В отличие от Condition, комбинация зависит от нескольких полей,
+    поэтому ее нельзя проверить по значению одного поля; контейнер
+    выполняет ее через планировщик запросов.
+    """
+
+    def __init__(self, children: Sequence['AnyCondition']):
+        """
+        Инициализация комбинации.
+
+        Args:
+            children: Условия-операнды
+        """
+        self.children = tuple(children)
+
+    def __call__(self, event: HistoricalEvent) -> bool:
+        """
+        Проверка события на соответствие комбинации.
+
+        Args:
+            event: Проверяемое событие
+
+        Returns:
+            True если событие соответствует комбинации
+        """
+        raise NotImplementedError
+
+    def __eq__(self, other: object) -> bool:
+        """Комбинации равны, если совпадают их тип и операнды."""
+        if not isinstance(other, BooleanCondition):
+            return NotImplemented
+        return type(self) is type(other) and self.children == other.children
+
+    def __hash__(self) -> int:
+        """Хеш комбинации по ее операндам."""
+        return hash((type(self).__name__, self.children))
+
+    def __repr__(self) -> str:
+        """Представление для отладки."""
+        return f'{type(self).__name__}({self})'
+
+
+class AndCondition(BooleanCondition):
+    """Конъюнкция: все операнды истинны."""
+
+    def __call__(self, event: HistoricalEvent) -> bool:
+        """Проверка всех операндов по порядку до первого ложного."""
+        for child in self.children:
+            if not child(event):
+                return False
+        return True
+
+    def __str__(self) -> str:
+        """Запись условия в грамматике команд."""
+        return '(' + ' AND '.join(map(str, self.children)) + ')'
+
+
+class OrCondition(BooleanCondition):
+    """Дизъюнкция: истинен хотя бы один операнд."""
+
+    def __call__(self, event: HistoricalEvent) -> bool:
+        """Проверка операндов по порядку до первого истинного."""
+        for child in self.children:
+            if child(event):
+                return True
+        return False
+
+    def __str__(self) -> str:
+        """Запись условия в грамматике команд."""
+        return '(' + ' OR '.join(map(str, self.children)) + ')'
+
+
+class NotCondition(BooleanCondition):
+    """Отрицание операнда."""
+
+    def __init__(self, child: 'AnyCondition'):
+        """
+        Инициализация отрицания.
+
+        Args:
+            child: Отрицаемое условие
+        """
+        super().__init__((child,))
+        self.child = child
+
+    def __call__(self, event: HistoricalEvent) -> bool:
+        """Событие соответствует, если не соответствует операнду."""
+        return not self.child(event)
+
+    def __str__(self) -> str:
+        """Запись условия в грамматике команд."""
+        return f'NOT {self.child}'
+
+
+# Условие любого вида: атомарное или логическая комбинация
+AnyCondition = Union[Condition, BooleanCondition]
+
+
+# Грамматика атомарного условия: <поле> <оператор> "<значение>";
+# атомарные условия объединяются операциями NOT, AND, OR (в порядке
+# убывания приоритета) и скобками.
+# Все лексемы распознаются одним регулярным выражением за один проход.
+_TOKEN_PATTERN = re.compile(r'''
+    \s*(?:
+        "(?P<string>[^"]*)"
+      | (?P<op>==|<|>)
+      | (?P<paren>[()])
+      | (?P<word>[^\W\d]\w*)
+      | (?P<error>\S)
+    )''', re.VERBOSE)
+
+EQUALITY_FIELDS = ('type', 'name', 'date', 'place', 'parties')
+
+# Логические операции (регистр не учитывается)
+KEYWORDS = ('AND', 'OR', 'NOT')
+
+
+def tokenize(condition_str: str) -> List[Tuple[str, str]]:
+    """
+    Разбить строку условия на лексемы.
+
+    Args:
+        condition_str: Строка с условием
+
+    Returns:
+        Список пар (вид лексемы, текст): вид - "string", "op", "paren"
+        или "word"
+
+    Raises:
+        ValueError: Если встречен недопустимый символ
+    """
+    tokens = []
+    position = 0
+    length = len(condition_str.rstrip())
+    while position < length:
+        match = _TOKEN_PATTERN.match(condition_str, position)
+        if match is None or match.lastgroup == 'error':
+            raise ValueError(f"Неизвестный формат условия: {condition_str}")
+        tokens.append((match.lastgroup, match.group(match.lastgroup)))
+        position = match.end()
+    return tokens
+
+
+def parse_condition(condition_str: str) -> AnyCondition:
+    """
+    Разобрать строку условия в структурированное условие.
+
+    Поддерживаемые атомарные формы:
+    - <поле> == "<значение>" для полей type, name, date, place, parties
+    - name contains "<подстрока>"
+    - date < "<дата>" и date > "<дата>"
+
+    Атомарные условия объединяются операциями NOT, AND и OR (приоритет
+    убывает в этом порядке) и группируются скобками. Строка из одного
+    атомарного условия дает само это условие.
+
+    Args:
+        condition_str: Строка с условием
+
+    Returns:
+        Атомарное условие или дерево логических комбинаций
+
+    Raises:
+        ValueError: Если условие не соответствует грамматике
+    """
+    return _ConditionParser(condition_str).parse()
+
+
+class _ConditionParser:
+    """Разбор условия рекурсивным спуском по списку лексем."""
+
+    def __init__(self, condition_str: str):
+        """
+        Инициализация разбора.
+
+        Args:
+            condition_str: Строка с условием
+
+        Raises:
+            ValueError: Если встречен недопустимый символ
+        """
+        self.text = condition_str.strip()
+        self.tokens = tokenize(condition_str)
+        self.position = 0
+
+    def parse(self) -> AnyCondition:
+        """Разобрать всю строку условия."""
+        condition = self._parse_or()
+        if self.position != len(self.tokens):
+            raise self._error()
+        return condition
+
+    def _error(self) -> ValueError:
+        """Ошибка разбора для всей строки условия."""
+        return ValueError(f"Неизвестный формат условия: {self.text}")
+
+    def _accept(self, kind: str, text: str) -> bool:
+        """Пропустить лексему, если она следующая; вернуть, была ли она."""
+        if self.position < len(self.tokens):
+            token_kind, token_text = self.tokens[self.position]
+            if token_kind == kind and token_text.upper() == text:
+                self.position += 1
+                return True
+        return False
+
+    def _parse_or(self) -> AnyCondition:
+        """<дизъюнкция> ::= <конъюнкция> {OR <конъюнкция>}"""
+        children = [self._parse_and()]
+        while self._accept('word', 'OR'):
+            children.append(self._parse_and())
+        return _combine(OrCondition, children)
+
+    def _parse_and(self) -> AnyCondition:
+        """<конъюнкция> ::= <отрицание> {AND <отрицание>}"""
+        children = [self._parse_not()]
+        while self._accept('word', 'AND'):
+            children.append(self._parse_not())
+        return _combine(AndCondition, children)
+
+    def _parse_not(self) -> AnyCondition:
+        """<отрицание> ::= NOT <отрицание> | ( <дизъюнкция> ) | <атом>"""
+        if self._accept('word', 'NOT'):
+            return NotCondition(self._parse_not())
+        if self._accept('paren', '('):
+            condition = self._parse_or()
+            if not self._accept('paren', ')'):
+                raise self._error()
+            return condition
+        return self._parse_atom()
+
+    def _parse_atom(self) -> Condition:
+        """<атом> ::= <поле> <оператор> "<значение>" """
+        tokens = self.tokens[self.position:self.position + 3]
+        if (len(tokens) != 3 or tokens[0][0] != 'word'
+                or tokens[0][1].upper() in KEYWORDS
+                or tokens[2][0] != 'string' or not tokens[2][1]):
+            raise self._error()
+        self.position += 3
+
+        field, (kind, operator), value = tokens[0][1], tokens[1], tokens[2][1]
+        if operator == '==' and field in EQUALITY_FIELDS:
+            return FieldEquals(field, value)
+        if kind == 'word' and operator == 'contains' and field == 'name':
+            return NameContains(value)
+        if kind == 'op' and operator in DateCompare.OPERATORS and field == 'date':
+            return DateCompare(operator, value)
+        raise self._error()
+
+
+def _combine(cls: type, children: List[AnyCondition]) -> AnyCondition:
+    """
+    Объединить операнды одной операцией.
+
+    Вложенные комбинации той же операции раскрываются: (a AND b) AND c
+    дает одну конъюнкцию трех операндов.
+
+    Args:
+        cls: Класс комбинации (AndCondition или OrCondition)
+        children: Операнды
+
+    Returns:
+        Единственный операнд или комбинация
+    """
+    if len(children) == 1:
+        return children[0]
+    flat: List[AnyCondition] = []
+    for child in children:
+        if type(child) is cls:
+            flat.extend(child.children)  # type: ignore[union-attr]
+        else:
+            flat.append(child)
+    return cls(flat)
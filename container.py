@@ -2,16 +2,126 @@
 Модуль для работы с контейнером исторических событий.
 """
 
-from typing import List, Callable
-from historical_event import HistoricalEvent
+from array import array
+from bisect import bisect_left
+from itertools import islice
+from typing import (
+    Dict, List, Callable, Iterable, Iterator, Optional, Sequence, Tuple)
+from historical_event import HistoricalEvent, DateKey
+from conditions import (
+    BooleanCondition, Condition, FieldEquals, NameContains, DateCompare)
+from indexes import HashIndex, SortedDateIndex, TrigramIndex
+from output import OutputSink
+from query_planner import FullScan, plan_query
+from string_pool import StringPool
+
+# Поля, по которым контейнер поддерживает хеш-индексы
+INDEXED_FIELDS = ('type', 'name', 'date', 'place', 'parties')
+
+# Поля, строки которых интернируются в пуле контейнера: их значения
+# повторяются во многих событиях
+INTERNED_FIELDS = ('date', 'place', 'parties')
+
+# Интернируемые поля, которые есть у класса событий
+_interned_fields_cache: Dict[type, Tuple[str, ...]] = {}
+
+
+def _interned_fields(cls: type) -> Tuple[str, ...]:
+    """Интернируемые поля класса событий (с кешированием по классу)."""
+    fields = _interned_fields_cache.get(cls)
+    if fields is None:
+        fields = _interned_fields_cache[cls] = tuple(
+            field for field in INTERNED_FIELDS if hasattr(cls, field))
+    return fields
+
+
+# Доля пустых ячеек, после которой хранилище сжимается
+DEFAULT_COMPACT_RATIO = 0.5
+
+# Минимальное число пустых ячеек, после которого имеет смысл сжатие
+COMPACT_MIN_TOMBSTONES = 1024
+
+
+def event_lines(events: Iterable[HistoricalEvent], count: int) -> Iterator[str]:
+    """
+    Лениво сформировать строки вывода команды PRINT.
+
+    Строки событий создаются по мере перебора, поэтому вывод можно
+    передавать приемнику порциями, не собирая весь список в памяти.
+
+    Args:
+        events: События в порядке вывода
+        count: Количество событий (нужно для заголовка до перебора)
+
+    Yields:
+        Строки без завершающих переводов строк
+    """
+    if not count:
+        yield "Контейнер пуст."
+        return
+    separator = "=" * 60
+    yield f"\nВсего событий в контейнере: {count}"
+    yield separator
+    for i, event in enumerate(events, 1):
+        yield f"{i}. {event}"
+    yield separator
 
 
 class EventContainer:
-    """Контейнер для хранения исторических событий."""
+    """
+    Контейнер для хранения исторических событий.
 
-    def __init__(self):
-        """Инициализация пустого контейнера."""
-        self._events: List[HistoricalEvent] = []
+    Хранилище событий скрыто за небольшим набором примитивов
+    (_put, _pop, _get, _items, _scan, _compact), которые переопределяют
+    альтернативные реализации хранения; индексы и логика команд
+    работают поверх них.
+
+    Удаление не перестраивает хранилище: ячейка события помечается
+    пустой (tombstone), а физическое сжатие выполняется отложенно -
+    когда доля пустых ячеек превышает порог или перед выводом.
+    """
+
+    def __init__(self, trigram_index: bool = True, indexed: bool = True,
+                 compact_ratio: float = DEFAULT_COMPACT_RATIO,
+                 intern_strings: bool = True):
+        """
+        Инициализация пустого контейнера.
+
+        Args:
+            trigram_index: Поддерживать ли индекс триграмм названий
+                для условий name contains (требует дополнительной памяти)
+            indexed: Поддерживать ли вторичные индексы; без них все
+                условия проверяются перебором
+            compact_ratio: Доля пустых ячеек, после которой хранилище
+                сжимается
+            intern_strings: Хранить ли одинаковые даты, места и стороны
+                событий одной строкой из пула контейнера
+        """
+        # Ячейки событий в порядке добавления (None - удаленное событие)
+        # и возрастающие идентификаторы событий в тех же позициях
+        self._slots: List[Optional[HistoricalEvent]] = []
+        self._slot_ids = array('q')
+        self._next_id = 0
+        self._live = 0
+        self.compact_ratio = compact_ratio
+        self._indexes: Dict[str, HashIndex] = {}
+        self._date_index: Optional[SortedDateIndex] = None
+        self._trigram_index: Optional[TrigramIndex] = None
+        self._pool: Optional[StringPool] = StringPool() if intern_strings else None
+        if indexed:
+            self._indexes = {field: HashIndex() for field in INDEXED_FIELDS}
+            self._date_index = SortedDateIndex()
+            if trigram_index:
+                self._trigram_index = TrigramIndex()
+
+    @property
+    def _events(self) -> List[HistoricalEvent]:
+        """Список событий в порядке добавления."""
+        return [event for _, event in self._items()]
+
+    def __len__(self) -> int:
+        """Количество событий в контейнере."""
+        return self._live
 
     def add(self, event: HistoricalEvent) -> None:
         """
@@ -20,32 +130,580 @@ class EventContainer:
         Args:
             event: Историческое событие для добавления
         """
-        self._events.append(event)
+        if self._pool is not None:
+            self._intern(event)
+        event_id = self._put(event)
+        self._index(event_id, event)
+
+    def add_many(self, events: Sequence[HistoricalEvent]) -> None:
+        """
+        Добавить пакет событий в контейнер.
+
+        Хранилище расширяется одной операцией, индекс дат дополняется и
+        упорядочивается один раз на пакет, а не вставкой каждого события.
+
+        Args:
+            events: События в порядке добавления
+        """
+        if not events:
+            return
+        if self._pool is not None:
+            for event in events:
+                self._intern(event)
+        event_ids = self._put_many(events)
+        for field, index in self._indexes.items():
+            index.add_many(
+                (value, event_id)
+                for event_id, value in zip(
+                    event_ids, (getattr(event, field, None) for event in events))
+                if value is not None)
+        if self._date_index is not None:
+            self._date_index.add_many(
+                zip((event.date_key for event in events), event_ids))
+        if self._trigram_index is not None:
+            for event_id, event in zip(event_ids, events):
+                self._trigram_index.add(event.name, event_id)
 
     def remove(self, condition: Callable[[HistoricalEvent], bool]) -> int:
         """
         Удалить события, соответствующие условию.
 
+        Условие равенства по индексируемому полю обрабатывается через
+        хеш-индекс, сравнение дат - через отсортированный индекс дат;
+        оба затрагивают только подходящие события. Для name contains
+        проверяются только кандидаты из индекса триграмм. Логическая
+        комбинация условий выполняется по плану планировщика запросов.
+        Любое другое условие проверяется для каждого события.
+
         Args:
             condition: Функция-условие для проверки событий
 
         Returns:
             Количество удаленных событий
         """
-        initial_count = len(self._events)
-        self._events = [
-            event for event in self._events if not condition(event)]
-        removed_count = initial_count - len(self._events)
+        if (isinstance(condition, FieldEquals)
+                and condition.field in self._indexes):
+            matched: Iterable[int] = self._indexes[condition.field].lookup(
+                condition.value)
+        elif (isinstance(condition, DateCompare)
+              and self._date_index is not None):
+            # Диапазон вырезается из индекса дат одним срезом
+            matched = self._date_index.pop_range(*self._date_range(condition))
+            for event_id in matched:
+                self._discard(event_id, in_date_index=False)
+            self._maybe_compact()
+            return len(matched)
+        elif isinstance(condition, BooleanCondition):
+            # План перебирает индексы лениво, поэтому кандидаты
+            # собираются до начала удаления
+            matched = list(plan_query(self, condition).ids())
+        else:
+            matched = self._scan(condition)
+
+        removed_count = self._discard_many(matched)
+        self._maybe_compact()
         return removed_count
 
-    def print_all(self) -> None:
-        """Вывести все события на экран."""
-        if not self._events:
-            print("Контейнер пуст.")
-            return
+    def remove_many(
+            self, conditions: Sequence[Callable[[HistoricalEvent], bool]]
+    ) -> List[int]:
+        """
+        Удалить события по серии условий, как при последовательных remove.
+
+        Событие засчитывается первому по порядку условию, которому оно
+        соответствует. Если перебора требуют хотя бы два условия, все
+        они проверяются за один общий проход по контейнеру; иначе
+        условия выполняются по одному через индексы.
+
+        Args:
+            conditions: Условия в порядке команд
+
+        Returns:
+            Количество удаленных событий для каждого условия
+        """
+        if not self.shares_scan(conditions):
+            return [self.remove(condition) for condition in conditions]
+
+        counts = [0] * len(conditions)
+        matched = []
+        numbered = list(enumerate(conditions))
+        for event_id, event in self._items():
+            for position, condition in numbered:
+                if condition(event):
+                    counts[position] += 1
+                    matched.append(event_id)
+                    break
+
+        self._discard_many(matched)
+        self._maybe_compact()
+        return counts
+
+    def shares_scan(
+            self, conditions: Sequence[Callable[[HistoricalEvent], bool]]) -> bool:
+        """
+        Проверит ли remove_many серию условий одним общим проходом.
+
+        Общий проход не изменяет контейнер, пока не проверены все
+        условия; иначе remove_many выполняет условия по одному, и
+        ошибка в условии оставляет удаления предыдущих в силе.
+
+        Args:
+            conditions: Условия в порядке команд
+
+        Returns:
+            True, если перебора требуют хотя бы два условия
+        """
+        return sum(1 for condition in conditions if self._needs_scan(condition)) >= 2
+
+    def find(self, condition: Callable[[HistoricalEvent], bool],
+             offset: int = 0,
+             limit: Optional[int] = None) -> Iterator[HistoricalEvent]:
+        """
+        Найти события по условию, не изменяя контейнер.
+
+        Результат - ленивый генератор: события извлекаются по мере
+        перебора, а пропуск offset и ограничение limit применяются к
+        потоку идентификаторов из индекса, поэтому страница результатов
+        стоит O(offset + limit), а не O(n). События выдаются в порядке
+        добавления, для сравнения дат - в порядке возрастания даты.
+        Генератор нужно исчерпать до следующего изменения контейнера.
+
+        Args:
+            condition: Функция-условие для проверки событий
+            offset: Число пропускаемых подходящих событий
+            limit: Максимальное число событий (None - без ограничения)
+
+        Yields:
+            Подходящие события
+        """
+        stop = None if limit is None else offset + limit
+        for event_id in islice(self._matches(condition), offset, stop):
+            yield self._get(event_id)
+
+    def count(self, condition: Callable[[HistoricalEvent], bool]) -> int:
+        """
+        Количество событий, соответствующих условию.
+
+        Для равенства по индексируемому полю и сравнения дат ответ
+        берется из размеров индексов без обращения к событиям.
+
+        Args:
+            condition: Функция-условие для проверки событий
+
+        Returns:
+            Количество подходящих событий
+        """
+        if (isinstance(condition, FieldEquals)
+                and condition.field in self._indexes):
+            return self._indexes[condition.field].count(condition.value)
+        if (isinstance(condition, DateCompare)
+                and self._date_index is not None):
+            return self._date_index.count_range(*self._date_range(condition))
+        return sum(1 for _ in self._matches(condition, ordered=False))
+
+    def explain(self, condition: Callable[[HistoricalEvent], bool]) -> List[str]:
+        """
+        Описание плана выполнения условия.
+
+        Args:
+            condition: Атомарное условие или логическая комбинация
+
+        Returns:
+            Строки описания узлов плана с оценками числа событий
+        """
+        return plan_query(self, condition).explain()  # type: ignore[arg-type]
+
+    def print_all(self, output: Optional[OutputSink] = None) -> None:
+        """
+        Вывести все события на экран.
+
+        Строки формируются лениво и передаются приемнику порциями,
+        а не отдельным вызовом на каждое событие; весь вывод в памяти
+        не собирается.
+
+        Args:
+            output: Приемник вывода (по умолчанию - стандартный вывод)
+        """
+        if output is None:
+            output = OutputSink()
+        output.write_lines(self.iter_print_lines())
+
+    def iter_print_lines(self, detach: bool = False) -> Iterator[str]:
+        """
+        Лениво перебрать строки вывода команды PRINT.
+
+        Без detach контейнер нельзя изменять, пока перебор не завершен.
+
+        Args:
+            detach: Сразу запомнить список событий, чтобы перебор не
+                зависел от последующих изменений контейнера (строки
+                по-прежнему формируются лениво)
+
+        Returns:
+            Итератор строк без завершающих переводов строк
+        """
+        if self._tombstones():
+            self._compact()
+        events: Iterable[HistoricalEvent] = (event for _, event in self._items())
+        if detach:
+            events = list(events)
+        return event_lines(events, self._live)
+
+    def print_lines(self) -> List[str]:
+        """
+        Строки вывода команды PRINT.
+
+        Returns:
+            Строки без завершающих переводов строк
+        """
+        return list(self.iter_print_lines())
+
+    def clear(self) -> None:
+        """Удалить все события и очистить индексы."""
+        self._slots = []
+        self._slot_ids = array('q')
+        self._live = 0
+        self._clear_indexes()
+        if self._pool is not None:
+            self._pool.clear()
+
+    def intern_stats(self) -> Dict[str, int]:
+        """
+        Статистика пула интернированных строк.
+
+        Returns:
+            Словарь StringPool.stats (пустой, если пул отключен)
+        """
+        return self._pool.stats() if self._pool is not None else {}
+
+    # Примитивы хранилища
+
+    def _put(self, event: HistoricalEvent) -> int:
+        """
+        Сохранить событие и выдать ему идентификатор.
+
+        Args:
+            event: Сохраняемое событие
 
-        print(f"\nВсего событий в контейнере: {len(self._events)}")
-        print("=" * 60)
-        for i, event in enumerate(self._events, 1):
-            print(f"{i}. {event}")
-        print("=" * 60)
+        Returns:
+            Идентификатор события
+        """
+        event_id = self._next_id
+        self._next_id += 1
+        self._slots.append(event)
+        self._slot_ids.append(event_id)
+        self._live += 1
+        return event_id
+
+    def _put_many(self, events: Sequence[HistoricalEvent]) -> Sequence[int]:
+        """
+        Сохранить пакет событий.
+
+        Args:
+            events: Сохраняемые события
+
+        Returns:
+            Идентификаторы событий в том же порядке
+        """
+        event_ids = range(self._next_id, self._next_id + len(events))
+        self._next_id += len(events)
+        self._slots.extend(events)
+        self._slot_ids.extend(event_ids)
+        self._live += len(events)
+        return event_ids
+
+    def _position(self, event_id: int) -> int:
+        """
+        Позиция ячейки события (бинарный поиск по идентификаторам).
+
+        Args:
+            event_id: Идентификатор события
+
+        Returns:
+            Позиция в списке ячеек
+
+        Raises:
+            KeyError: Если события нет в контейнере
+        """
+        position = bisect_left(self._slot_ids, event_id)
+        if (position < len(self._slot_ids)
+                and self._slot_ids[position] == event_id
+                and self._slots[position] is not None):
+            return position
+        raise KeyError(event_id)
+
+    def _pop(self, event_id: int) -> HistoricalEvent:
+        """
+        Пометить ячейку события пустой.
+
+        Args:
+            event_id: Идентификатор события
+
+        Returns:
+            Извлеченное событие
+        """
+        position = self._position(event_id)
+        event = self._slots[position]
+        self._slots[position] = None
+        self._live -= 1
+        return event  # type: ignore[return-value]
+
+    def _get(self, event_id: int) -> HistoricalEvent:
+        """
+        Получить событие по идентификатору.
+
+        Args:
+            event_id: Идентификатор события
+
+        Returns:
+            Событие
+        """
+        return self._slots[self._position(event_id)]  # type: ignore[return-value]
+
+    def _items(self) -> Iterator[Tuple[int, HistoricalEvent]]:
+        """Пары (идентификатор, событие) в порядке добавления."""
+        for event_id, event in zip(self._slot_ids, self._slots):
+            if event is not None:
+                yield event_id, event
+
+    def _tombstones(self) -> int:
+        """Количество пустых ячеек в хранилище."""
+        return len(self._slots) - self._live
+
+    def _maybe_compact(self) -> None:
+        """Сжать хранилище, если пустых ячеек стало слишком много."""
+        tombstones = self._tombstones()
+        if (tombstones >= COMPACT_MIN_TOMBSTONES
+                and tombstones > self.compact_ratio * (tombstones + self._live)):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Удалить пустые ячейки; идентификаторы событий не меняются."""
+        live = [(event_id, event)
+                for event_id, event in zip(self._slot_ids, self._slots)
+                if event is not None]
+        self._slot_ids = array('q', (event_id for event_id, _ in live))
+        self._slots = [event for _, event in live]
+
+    def _needs_scan(self, condition: Callable[[HistoricalEvent], bool]) -> bool:
+        """
+        Требует ли условие проверки каждого события (без индексов).
+
+        Args:
+            condition: Функция-условие
+
+        Returns:
+            True если условие обрабатывается полным перебором
+        """
+        if isinstance(condition, FieldEquals):
+            return condition.field not in self._indexes
+        if isinstance(condition, DateCompare):
+            return self._date_index is None
+        if isinstance(condition, NameContains):
+            return (self._trigram_index is None
+                    or len(condition.needle) < TrigramIndex.GRAM_SIZE)
+        if isinstance(condition, BooleanCondition):
+            return isinstance(plan_query(self, condition), FullScan)
+        return True
+
+    def _index_access(self, condition: Condition) -> Optional[Tuple[str, int]]:
+        """
+        Индекс для атомарного условия и оценка числа подходящих событий.
+
+        Оценка берется из размеров индексов без обращения к событиям;
+        для индекса триграмм это длина самого короткого списка.
+
+        Args:
+            condition: Атомарное условие
+
+        Returns:
+            Пара (название индекса, оценка) или None, если индекса нет
+        """
+        if (isinstance(condition, FieldEquals)
+                and condition.field in self._indexes):
+            return "Хеш-индекс", self._indexes[condition.field].count(
+                condition.value)
+        if (isinstance(condition, DateCompare)
+                and self._date_index is not None):
+            return "Индекс дат", self._date_index.count_range(
+                *self._date_range(condition))
+        if (isinstance(condition, NameContains)
+                and self._trigram_index is not None):
+            estimate = self._trigram_index.estimate(condition.needle)
+            if estimate is not None:
+                return "Индекс триграмм", estimate
+        return None
+
+    def _scan(self, condition: Callable[[HistoricalEvent], bool]) -> List[int]:
+        """
+        Идентификаторы событий, соответствующих условию, без индексов
+        равенства и дат.
+
+        Args:
+            condition: Функция-условие для проверки событий
+
+        Returns:
+            Идентификаторы подходящих событий
+        """
+        if (isinstance(condition, NameContains)
+                and self._trigram_index is not None):
+            candidates = self._trigram_index.candidates(condition.needle)
+            if candidates is not None:
+                return [event_id for event_id in candidates
+                        if condition(self._get(event_id))]
+        return [event_id for event_id, event in self._items()
+                if condition(event)]
+
+    def _matches(self, condition: Callable[[HistoricalEvent], bool],
+                 ordered: bool = True) -> Iterator[int]:
+        """
+        Ленивый поток идентификаторов событий, соответствующих условию.
+
+        В отличие от _scan, индексы используются без копирования списков:
+        следующий идентификатор вычисляется только по запросу.
+
+        Args:
+            condition: Функция-условие для проверки событий
+            ordered: Нужен ли порядок выдачи; без него (например, для
+                подсчета) результаты перебора не сортируются
+
+        Returns:
+            Итератор идентификаторов (для сравнения дат - по возрастанию
+            даты, иначе - в порядке добавления; без ordered - в любом
+            порядке)
+        """
+        if isinstance(condition, BooleanCondition):
+            return plan_query(self, condition).ids()
+        if (isinstance(condition, FieldEquals)
+                and condition.field in self._indexes):
+            return self._indexes[condition.field].iter_ids(condition.value)
+        if isinstance(condition, DateCompare):
+            if self._date_index is not None:
+                return self._date_index.iter_range(*self._date_range(condition))
+            if not ordered:
+                return (event_id for event_id, event in self._items()
+                        if condition(event))
+            # Без индекса порядок дат восстанавливается сортировкой
+            return iter([event_id for _, event_id in sorted(
+                (event.date_key, event_id) for event_id, event in self._items()
+                if condition(event))])
+        if (isinstance(condition, NameContains)
+                and self._trigram_index is not None):
+            candidates = self._trigram_index.candidates(condition.needle)
+            if candidates is not None:
+                return (event_id
+                        for event_id in (sorted(candidates) if ordered else candidates)
+                        if condition(self._get(event_id)))
+        return (event_id for event_id, event in self._items()
+                if condition(event))
+
+    @staticmethod
+    def _date_range(condition: DateCompare
+                    ) -> Tuple[Optional[DateKey], Optional[DateKey]]:
+        """
+        Границы диапазона индекса дат для сравнения дат.
+
+        Args:
+            condition: Условие сравнения дат
+
+        Returns:
+            Пара (нижняя граница, верхняя граница); None - без границы
+        """
+        if condition.operator == '<':
+            return None, condition.date_key
+        return condition.date_key, None
+
+    # Поддержка индексов
+
+    def _clear_indexes(self) -> None:
+        """Очистить все индексы."""
+        for index in self._indexes.values():
+            index.clear()
+        if self._date_index is not None:
+            self._date_index.clear()
+        if self._trigram_index is not None:
+            self._trigram_index.clear()
+
+    def _index(self, event_id: int, event: HistoricalEvent) -> None:
+        """
+        Добавить событие во все индексы.
+
+        Args:
+            event_id: Идентификатор события
+            event: Событие
+        """
+        for field, index in self._indexes.items():
+            value = getattr(event, field, None)
+            if value is not None:
+                index.add(value, event_id)
+        if self._date_index is not None:
+            self._date_index.add(event.date_key, event_id)
+        if self._trigram_index is not None:
+            self._trigram_index.add(event.name, event_id)
+
+    def _intern(self, event: HistoricalEvent) -> None:
+        """
+        Заменить строки интернируемых полей события строками из пула.
+
+        Args:
+            event: Добавляемое событие
+        """
+        intern = self._pool.intern  # type: ignore[union-attr]
+        for field in _interned_fields(type(event)):
+            value = getattr(event, field, None)
+            if value is not None:
+                setattr(event, field, intern(value))
+
+    def _discard(self, event_id: int,
+                 in_date_index: bool = True) -> HistoricalEvent:
+        """
+        Удалить событие из хранилища и из всех индексов.
+
+        Args:
+            event_id: Идентификатор удаляемого события
+            in_date_index: Удалять ли запись из индекса дат (False, если
+                она уже извлечена диапазоном или будет удалена пакетом)
+
+        Returns:
+            Удаленное событие
+        """
+        event = self._pop(event_id)
+        for field, index in self._indexes.items():
+            value = getattr(event, field, None)
+            if value is not None:
+                index.discard(value, event_id)
+        if in_date_index and self._date_index is not None:
+            self._date_index.discard(event.date_key, event_id)
+        if self._trigram_index is not None:
+            self._trigram_index.discard(event.name, event_id)
+        if self._pool is not None:
+            release = self._pool.release
+            for field in _interned_fields(type(event)):
+                value = getattr(event, field, None)
+                if value is not None:
+                    release(value)
+        return event
+
+    def _discard_many(self, event_ids: Iterable[int]) -> int:
+        """
+        Удалить события из хранилища и из всех индексов.
+
+        Записи индекса дат удаляются одним пакетом после остальных
+        индексов, а не сдвигом списка на каждое событие.
+
+        Args:
+            event_ids: Идентификаторы удаляемых событий
+
+        Returns:
+            Количество удаленных событий
+        """
+        if self._date_index is None:
+            removed_count = 0
+            for event_id in event_ids:
+                self._discard(event_id)
+                removed_count += 1
+            return removed_count
+        entries = [(self._discard(event_id, in_date_index=False).date_key, event_id)
+                   for event_id in event_ids]
+        self._date_index.discard_many(entries)
+        return len(entries)
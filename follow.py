@@ -0,0 +1,252 @@
+"""
+Модуль слежения за дописываемым файлом команд (режим tail -f).
+
+Новые данные ожидаются через inotify (Linux), а если он недоступен -
+периодическим опросом размера файла. Обрабатываются только завершенные
+строки; усечение файла и его замена (ротация) обнаруживаются по размеру
+и номеру inode.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import threading
+import time
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+from command_reader import UNKNOWN, Command, classify
+
+# Интервал опроса файла (секунд) без inotify; с inotify - страховочный
+DEFAULT_POLL_INTERVAL = 0.5
+
+# Максимальный объем данных, читаемый за один пакет
+FOLLOW_CHUNK_SIZE = 1 << 20
+
+# Пакет: (команды, момент обнаружения данных по time.perf_counter)
+FollowBatch = Tuple[List[Command], float]
+
+
+class _Inotify:
+    """Минимальная обертка над inotify через ctypes."""
+
+    # События каталога, после которых файл нужно перечитать
+    MASK = (0x002      # IN_MODIFY
+            | 0x004    # IN_ATTRIB
+            | 0x008    # IN_CLOSE_WRITE
+            | 0x040    # IN_MOVED_FROM
+            | 0x080    # IN_MOVED_TO
+            | 0x100    # IN_CREATE
+            | 0x200)   # IN_DELETE
+
+    def __init__(self, fd: int):
+        """
+        Инициализация.
+
+        Args:
+            fd: Дескриптор inotify с добавленным наблюдением
+        """
+        self._fd = fd
+
+    @classmethod
+    def create(cls, directory: str) -> Optional['_Inotify']:
+        """
+        Начать наблюдение за каталогом.
+
+        Args:
+            directory: Каталог, в котором находится файл команд
+
+        Returns:
+            Обертка или None, если inotify недоступен
+        """
+        library = ctypes.util.find_library('c')
+        try:
+            libc = ctypes.CDLL(library, use_errno=True)
+            init, add_watch = libc.inotify_init1, libc.inotify_add_watch
+        except (OSError, AttributeError):
+            return None
+        fd = init(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if add_watch(fd, os.fsencode(directory), cls.MASK) < 0:
+            os.close(fd)
+            return None
+        return cls(fd)
+
+    def wait(self, timeout: float) -> None:
+        """
+        Дождаться событий каталога или истечения времени.
+
+        Args:
+            timeout: Максимальное время ожидания в секундах
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if ready:
+            try:
+                while os.read(self._fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self) -> None:
+        """Прекратить наблюдение."""
+        os.close(self._fd)
+
+
+class FileFollower:
+    """
+    Источник пакетов команд из дописываемого файла.
+
+    Первый пакет содержит уже записанные данные; затем после каждого
+    появления данных выдается пакет новых завершенных строк. Незавершенная
+    последняя строка ждет своего перевода строки. При усечении файл
+    читается с начала, при замене - сначала дочитывается прежний файл,
+    затем открывается новый; номера строк в обоих случаях начинаются
+    заново.
+    """
+
+    def __init__(self, filename: str,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 use_inotify: bool = True,
+                 notify: Optional[Callable[[str], None]] = None):
+        """
+        Инициализация.
+
+        Args:
+            filename: Имя файла команд
+            poll_interval: Интервал опроса в секундах
+            use_inotify: Использовать ли inotify, если он доступен
+            notify: Функция для сообщений об усечении и замене файла
+        """
+        self.filename = filename
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self.notify = notify if notify is not None else (lambda message: None)
+        self._file: Optional[BinaryIO] = None
+        self._inode: Tuple[int, int] = (0, 0)
+        self._offset = 0
+        self._line_num = 0
+        self._partial = b''
+        self.inotify_active = False
+
+    def batches(self, stop: Optional[threading.Event] = None
+                ) -> Iterator[FollowBatch]:
+        """
+        Пакеты команд по мере появления данных.
+
+        Args:
+            stop: Событие остановки (None - до прерывания извне)
+
+        Yields:
+            Пакеты (команды, момент обнаружения данных)
+
+        Raises:
+            FileNotFoundError: Если файла нет при запуске
+        """
+        stop = stop if stop is not None else threading.Event()
+        self._open()
+        watcher = None
+        if self.use_inotify:
+            watcher = _Inotify.create(
+                os.path.dirname(os.path.abspath(self.filename)))
+        self.inotify_active = watcher is not None
+        try:
+            while not stop.is_set():
+                detected = time.perf_counter()
+                got_data = False
+                for data in self._read_available():
+                    got_data = True
+                    commands = self._commands(data)
+                    if commands:
+                        yield commands, detected
+                    detected = time.perf_counter()
+                if got_data or stop.is_set():
+                    continue
+                if watcher is not None:
+                    watcher.wait(self.poll_interval)
+                else:
+                    stop.wait(self.poll_interval)
+        finally:
+            if watcher is not None:
+                watcher.close()
+            if self._file is not None:
+                self._file.close()
+
+    def _open(self) -> None:
+        """Открыть текущий файл с начала."""
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.filename, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self._inode = (stat.st_dev, stat.st_ino)
+        self._offset = 0
+        self._line_num = 0
+        self._partial = b''
+
+    def _read_available(self) -> Iterator[bytes]:
+        """
+        Прочитать новые данные с учетом усечения и замены файла.
+
+        Yields:
+            Блоки завершенных строк (не более FOLLOW_CHUNK_SIZE байт чтения)
+        """
+        try:
+            stat = os.stat(self.filename)
+            current = (stat.st_dev, stat.st_ino)
+        except FileNotFoundError:
+            # Файл удален или переименован, новый еще не создан
+            current = None
+
+        if current == self._inode and stat.st_size < self._offset:
+            self.notify(f"Файл {self.filename} усечен, чтение с начала")
+            self._open()
+
+        yield from self._read_chunks()
+
+        if current is not None and current != self._inode:
+            # Остаток прежнего файла считается завершенной строкой
+            if self._partial:
+                yield self._partial + b'\n'
+            self.notify(f"Файл {self.filename} заменен, чтение нового файла")
+            self._open()
+            yield from self._read_chunks()
+
+    def _read_chunks(self) -> Iterator[bytes]:
+        """Прочитать открытый файл до конца блоками завершенных строк."""
+        assert self._file is not None
+        while True:
+            self._file.seek(self._offset)
+            data = self._file.read(FOLLOW_CHUNK_SIZE)
+            if not data:
+                return
+            self._offset += len(data)
+            data = self._partial + data
+            end = data.rfind(b'\n') + 1
+            self._partial = data[end:]
+            if end:
+                yield data[:end]
+
+    def _commands(self, data: bytes) -> List[Command]:
+        """
+        Разобрать блок завершенных строк в команды.
+
+        Строка, которую не удалось декодировать, выдается как
+        неизвестная команда с описанием ошибки.
+
+        Args:
+            data: Байты строк, каждая завершена b'\\n'
+
+        Returns:
+            Команды с номерами строк от начала текущего файла
+        """
+        commands: List[Command] = []
+        for raw in data.split(b'\n')[:-1]:
+            self._line_num += 1
+            try:
+                line = raw.decode('utf-8').strip()
+            except UnicodeDecodeError as e:
+                commands.append((self._line_num, UNKNOWN, f"<{e}>"))
+                continue
+            kind = classify(line)
+            if kind is not None:
+                commands.append((self._line_num, kind, line))
+        return commands
@@ -3,9 +3,50 @@
 Базовый класс и производные классы для битв и договоров.
 """
 
+import re
+from functools import lru_cache
+from typing import Tuple
+
+# Ключ сортировки даты: (признак нечисловой даты, год, остаток строки)
+DateKey = Tuple[int, int, str]
+
+_YEAR_PATTERN = re.compile(r'\s*(-?\d+)(.*)$', re.DOTALL)
+
+
+@lru_cache(maxsize=65536)
+def make_date_key(date: str) -> DateKey:
+    """
+    Построить нормализованный ключ для сравнения дат.
+
+    Даты в потоке команд сильно повторяются, поэтому ключи кешируются:
+    события с одинаковой датой разделяют один кортеж.
+
+    Ведущий год сравнивается как число, поэтому "800" меньше "1380";
+    остаток строки (например, "-09-07") уточняет порядок внутри года.
+    Даты без ведущего года упорядочиваются после всех числовых
+    лексикографически.
+
+    Args:
+        date: Дата в строковом виде
+
+    Returns:
+        Ключ, пригодный для сравнения и сортировки
+    """
+    match = _YEAR_PATTERN.match(date)
+    if match:
+        return (0, int(match.group(1)), match.group(2))
+    return (1, 0, date)
+
 
 class HistoricalEvent:
-    """Базовый класс для исторических событий."""
+    """
+    Базовый класс для исторических событий.
+
+    Классы событий используют __slots__: у экземпляров нет __dict__,
+    что заметно сокращает память при миллионах событий.
+    """
+
+    __slots__ = ('name', 'date', 'date_key')
 
     def __init__(self, name: str, date: str):
         """
@@ -17,6 +58,7 @@ class HistoricalEvent:
         """
         self.name = name
         self.date = date
+        self.date_key = make_date_key(date)
 
     def __str__(self) -> str:
         """Строковое представление события."""
@@ -30,6 +72,11 @@ class HistoricalEvent:
 class Battle(HistoricalEvent):
     """Класс для битв."""
 
+    __slots__ = ('place',)
+
+    # Тип события общий для всех битв и хранится в классе
+    type = "Битва"
+
     def __init__(self, name: str, date: str, place: str):
         """
         Инициализация битвы.
@@ -41,7 +88,6 @@ class Battle(HistoricalEvent):
         """
         super().__init__(name, date)
         self.place = place
-        self.type = "Битва"
 
     def __str__(self) -> str:
         """Строковое представление битвы."""
@@ -55,6 +101,11 @@ class Battle(HistoricalEvent):
 class Treaty(HistoricalEvent):
     """Класс для договоров."""
 
+    __slots__ = ('parties',)
+
+    # Тип события общий для всех договоров и хранится в классе
+    type = "Договор"
+
     def __init__(self, name: str, date: str, parties: str):
         """
         Инициализация договора.
@@ -66,7 +117,6 @@ class Treaty(HistoricalEvent):
         """
         super().__init__(name, date)
         self.parties = parties
-        self.type = "Договор"
 
     def __str__(self) -> str:
         """Строковое представление договора."""
@@ -0,0 +1,426 @@
+"""
+Модуль вторичных индексов для контейнера исторических событий.
+Индексы хранят идентификаторы событий, а не сами события.
+"""
+
+import sys
+from bisect import bisect_left, bisect_right, insort
+from typing import (
+    Dict, Set, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Tuple)
+from historical_event import DateKey
+
+# Границы идентификаторов для бинарного поиска по парам (ключ, id)
+_MIN_ID = -1
+_MAX_ID = sys.maxsize
+
+# Минимальный пакет, который выгоднее досортировать, чем вставлять
+# поштучно: пересортировка стоит O(n) сравнений, вставка - сдвиг O(n)
+_MERGE_MIN_BATCH = 64
+
+# Минимальный пакет удалений, для которого один проход фильтрации
+# дешевле, чем сдвиг списка на каждое удаление
+_FILTER_MIN_BATCH = 64
+
+
+class HashIndex:
+    """
+    Хеш-индекс: значение поля -> идентификаторы событий.
+
+    Идентификаторы значения хранятся ключами словаря, который сохраняет
+    порядок вставки: события добавляются с растущими идентификаторами,
+    поэтому список значения перебирается в порядке добавления событий
+    без сортировки.
+    """
+
+    def __init__(self):
+        """Инициализация пустого индекса."""
+        self._postings: Dict[str, Dict[int, None]] = {}
+
+    def add(self, value: str, event_id: int) -> None:
+        """
+        Добавить идентификатор события в индекс.
+
+        Args:
+            value: Значение поля события
+            event_id: Идентификатор события
+        """
+        postings = self._postings.get(value)
+        if postings is None:
+            self._postings[value] = {event_id: None}
+        else:
+            postings[event_id] = None
+
+    def add_many(self, pairs: Iterable[Tuple[str, int]]) -> None:
+        """
+        Добавить пакет пар (значение, идентификатор) в индекс.
+
+        Args:
+            pairs: Пары значения поля и идентификатора события
+        """
+        postings_map = self._postings
+        for value, event_id in pairs:
+            postings = postings_map.get(value)
+            if postings is None:
+                postings_map[value] = {event_id: None}
+            else:
+                postings[event_id] = None
+
+    def discard(self, value: str, event_id: int) -> None:
+        """
+        Удалить идентификатор события из индекса.
+
+        Args:
+            value: Значение поля события
+            event_id: Идентификатор события
+        """
+        postings = self._postings.get(value)
+        if postings is None:
+            return
+        postings.pop(event_id, None)
+        if not postings:
+            del self._postings[value]
+
+    def lookup(self, value: str) -> FrozenSet[int]:
+        """
+        Найти идентификаторы событий с заданным значением поля.
+
+        Args:
+            value: Искомое значение
+
+        Returns:
+            Множество идентификаторов (копия, безопасная для удаления)
+        """
+        return frozenset(self._postings.get(value, ()))
+
+    def iter_ids(self, value: str) -> Iterator[int]:
+        """
+        Перебрать идентификаторы событий с заданным значением поля.
+
+        Перебор ленивый: индекс нельзя изменять, пока он не завершен.
+
+        Args:
+            value: Искомое значение
+
+        Returns:
+            Итератор идентификаторов в порядке добавления событий
+        """
+        return iter(self._postings.get(value, ()))
+
+    def count(self, value: str) -> int:
+        """
+        Количество событий с заданным значением поля.
+
+        Args:
+            value: Искомое значение
+
+        Returns:
+            Количество событий
+        """
+        return len(self._postings.get(value, ()))
+
+    def contains(self, value: str, event_id: int) -> bool:
+        """
+        Есть ли событие в списке значения (без обращения к событию).
+
+        Args:
+            value: Значение поля
+            event_id: Идентификатор события
+
+        Returns:
+            True если у события такое значение поля
+        """
+        postings = self._postings.get(value)
+        return postings is not None and event_id in postings
+
+    def clear(self) -> None:
+        """Очистить индекс."""
+        self._postings.clear()
+
+
+class SortedDateIndex:
+    """
+    Отсортированный индекс дат для диапазонных запросов.
+
+    Хранит пары (ключ даты, идентификатор) в отсортированном списке;
+    поиск границ диапазона выполняется бинарным поиском.
+    """
+
+    def __init__(self):
+        """Инициализация пустого индекса."""
+        self._entries: List[Tuple[DateKey, int]] = []
+
+    def __len__(self) -> int:
+        """Количество записей в индексе."""
+        return len(self._entries)
+
+    def add(self, key: DateKey, event_id: int) -> None:
+        """
+        Добавить запись в индекс.
+
+        Args:
+            key: Ключ даты события
+            event_id: Идентификатор события
+        """
+        entry = (key, event_id)
+        # События обычно добавляются с растущими идентификаторами,
+        # поэтому частый случай - вставка в конец без сдвига
+        if not self._entries or self._entries[-1] < entry:
+            self._entries.append(entry)
+        else:
+            insort(self._entries, entry)
+
+    def add_many(self, entries: Iterable[Tuple[DateKey, int]]) -> None:
+        """
+        Добавить пакет записей в индекс.
+
+        Пакет сортируется отдельно и дописывается в конец. Если он
+        перекрывается с уже существующими записями, небольшой пакет
+        вставляется бинарным поиском, а крупный - досортировкой списка
+        за один проход (слияние двух упорядоченных участков).
+
+        Args:
+            entries: Пары (ключ даты, идентификатор события)
+        """
+        batch = sorted(entries)
+        if not batch:
+            return
+        if not self._entries or self._entries[-1] < batch[0]:
+            self._entries.extend(batch)
+        elif len(batch) < _MERGE_MIN_BATCH:
+            for entry in batch:
+                insort(self._entries, entry)
+        else:
+            self._entries.extend(batch)
+            self._entries.sort()
+
+    def discard(self, key: DateKey, event_id: int) -> None:
+        """
+        Удалить запись из индекса.
+
+        Args:
+            key: Ключ даты события
+            event_id: Идентификатор события
+        """
+        entry = (key, event_id)
+        position = bisect_left(self._entries, entry)
+        if (position < len(self._entries)
+                and self._entries[position] == entry):
+            del self._entries[position]
+
+    def discard_many(self, entries: Sequence[Tuple[DateKey, int]]) -> None:
+        """
+        Удалить пакет записей из индекса.
+
+        Каждое удаление из середины списка сдвигает его хвост, поэтому
+        небольшой пакет удаляется по одной записи бинарным поиском, а
+        крупный - одним проходом фильтрации списка за O(n).
+
+        Args:
+            entries: Пары (ключ даты, идентификатор события)
+        """
+        if len(entries) < _FILTER_MIN_BATCH:
+            for key, event_id in entries:
+                self.discard(key, event_id)
+            return
+        removed = {event_id for _, event_id in entries}
+        self._entries = [entry for entry in self._entries
+                         if entry[1] not in removed]
+
+    def _bounds(self, low: Optional[DateKey], high: Optional[DateKey],
+                low_inclusive: bool, high_inclusive: bool) -> Tuple[int, int]:
+        """Позиции начала и конца диапазона в списке записей."""
+        if low is None:
+            start = 0
+        elif low_inclusive:
+            start = bisect_left(self._entries, (low, _MIN_ID))
+        else:
+            start = bisect_right(self._entries, (low, _MAX_ID))
+
+        if high is None:
+            stop = len(self._entries)
+        elif high_inclusive:
+            stop = bisect_right(self._entries, (high, _MAX_ID))
+        else:
+            stop = bisect_left(self._entries, (high, _MIN_ID))
+        return start, max(start, stop)
+
+    def range(self, low: Optional[DateKey] = None,
+              high: Optional[DateKey] = None,
+              low_inclusive: bool = False,
+              high_inclusive: bool = False) -> List[int]:
+        """
+        Идентификаторы событий с датой в заданном диапазоне.
+
+        Args:
+            low: Нижняя граница (None - без ограничения)
+            high: Верхняя граница (None - без ограничения)
+            low_inclusive: Включать ли нижнюю границу
+            high_inclusive: Включать ли верхнюю границу
+
+        Returns:
+            Идентификаторы в порядке возрастания даты
+        """
+        start, stop = self._bounds(low, high, low_inclusive, high_inclusive)
+        return [event_id for _, event_id in self._entries[start:stop]]
+
+    def iter_range(self, low: Optional[DateKey] = None,
+                   high: Optional[DateKey] = None,
+                   low_inclusive: bool = False,
+                   high_inclusive: bool = False) -> Iterator[int]:
+        """
+        Лениво перебрать идентификаторы событий диапазона.
+
+        Аргументы совпадают с range(). Границы находятся бинарным поиском,
+        записи не копируются; индекс нельзя изменять, пока перебор не
+        завершен.
+
+        Returns:
+            Итератор идентификаторов в порядке возрастания даты
+        """
+        start, stop = self._bounds(low, high, low_inclusive, high_inclusive)
+        entries = self._entries
+        return (entries[position][1] for position in range(start, stop))
+
+    def count_range(self, low: Optional[DateKey] = None,
+                    high: Optional[DateKey] = None,
+                    low_inclusive: bool = False,
+                    high_inclusive: bool = False) -> int:
+        """
+        Количество событий с датой в диапазоне (два бинарных поиска).
+
+        Аргументы совпадают с range().
+
+        Returns:
+            Количество событий
+        """
+        start, stop = self._bounds(low, high, low_inclusive, high_inclusive)
+        return stop - start
+
+    def pop_range(self, low: Optional[DateKey] = None,
+                  high: Optional[DateKey] = None,
+                  low_inclusive: bool = False,
+                  high_inclusive: bool = False) -> List[int]:
+        """
+        Извлечь из индекса все записи диапазона одним срезом.
+
+        Аргументы совпадают с range().
+
+        Returns:
+            Идентификаторы извлеченных событий
+        """
+        start, stop = self._bounds(low, high, low_inclusive, high_inclusive)
+        removed = [event_id for _, event_id in self._entries[start:stop]]
+        del self._entries[start:stop]
+        return removed
+
+    def clear(self) -> None:
+        """Очистить индекс."""
+        self._entries.clear()
+
+
+class TrigramIndex:
+    """
+    Инвертированный индекс n-грамм (триграмм) названий событий.
+
+    Названия приводятся к единому регистру (casefold). Для поиска
+    подстроки пересекаются списки событий всех ее n-грамм; полученные
+    кандидаты затем проверяются точным сравнением.
+    """
+
+    GRAM_SIZE = 3
+
+    def __init__(self):
+        """Инициализация пустого индекса."""
+        self._postings: Dict[str, Set[int]] = {}
+
+    @classmethod
+    def grams(cls, text: str) -> Set[str]:
+        """
+        Множество n-грамм строки (строка должна быть уже в casefold).
+
+        Args:
+            text: Исходная строка
+
+        Returns:
+            Множество различных n-грамм
+        """
+        size = cls.GRAM_SIZE
+        return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+    def add(self, name: str, event_id: int) -> None:
+        """
+        Добавить название события в индекс.
+
+        Args:
+            name: Название события
+            event_id: Идентификатор события
+        """
+        for gram in self.grams(name.casefold()):
+            postings = self._postings.get(gram)
+            if postings is None:
+                self._postings[gram] = {event_id}
+            else:
+                postings.add(event_id)
+
+    def discard(self, name: str, event_id: int) -> None:
+        """
+        Удалить название события из индекса.
+
+        Args:
+            name: Название события
+            event_id: Идентификатор события
+        """
+        for gram in self.grams(name.casefold()):
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            postings.discard(event_id)
+            if not postings:
+                del self._postings[gram]
+
+    def candidates(self, needle: str) -> Optional[Set[int]]:
+        """
+        Кандидаты на вхождение подстроки в название.
+
+        Args:
+            needle: Искомая подстрока (уже в casefold)
+
+        Returns:
+            Надмножество подходящих идентификаторов или None, если
+            подстрока короче n-граммы и индекс неприменим
+        """
+        if len(needle) < self.GRAM_SIZE:
+            return None
+        postings = []
+        for gram in self.grams(needle):
+            gram_postings = self._postings.get(gram)
+            if not gram_postings:
+                return set()
+            postings.append(gram_postings)
+        # Пересечение начинается с самого короткого списка
+        postings.sort(key=len)
+        result = set(postings[0])
+        for gram_postings in postings[1:]:
+            result &= gram_postings
+            if not result:
+                break
+        return result
+
+    def estimate(self, needle: str) -> Optional[int]:
+        """
+        Верхняя оценка числа кандидатов без пересечения списков.
+
+        Args:
+            needle: Искомая подстрока (уже в casefold)
+
+        Returns:
+            Длина самого короткого списка n-грамм подстроки или None,
+            если подстрока короче n-граммы
+        """
+        if len(needle) < self.GRAM_SIZE:
+            return None
+        return min(len(self._postings.get(gram, ())) for gram in self.grams(needle))
+
+    def clear(self) -> None:
+        """Очистить индекс."""
+        self._postings.clear()
@@ -3,30 +3,301 @@
 Программа обрабатывает файл с командами ADD, REM, PRINT.
 """
 
-import sys
+import argparse
+from pathlib import Path
+from typing import Tuple
 from container import EventContainer
+from columnar_container import ColumnarEventContainer
+from concurrent_container import ConcurrentEventContainer
 from command_parser import CommandParser
+from output import OUTPUT_MODES, OutputSink, create_sink
+from command_reader import READERS
+from checkpoint import Checkpointer, DEFAULT_CHECKPOINT_LINES
+from follow import DEFAULT_POLL_INTERVAL
+from metrics import STATS_FORMATS, Metrics
+from memprofile import DEFAULT_REPORT, DEFAULT_SNAPSHOT_EVERY, MemoryProfiler
+from parallel_scan import DEFAULT_PARALLEL_THRESHOLD
+from server import run_server
 
+# Доступные реализации хранилища событий
+STORAGE_BACKENDS = {
+    'objects': EventContainer,
+    'columnar': ColumnarEventContainer,
+    'concurrent': ConcurrentEventContainer,
+}
 
-def main():
+
+def _positive_int(value: str) -> int:
+    """
+    Преобразование аргумента командной строки в положительное целое.
+
+    Args:
+        value: Строковое значение аргумента
+
+    Returns:
+        Целое число не меньше 1
+
+    Raises:
+        argparse.ArgumentTypeError: Если значение не положительное целое
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            f"ожидается положительное целое число: {value}")
+    return number
+
+
+def _address(value: str) -> Tuple[str, int]:
+    """
+    Преобразование аргумента HOST:PORT в адрес TCP.
+
+    Args:
+        value: Строковое значение аргумента
+
+    Returns:
+        Пара (адрес, порт)
+
+    Raises:
+        argparse.ArgumentTypeError: Если значение не в формате HOST:PORT
+    """
+    host, _, port = value.rpartition(':')
+    if not port.isdigit():
+        raise argparse.ArgumentTypeError(
+            f"ожидается адрес в формате HOST:PORT: {value}")
+    return host or 'localhost', int(port)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Разбор аргументов командной строки.
+
+    Args:
+        argv: Список аргументов (по умолчанию sys.argv[1:])
+
+    Returns:
+        Разобранные аргументы
+    """
+    parser = argparse.ArgumentParser(
+        description="Обработка файла с командами ADD, REM, PRINT.",
+        epilog="Пример: python main.py commands.txt")
+    parser.add_argument(
+        'filename', nargs='?',
+        help="имя файла с командами (в режиме сервера - необязательный "
+             "файл, выполняемый перед запуском)")
+    parser.add_argument(
+        '--storage', choices=sorted(STORAGE_BACKENDS), default='objects',
+        help="реализация хранилища: objects - список объектов с индексами, "
+             "columnar - компактные столбцы, concurrent - объекты с "
+             "блокировкой писателей и чтением версий без блокировки "
+             "(по умолчанию: objects)")
+    parser.add_argument(
+        '--output', choices=list(OUTPUT_MODES), default='direct',
+        help="режим вывода: direct - запись каждой строки сразу, "
+             "buffered - крупными блоками, threaded - крупными блоками "
+             "в фоновом потоке (по умолчанию: direct)")
+    parser.add_argument(
+        '--quiet', action='store_true',
+        help="не выводить эхо каждой команды ADD, только итоговое количество")
+    parser.add_argument(
+        '--reader', choices=READERS, default='text',
+        help="чтение файла: text - построчно в текстовом режиме, "
+             "mmap - отображение в память и разбор байтов, подходит для "
+             "многогигабайтных файлов (по умолчанию: text)")
+    parser.add_argument(
+        '--workers', type=_positive_int, default=1, metavar='N',
+        help="число процессов для разбора команд ADD; вывод совпадает с "
+             "последовательной обработкой (по умолчанию: 1 - без пула)")
+    parser.add_argument(
+        '--scan-workers', type=_positive_int, default=1, metavar='N',
+        help="число процессов для проверки условий REM по столбцам "
+             "участками; только с --storage columnar (по умолчанию: 1 - "
+             "без пула)")
+    parser.add_argument(
+        '--parallel-threshold', type=_positive_int,
+        default=DEFAULT_PARALLEL_THRESHOLD, metavar='N',
+        help="число строк столбцов, начиная с которого условия REM "
+             "проверяются в --scan-workers процессах "
+             f"(по умолчанию: {DEFAULT_PARALLEL_THRESHOLD})")
+    parser.add_argument(
+        '--no-intern', action='store_true',
+        help="не хранить одинаковые даты, места и стороны событий одной "
+             "строкой из пула контейнера (колоночное хранилище всегда "
+             "хранит строки в таблице)")
+    parser.add_argument(
+        '--load-snapshot', metavar='FILE',
+        help="перед обработкой загрузить контейнер из двоичного снимка "
+             "(вместо повторного выполнения команд)")
+    parser.add_argument(
+        '--save-snapshot', metavar='FILE',
+        help="после обработки сохранить контейнер в двоичный снимок")
+    parser.add_argument(
+        '--checkpoint', metavar='FILE',
+        help="периодически сохранять контрольную точку (позиция в файле "
+             "и снимок контейнера) в FILE")
+    parser.add_argument(
+        '--checkpoint-lines', type=_positive_int, metavar='N',
+        help="интервал контрольных точек в строках файла "
+             f"(по умолчанию: {DEFAULT_CHECKPOINT_LINES}, если не задан "
+             "--checkpoint-seconds)")
+    parser.add_argument(
+        '--checkpoint-seconds', type=float, metavar='S',
+        help="интервал контрольных точек в секундах")
+    parser.add_argument(
+        '--resume', action='store_true',
+        help="продолжить обработку с последней контрольной точки "
+             "(требует --checkpoint)")
+    parser.add_argument(
+        '--follow', action='store_true',
+        help="после обработки файла следить за ним и выполнять дописываемые "
+             "команды (inotify или опрос; выход - Ctrl+C)")
+    parser.add_argument(
+        '--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL,
+        metavar='S',
+        help="интервал опроса файла в режиме --follow "
+             f"(по умолчанию: {DEFAULT_POLL_INTERVAL} с)")
+    parser.add_argument(
+        '--serve', type=_address, metavar='HOST:PORT',
+        help="запустить сервер команд TCP над общим контейнером")
+    parser.add_argument(
+        '--unix', metavar='PATH',
+        help="запустить сервер команд на Unix-сокете PATH")
+    parser.add_argument(
+        '--snapshot-dir', metavar='DIR',
+        help="каталог, в котором клиенты сервера могут сохранять и загружать "
+             "снимки командами SAVE и LOAD (указывается только имя файла); "
+             "без него эти команды в режиме сервера отклоняются")
+    parser.add_argument(
+        '--stats', nargs='?', const='json', choices=STATS_FORMATS,
+        metavar='FORMAT',
+        help="собирать метрики команд (число, ошибки, гистограммы задержек, "
+             "размер контейнера), доступные команде STATS, и вывести их "
+             "в конце: json или prometheus (по умолчанию: json)")
+    parser.add_argument(
+        '--memprofile', type=_positive_int, nargs='?',
+        const=DEFAULT_SNAPSHOT_EVERY, metavar='N',
+        help="профилировать память (tracemalloc): снимок каждые N команд "
+             f"(по умолчанию: {DEFAULT_SNAPSHOT_EVERY}), пиковая память по "
+             "видам команд и места выделения памяти; обработка заметно "
+             "замедляется")
+    parser.add_argument(
+        '--memprofile-report', default=DEFAULT_REPORT, metavar='FILE',
+        help=f"файл отчета о памяти (по умолчанию: {DEFAULT_REPORT})")
+    args = parser.parse_args(argv)
+    serving = args.serve is not None or args.unix is not None
+    if args.filename is None and not serving:
+        parser.error("не указан файл с командами")
+    if serving and args.follow:
+        parser.error("--follow нельзя использовать вместе с сервером")
+    if args.scan_workers > 1 and args.storage != 'columnar':
+        parser.error("--scan-workers используется только с --storage columnar")
+    if args.snapshot_dir is not None and not serving:
+        parser.error("--snapshot-dir используется только вместе с сервером")
+    if serving and args.memprofile:
+        parser.error("--memprofile нельзя использовать вместе с сервером")
+    if args.resume and not args.checkpoint:
+        parser.error("--resume требует --checkpoint")
+    if args.resume and args.follow:
+        parser.error("--resume нельзя использовать вместе с --follow")
+    return args
+
+
+def _run_file(parser: CommandParser, args: argparse.Namespace) -> None:
+    """
+    Обработка файла команд: однократно или в режиме слежения.
+
+    Args:
+        parser: Парсер команд
+        args: Разобранные аргументы командной строки
+    """
+    if not args.follow:
+        parser.process_file(args.filename, resume=args.resume)
+        return
+    try:
+        parser.follow_file(args.filename, poll_interval=args.poll_interval)
+    except KeyboardInterrupt:
+        parser.output.write("Слежение остановлено.")
+
+
+def _write_memory_report(profiler: MemoryProfiler, filename: str,
+                         output: OutputSink) -> None:
+    """
+    Остановить профилирование памяти и записать отчет.
+
+    Args:
+        profiler: Профилировщик памяти
+        filename: Имя файла отчета
+        output: Приемник для сообщения о результате
+    """
+    profiler.stop()
+    try:
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        profiler.write_report(filename)
+    except OSError as e:
+        output.write(f"Ошибка при сохранении отчета о памяти: {e}")
+        return
+    output.write(f"Отчет о памяти сохранен: {filename}")
+
+
+def main(argv=None):
     """Главная функция программы."""
-    if len(sys.argv) < 2:
-        print("Использование: python main.py <имя_файла>")
-        print("Пример: python main.py commands.txt")
-        sys.exit(1)
+    args = parse_args(argv)
+    filename = args.filename
 
-    filename = sys.argv[1]
+    # Профилирование памяти начинается до создания контейнера, чтобы
+    # учитывались все его выделения
+    profiler = None
+    if args.memprofile:
+        profiler = MemoryProfiler(every=args.memprofile)
+        profiler.start()
 
-    # Создаем контейнер и парсер
-    container = EventContainer()
-    parser = CommandParser(container)
+    # Создаем приемник вывода, контейнер и парсер
+    output = create_sink(args.output, quiet=args.quiet)
+    # Колоночное хранилище всегда хранит строки в своей таблице
+    options = ({'intern_strings': not args.no_intern}
+               if args.storage != 'columnar' else
+               {'scan_workers': args.scan_workers,
+                'parallel_threshold': args.parallel_threshold})
+    container = STORAGE_BACKENDS[args.storage](**options)
+    checkpointer = None
+    if args.checkpoint:
+        checkpointer = Checkpointer(args.checkpoint,
+                                    every_lines=args.checkpoint_lines,
+                                    every_seconds=args.checkpoint_seconds)
+    metrics = Metrics() if args.stats else None
+    parser = CommandParser(container, output=output, reader=args.reader,
+                           workers=args.workers, checkpointer=checkpointer,
+                           metrics=metrics, memory_profiler=profiler)
 
     # Обрабатываем файл с командами
-    print(f"Обработка файла: {filename}")
-    print("-" * 60)
-    parser.process_file(filename)
-    print("-" * 60)
-    print("Обработка завершена.")
+    try:
+        if filename is not None:
+            output.write(f"Обработка файла: {filename}")
+            output.write("-" * 60)
+        if args.load_snapshot:
+            parser.load_snapshot(args.load_snapshot)
+        if filename is not None:
+            _run_file(parser, args)
+        if args.serve is not None or args.unix is not None:
+            host, port = args.serve if args.serve is not None else (None, None)
+            run_server(container, output, host, port, args.unix,
+                       metrics=metrics, snapshot_dir=args.snapshot_dir)
+        if args.save_snapshot:
+            parser.save_snapshot(args.save_snapshot)
+        if filename is not None:
+            output.write("-" * 60)
+            output.write("Обработка завершена.")
+        if metrics is not None:
+            metrics.set_string_pool(container.intern_stats())
+            output.write(metrics.render(args.stats))
+    finally:
+        if isinstance(container, ColumnarEventContainer):
+            container.close()
+        if profiler is not None:
+            _write_memory_report(profiler, args.memprofile_report, output)
+        output.close()
 
 
 if __name__ == "__main__":
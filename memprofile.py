@@ -0,0 +1,213 @@
+"""
+Модуль профилирования памяти обработки команд (tracemalloc).
+
+Профилировщик получает каждый выполненный сегмент команд от парсера:
+перед сегментом сбрасывает пик tracemalloc, после - запоминает
+наибольший временный прирост памяти для вида команд. Каждые N команд
+делается снимок: текущая память, живые события и байты на событие.
+Из последнего снимка берутся самые затратные места выделения памяти и
+их рост относительно первого снимка. Хранятся только первый и
+последний снимки, поэтому память профилировщика не растет с числом
+снимков.
+"""
+
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+
+# Интервал снимков по умолчанию (команд)
+DEFAULT_SNAPSHOT_EVERY = 100_000
+
+# Число мест выделения памяти в отчете
+DEFAULT_TOP_SITES = 15
+
+# Файл отчета по умолчанию
+DEFAULT_REPORT = "analysis_results/memory_profile.txt"
+
+# Выделения самого tracemalloc и загрузчика модулей в отчет не попадают
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+class MemorySample(NamedTuple):
+    """Точка ряда снимков памяти."""
+
+    seconds: float
+    commands: int
+    events: int
+    current: int
+    peak: int
+
+    @property
+    def bytes_per_event(self) -> float:
+        """Текущая память на одно живое событие."""
+        return self.current / self.events if self.events else 0.0
+
+
+class KindMemory:
+    """Память, занятая командами одного вида."""
+
+    __slots__ = ('segments', 'commands', 'peak_increase', 'peak')
+
+    def __init__(self):
+        """Инициализация нулевых значений."""
+        self.segments = 0
+        self.commands = 0
+        self.peak_increase = 0
+        self.peak = 0
+
+
+def format_size(size: float) -> str:
+    """Размер в байтах в читаемом виде."""
+    for unit in ("Б", "КиБ", "МиБ"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}" if unit != "Б" else f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} ГиБ"
+
+
+class MemoryProfiler:
+    """Профилировщик памяти выполнения команд."""
+
+    def __init__(self, every: int = DEFAULT_SNAPSHOT_EVERY,
+                 top: int = DEFAULT_TOP_SITES, frames: int = 1):
+        """
+        Инициализация профилировщика.
+
+        Args:
+            every: Интервал снимков в командах
+            top: Число мест выделения памяти в отчете
+            frames: Глубина стека, запоминаемая для каждого выделения
+        """
+        self.every = max(1, every)
+        self.top = top
+        self.frames = max(1, frames)
+        self.kinds: Dict[str, KindMemory] = {}
+        self.samples: List[MemorySample] = []
+        self._first: Optional[tracemalloc.Snapshot] = None
+        self._last: Optional[tracemalloc.Snapshot] = None
+        self._started = 0.0
+        self._commands = 0
+        self._next_snapshot = self.every
+        self._before = 0
+        self._events = 0
+
+    def start(self) -> None:
+        """Начать трассировку выделений памяти."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._started = time.monotonic()
+
+    def before_segment(self) -> None:
+        """Сбросить пик перед выполнением сегмента."""
+        self._before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def after_segment(self, kind: str, count: int, events: int) -> None:
+        """
+        Учесть выполненный сегмент.
+
+        Args:
+            kind: Вид команд
+            count: Число команд сегмента
+            events: Число событий в контейнере после сегмента
+        """
+        peak = tracemalloc.get_traced_memory()[1]
+        stats = self.kinds.get(kind)
+        if stats is None:
+            stats = self.kinds[kind] = KindMemory()
+        stats.segments += 1
+        stats.commands += count
+        stats.peak_increase = max(stats.peak_increase, peak - self._before)
+        stats.peak = max(stats.peak, peak)
+
+        self._commands += count
+        self._events = events
+        if self._commands >= self._next_snapshot:
+            self.snapshot()
+            self._next_snapshot = (self._commands // self.every + 1) * self.every
+
+    def snapshot(self) -> None:
+        """Сделать снимок памяти и добавить точку ряда."""
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        if self._first is None:
+            self._first = snapshot
+        self._last = snapshot
+        self.samples.append(MemorySample(
+            time.monotonic() - self._started, self._commands, self._events,
+            current, peak))
+
+    def stop(self) -> None:
+        """Сделать завершающий снимок и остановить трассировку."""
+        if not tracemalloc.is_tracing():
+            return
+        if not self.samples or self.samples[-1].commands != self._commands:
+            self.snapshot()
+        tracemalloc.stop()
+
+    def report(self) -> str:
+        """
+        Текст отчета.
+
+        Returns:
+            Отчет: ряд снимков, пики по видам команд, места выделения
+            памяти и их рост с первого снимка
+        """
+        lines = [
+            "=" * 80,
+            "ПРОФИЛЬ ПАМЯТИ ОБРАБОТКИ КОМАНД (tracemalloc)",
+            "=" * 80,
+            f"Дата: {datetime.now().isoformat(timespec='seconds')}",
+            f"Команд: {self._commands}, снимков: {len(self.samples)} "
+            f"(каждые {self.every} команд)",
+            "",
+            "Снимки памяти:",
+            f"{'время, с':>9} {'команд':>10} {'событий':>10} "
+            f"{'текущая':>12} {'пик':>12} {'на событие':>12}",
+        ]
+        for sample in self.samples:
+            lines.append(
+                f"{sample.seconds:>9.2f} {sample.commands:>10} {sample.events:>10} "
+                f"{format_size(sample.current):>12} {format_size(sample.peak):>12} "
+                f"{format_size(sample.bytes_per_event):>12}")
+
+        lines += ["", "Пиковая память по видам команд:",
+                  f"{'вид':<8} {'сегментов':>10} {'команд':>10} "
+                  f"{'прирост за сегмент':>19} {'пик':>12}"]
+        for kind, stats in sorted(self.kinds.items(),
+                                  key=lambda item: -item[1].peak_increase):
+            lines.append(f"{kind:<8} {stats.segments:>10} {stats.commands:>10} "
+                         f"{format_size(stats.peak_increase):>19} "
+                         f"{format_size(stats.peak):>12}")
+
+        if self._last is not None:
+            lines += ["", f"Места выделения памяти (последний снимок, "
+                          f"топ {self.top}):"]
+            for stat in self._last.statistics('lineno')[:self.top]:
+                lines.append(f"{format_size(stat.size):>12} {stat.count:>10} блоков  "
+                             f"{stat.traceback}")
+        if self._first is not None and self._last is not self._first:
+            lines += ["", f"Рост с первого снимка (топ {self.top}):"]
+            for diff in self._last.compare_to(self._first, 'lineno')[:self.top]:
+                lines.append(f"{format_size(diff.size_diff):>12} "
+                             f"{diff.count_diff:>+10} блоков  {diff.traceback}")
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, filename: str = DEFAULT_REPORT) -> None:
+        """
+        Записать отчет в файл.
+
+        Args:
+            filename: Имя файла отчета
+
+        Raises:
+            OSError: Если файл не удалось записать
+        """
+        with open(filename, 'w', encoding='utf-8') as f:
+            f.write(self.report())
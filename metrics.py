@@ -0,0 +1,346 @@
+"""
+Модуль метрик выполнения команд.
+
+Для каждого вида команд считаются выполненные команды, ошибки и
+гистограмма задержек с логарифмическими корзинами: отдельные замеры не
+хранятся, память метрик не зависит от числа команд. Размер контейнера
+запоминается прореживаемым временным рядом ограниченной длины, а
+состояние пула интернированных строк - последними переданными значениями.
+Метрики выводятся в JSON или в текстовом формате Prometheus.
+"""
+
+import json
+import time
+from typing import Any, Dict, List, Tuple
+
+# Форматы вывода метрик
+STATS_FORMATS = ('json', 'prometheus')
+
+# Префикс имен метрик Prometheus
+METRIC_PREFIX = 'historical_events'
+
+# Число подкорзин на каждую степень двойки (точность около 25%)
+_SUB_BUCKETS = 4
+_SUB_BITS = 2
+
+# Число корзин: покрывает задержки до 2^62 нс
+_BUCKET_COUNT = 256
+
+# Максимальное число точек ряда размеров контейнера
+SIZE_SERIES_LENGTH = 512
+
+# Описания показателей пула строк для Prometheus
+STRING_POOL_HELP = {
+    'strings': "Различные строки в пуле",
+    'references': "Ссылки событий на строки пула",
+    'string_bytes': "Размер строк пула в байтах",
+    'saved_bytes': "Память, сэкономленная общими строками, в байтах",
+    'pool_bytes': "Размер словарей пула в байтах",
+    'reclaimed': "Строки, удаленные из пула после удаления событий",
+}
+
+
+def bucket_index(value: int) -> int:
+    """
+    Номер корзины значения.
+
+    Значения до 2^_SUB_BITS имеют собственные корзины; каждый следующий
+    интервал [2^k, 2^(k+1)) делится на _SUB_BUCKETS равных корзин.
+
+    Args:
+        value: Неотрицательное значение (наносекунды)
+
+    Returns:
+        Номер корзины
+    """
+    bits = value.bit_length()
+    if bits <= _SUB_BITS:
+        return value
+    return ((bits - _SUB_BITS) * _SUB_BUCKETS
+            + ((value >> (bits - _SUB_BITS - 1)) & (_SUB_BUCKETS - 1)))
+
+
+def bucket_upper_bound(index: int) -> int:
+    """
+    Верхняя граница корзины (не включая ее).
+
+    Args:
+        index: Номер корзины
+
+    Returns:
+        Наименьшее значение следующей корзины
+    """
+    if index < _SUB_BUCKETS:
+        return index + 1
+    bits = index // _SUB_BUCKETS + _SUB_BITS
+    sub = index % _SUB_BUCKETS
+    return (_SUB_BUCKETS + sub + 1) << (bits - _SUB_BITS - 1)
+
+
+class LatencyHistogram:
+    """Гистограмма задержек в наносекундах с логарифмическими корзинами."""
+
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        """Инициализация пустой гистограммы."""
+        self.counts = [0] * _BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.maximum = 0
+
+    def observe(self, value: int, times: int = 1) -> None:
+        """
+        Учесть замер.
+
+        Args:
+            value: Задержка в наносекундах
+            times: Сколько команд имели эту задержку
+        """
+        # bucket_index, встроенная ради скорости
+        bits = value.bit_length()
+        if bits > _SUB_BITS:
+            index = ((bits - _SUB_BITS) * _SUB_BUCKETS
+                     + ((value >> (bits - _SUB_BITS - 1)) & (_SUB_BUCKETS - 1)))
+            if index >= _BUCKET_COUNT:
+                index = _BUCKET_COUNT - 1
+        else:
+            index = value
+        self.counts[index] += times
+        self.count += times
+        self.total += value * times
+        if value > self.maximum:
+            self.maximum = value
+
+    def quantile(self, fraction: float) -> int:
+        """
+        Оценка квантиля сверху (граница корзины).
+
+        Args:
+            fraction: Доля от 0 до 1
+
+        Returns:
+            Задержка в наносекундах (0 для пустой гистограммы)
+        """
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min(bucket_upper_bound(index), self.maximum)
+        return self.maximum
+
+    def buckets(self) -> List[Tuple[int, int]]:
+        """
+        Непустые корзины.
+
+        Returns:
+            Пары (верхняя граница в наносекундах, число замеров)
+        """
+        return [(bucket_upper_bound(index), count)
+                for index, count in enumerate(self.counts) if count]
+
+
+class CommandStats:
+    """Метрики одного вида команд."""
+
+    __slots__ = ('count', 'errors', 'latency')
+
+    def __init__(self):
+        """Инициализация нулевых счетчиков."""
+        self.count = 0
+        self.errors = 0
+        self.latency = LatencyHistogram()
+
+
+class Metrics:
+    """
+    Метрики выполнения команд и размера контейнера.
+
+    Сегмент из нескольких команд (пакет ADD, серия REM) выполняется как
+    единое целое, поэтому каждой его команде приписывается средняя
+    задержка сегмента.
+    """
+
+    def __init__(self, series_length: int = SIZE_SERIES_LENGTH):
+        """
+        Инициализация пустых метрик.
+
+        Args:
+            series_length: Максимальное число точек ряда размеров
+        """
+        self.started = time.monotonic()
+        self.commands: Dict[str, CommandStats] = {}
+        self.container_size = 0
+        self.container_size_max = 0
+        self.string_pool: Dict[str, int] = {}
+        self.series_length = max(2, series_length)
+        self._series: List[Tuple[float, int, int]] = []
+        self._processed = 0
+        self._sample_every = 1
+        self._next_sample = 0
+
+    def observe(self, kind: str, elapsed_ns: int, count: int, errors: int,
+                container_size: int) -> None:
+        """
+        Учесть выполненный сегмент команд.
+
+        Args:
+            kind: Вид команд
+            elapsed_ns: Время выполнения сегмента в наносекундах
+            count: Число команд сегмента
+            errors: Число команд, завершившихся ошибкой
+            container_size: Размер контейнера после сегмента
+        """
+        stats = self.commands.get(kind)
+        if stats is None:
+            stats = self.commands[kind] = CommandStats()
+        if count < 1:
+            count = 1
+        stats.count += count
+        stats.errors += errors
+        stats.latency.observe(elapsed_ns // count, count)
+
+        self.container_size = container_size
+        if container_size > self.container_size_max:
+            self.container_size_max = container_size
+        self._processed += count
+        if self._processed >= self._next_sample:
+            self._sample()
+
+    def set_string_pool(self, stats: Dict[str, int]) -> None:
+        """
+        Запомнить состояние пула интернированных строк контейнера.
+
+        Args:
+            stats: Статистика пула (EventContainer.intern_stats)
+        """
+        self.string_pool = dict(stats)
+
+    def _sample(self) -> None:
+        """
+        Добавить точку ряда размеров.
+
+        Когда ряд заполнен, каждая вторая точка отбрасывается, а интервал
+        между точками (в командах) удваивается: ряд покрывает всю работу
+        при ограниченной длине.
+        """
+        self._series.append((time.monotonic() - self.started,
+                             self._processed, self.container_size))
+        if len(self._series) >= self.series_length:
+            del self._series[1::2]
+            self._sample_every *= 2
+        self._next_sample = self._processed + self._sample_every
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Метрики в виде словаря (для JSON).
+
+        Returns:
+            Словарь с разделами commands и container (и string_pool, если
+            состояние пула передано); задержки - в микросекундах
+        """
+        commands = {}
+        for kind, stats in sorted(self.commands.items()):
+            latency = stats.latency
+            commands[kind] = {
+                'count': stats.count,
+                'errors': stats.errors,
+                'latency_us': {
+                    'mean': round(latency.total / latency.count / 1000, 3)
+                    if latency.count else 0.0,
+                    'p50': latency.quantile(0.5) / 1000,
+                    'p90': latency.quantile(0.9) / 1000,
+                    'p99': latency.quantile(0.99) / 1000,
+                    'max': latency.maximum / 1000,
+                    'buckets': [[bound / 1000, count]
+                                for bound, count in latency.buckets()],
+                },
+            }
+        series = list(self._series)
+        if not series or series[-1][1] != self._processed:
+            series.append((time.monotonic() - self.started,
+                           self._processed, self.container_size))
+        snapshot = {
+            'uptime_seconds': round(time.monotonic() - self.started, 3),
+            'commands': commands,
+            'container': {
+                'size': self.container_size,
+                'max_size': self.container_size_max,
+                'series': [[round(seconds, 3), processed, size]
+                           for seconds, processed, size in series],
+            },
+        }
+        if self.string_pool:
+            snapshot['string_pool'] = dict(self.string_pool)
+        return snapshot
+
+    def to_json(self) -> str:
+        """Метрики в формате JSON."""
+        return json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus (без перевода строки в конце)."""
+        name = METRIC_PREFIX
+        lines = [
+            f"# HELP {name}_commands_total Выполненные команды по видам",
+            f"# TYPE {name}_commands_total counter",
+        ]
+        kinds = sorted(self.commands.items())
+        lines.extend(f'{name}_commands_total{{command="{kind}"}} {stats.count}'
+                     for kind, stats in kinds)
+        lines.append(f"# HELP {name}_command_errors_total Команды, "
+                     "завершившиеся ошибкой")
+        lines.append(f"# TYPE {name}_command_errors_total counter")
+        lines.extend(f'{name}_command_errors_total{{command="{kind}"}} '
+                     f'{stats.errors}' for kind, stats in kinds)
+        histogram = f"{name}_command_duration_seconds"
+        lines.append(f"# HELP {histogram} Задержка выполнения команды")
+        lines.append(f"# TYPE {histogram} histogram")
+        for kind, stats in kinds:
+            latency = stats.latency
+            cumulative = 0
+            for bound, count in latency.buckets():
+                cumulative += count
+                lines.append(f'{histogram}_bucket{{command="{kind}",'
+                             f'le="{bound / 1e9:.9g}"}} {cumulative}')
+            lines.append(f'{histogram}_bucket{{command="{kind}",le="+Inf"}} '
+                         f'{latency.count}')
+            lines.append(f'{histogram}_sum{{command="{kind}"}} '
+                         f'{latency.total / 1e9:.9g}')
+            lines.append(f'{histogram}_count{{command="{kind}"}} {latency.count}')
+        lines.extend([
+            f"# HELP {name}_container_size Число событий в контейнере",
+            f"# TYPE {name}_container_size gauge",
+            f"{name}_container_size {self.container_size}",
+            f"# HELP {name}_container_size_max Наибольшее число событий",
+            f"# TYPE {name}_container_size_max gauge",
+            f"{name}_container_size_max {self.container_size_max}",
+        ])
+        for key, value in self.string_pool.items():
+            gauge = f"{name}_string_pool_{key}"
+            lines.append(f"# HELP {gauge} {STRING_POOL_HELP.get(key, key)}")
+            lines.append(f"# TYPE {gauge} gauge")
+            lines.append(f"{gauge} {value}")
+        return '\n'.join(lines)
+
+    def render(self, fmt: str = 'json') -> str:
+        """
+        Метрики в заданном формате.
+
+        Args:
+            fmt: Формат: json или prometheus
+
+        Returns:
+            Текст метрик
+
+        Raises:
+            ValueError: Если формат неизвестен
+        """
+        if fmt == 'json':
+            return self.to_json()
+        if fmt == 'prometheus':
+            return self.to_prometheus()
+        raise ValueError(f"Неизвестный формат статистики: {fmt}")
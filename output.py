@@ -0,0 +1,226 @@
+"""
+Модуль приемников вывода для парсера команд и контейнера.
+Приемник решает, когда и как строки попадают в поток вывода:
+сразу, через большой буфер или через фоновый поток записи.
+"""
+
+import queue
+import sys
+import threading
+from itertools import islice
+from typing import IO, Iterable, List, Optional
+
+# Размер буфера по умолчанию (символов) для буферизованных приемников
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+# Число строк, объединяемых в одну операцию записи в write_lines
+WRITE_CHUNK_LINES = 4096
+
+
+class OutputSink:
+    """
+    Приемник вывода, записывающий каждую строку сразу.
+
+    Если поток не задан, используется текущий sys.stdout на момент
+    записи. В тихом режиме (quiet) эхо добавленных событий не выводится,
+    а при закрытии печатается только их общее количество.
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, quiet: bool = False):
+        """
+        Инициализация приемника.
+
+        Args:
+            stream: Поток вывода (по умолчанию sys.stdout)
+            quiet: Подавлять ли эхо команд ADD
+        """
+        self._stream = stream
+        self.quiet = quiet
+        self.suppressed = 0
+
+    @property
+    def stream(self) -> IO[str]:
+        """Текущий поток вывода."""
+        return self._stream if self._stream is not None else sys.stdout
+
+    def write(self, text: str) -> None:
+        """
+        Вывести строку.
+
+        Args:
+            text: Строка без завершающего перевода строки
+        """
+        self._emit(text + '\n')
+
+    def write_lines(self, lines: Iterable[str]) -> None:
+        """
+        Вывести несколько строк порциями по WRITE_CHUNK_LINES строк.
+
+        Каждая порция записывается одной операцией; строки читаются из
+        итератора по мере записи, поэтому длинный вывод (например, PRINT
+        большого контейнера) не собирается в памяти целиком.
+
+        Args:
+            lines: Строки без завершающих переводов строк
+        """
+        iterator = iter(lines)
+        while True:
+            chunk = ''.join(line + '\n' for line in islice(iterator, WRITE_CHUNK_LINES))
+            if not chunk:
+                break
+            self._emit(chunk)
+
+    def echo(self, text: str) -> None:
+        """
+        Вывести эхо успешно выполненной команды (например, ADD).
+
+        В тихом режиме строка не выводится, а только учитывается.
+
+        Args:
+            text: Строка эха
+        """
+        if self.quiet:
+            self.suppressed += 1
+        else:
+            self.write(text)
+
+    def flush(self) -> None:
+        """Сбросить накопленный вывод в поток."""
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Завершить вывод: напечатать сводку тихого режима и сбросить буфер."""
+        if self.quiet:
+            self.write(f"Добавлено событий (эхо подавлено): {self.suppressed}")
+            self.suppressed = 0
+        self.flush()
+
+    def _emit(self, chunk: str) -> None:
+        """Записать готовый фрагмент текста."""
+        self.stream.write(chunk)
+
+
+class BufferedSink(OutputSink):
+    """Приемник, накапливающий вывод в памяти и пишущий крупными блоками."""
+
+    def __init__(self, stream: Optional[IO[str]] = None, quiet: bool = False,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE):
+        """
+        Инициализация буферизованного приемника.
+
+        Args:
+            stream: Поток вывода (по умолчанию sys.stdout)
+            quiet: Подавлять ли эхо команд ADD
+            buffer_size: Объем буфера в символах, после которого
+                выполняется запись
+        """
+        super().__init__(stream, quiet)
+        self.buffer_size = buffer_size
+        self._chunks: List[str] = []
+        self._buffered = 0
+
+    def flush(self) -> None:
+        """Записать буфер в поток одной операцией."""
+        if self._chunks:
+            self.stream.write(''.join(self._chunks))
+            self._chunks.clear()
+            self._buffered = 0
+        self.stream.flush()
+
+    def _emit(self, chunk: str) -> None:
+        """Добавить фрагмент в буфер."""
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+
+class ThreadedSink(BufferedSink):
+    """
+    Приемник с фоновым потоком записи.
+
+    Заполненные буферы передаются в ограниченную очередь, из которой их
+    записывает отдельный поток; разбор команд не ждет операций вывода,
+    пока очередь не переполнена.
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, quiet: bool = False,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE, max_pending: int = 8):
+        """
+        Инициализация приемника с фоновым потоком.
+
+        Args:
+            stream: Поток вывода (по умолчанию sys.stdout)
+            quiet: Подавлять ли эхо команд ADD
+            buffer_size: Объем одного блока в символах
+            max_pending: Максимальное число блоков в очереди
+        """
+        super().__init__(stream, quiet, buffer_size)
+        # Поток фиксируется при создании: фоновый поток пишет именно в него
+        self._target = self.stream
+        self._queue: 'queue.Queue[Optional[str]]' = queue.Queue(max_pending)
+        self._error: Optional[BaseException] = None
+        self._writer = threading.Thread(
+            target=self._run, name="output-writer", daemon=True)
+        self._writer.start()
+
+    def flush(self) -> None:
+        """Передать накопленный блок фоновому потоку."""
+        if self._chunks:
+            self._queue.put(''.join(self._chunks))
+            self._chunks.clear()
+            self._buffered = 0
+
+    def close(self) -> None:
+        """Дождаться записи всех блоков и остановить фоновый поток."""
+        super().close()
+        self._queue.put(None)
+        self._writer.join()
+        if self._error is not None:
+            raise IOError(f"Ошибка фоновой записи: {self._error}")
+
+    def _run(self) -> None:
+        """Цикл фонового потока: запись блоков из очереди."""
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            if self._error is not None:
+                continue
+            try:
+                self._target.write(chunk)
+            except (IOError, ValueError) as e:
+                self._error = e
+        try:
+            self._target.flush()
+        except (IOError, ValueError) as e:
+            self._error = self._error or e
+
+
+# Режимы вывода, доступные из командной строки
+OUTPUT_MODES = {
+    'direct': OutputSink,
+    'buffered': BufferedSink,
+    'threaded': ThreadedSink,
+}
+
+
+def create_sink(mode: str = 'direct', quiet: bool = False,
+                stream: Optional[IO[str]] = None) -> OutputSink:
+    """
+    Создать приемник вывода по имени режима.
+
+    Args:
+        mode: Режим вывода (direct, buffered, threaded)
+        quiet: Подавлять ли эхо команд ADD
+        stream: Поток вывода (по умолчанию sys.stdout)
+
+    Returns:
+        Приемник вывода
+
+    Raises:
+        ValueError: Если режим неизвестен
+    """
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Неизвестный режим вывода: {mode}")
+    return OUTPUT_MODES[mode](stream=stream, quiet=quiet)
@@ -0,0 +1,96 @@
+"""
+Модуль параллельной проверки условий по столбцам колоночного хранилища.
+
+Условие REM по столбцу сводится к принадлежности идентификатора строки
+небольшому множеству подходящих идентификаторов. Столбец копируется в
+разделяемую память (multiprocessing.shared_memory), рабочие процессы
+проверяют свои участки столбца и возвращают байтовые маски, которые
+склеиваются по порядку участков в маску всего столбца.
+"""
+
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import AbstractSet, FrozenSet, Optional
+
+# Число строк столбцов, начиная с которого проверка выполняется параллельно
+DEFAULT_PARALLEL_THRESHOLD = 250_000
+
+
+def mask_chunk(name: str, typecode: str, start: int, stop: int,
+               ids: FrozenSet[int]) -> bytes:
+    """
+    Маска участка столбца из разделяемой памяти (выполняется в рабочем
+    процессе).
+
+    Args:
+        name: Имя блока разделяемой памяти со столбцом
+        typecode: Код типа элементов столбца (как у array)
+        start: Первая строка участка
+        stop: Строка за последней строкой участка
+        ids: Подходящие значения столбца
+
+    Returns:
+        По байту на строку участка: 1 - значение подходит, 0 - нет
+    """
+    block = shared_memory.SharedMemory(name=name)
+    column = block.buf.cast(typecode)
+    chunk = column[start:stop]
+    try:
+        return bytes(map(ids.__contains__, chunk))
+    finally:
+        # Блок нельзя закрыть, пока на его буфер есть ссылки
+        chunk.release()
+        column.release()
+        block.close()
+
+
+class ParallelScanner:
+    """Проверка столбцов участками в пуле процессов."""
+
+    def __init__(self, workers: int):
+        """
+        Инициализация; пул процессов запускается при первой проверке.
+
+        Args:
+            workers: Число рабочих процессов
+        """
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def mask(self, column: array, ids: AbstractSet[int]) -> bytes:
+        """
+        Маска строк столбца, значения которых входят в ids.
+
+        Args:
+            column: Столбец (array целых чисел)
+            ids: Подходящие значения столбца
+
+        Returns:
+            По байту на строку столбца: 1 - значение подходит, 0 - нет
+        """
+        rows = len(column)
+        if not rows or not ids:
+            return bytes(rows)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        data = memoryview(column).cast('B')
+        block = shared_memory.SharedMemory(create=True, size=len(data))
+        try:
+            block.buf[:len(data)] = data
+            frozen = frozenset(ids)
+            step = -(-rows // self.workers)
+            futures = [self._pool.submit(mask_chunk, block.name, column.typecode,
+                                         start, min(start + step, rows), frozen)
+                       for start in range(0, rows, step)]
+            return b''.join(future.result() for future in futures)
+        finally:
+            data.release()
+            block.close()
+            block.unlink()
+
+    def close(self) -> None:
+        """Остановить пул процессов."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,266 @@
+"""
+Модуль планировщика запросов для логических комбинаций условий.
+
+План - дерево узлов, каждый из которых выдает возрастающие
+идентификаторы подходящих событий. Для конъюнкции выбирается самый
+избирательный доступный индекс (хеш-индекс, индекс дат, индекс
+триграмм); прочие операнды-равенства проверяются по хеш-индексам без
+обращения к событиям, остальные - на событиях-кандидатах. Дизъюнкция
+объединяет множества кандидатов операндов, если у каждого из них есть
+индекс. Иначе выполняется полный перебор.
+"""
+
+from itertools import chain
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence
+from conditions import (
+    AnyCondition, AndCondition, Condition, DateCompare, FieldEquals,
+    OrCondition)
+
+if TYPE_CHECKING:
+    from container import EventContainer
+
+
+class PlanNode:
+    """Узел плана запроса."""
+
+    def __init__(self, cost: int):
+        """
+        Инициализация узла.
+
+        Args:
+            cost: Оценка числа событий, которые узел проверяет или выдает
+        """
+        self.cost = cost
+
+    def ids(self) -> Iterator[int]:
+        """
+        Идентификаторы подходящих событий.
+
+        Returns:
+            Итератор идентификаторов по возрастанию; перебор ленивый,
+            контейнер нельзя изменять до его завершения
+        """
+        raise NotImplementedError
+
+    def explain(self, depth: int = 0) -> List[str]:
+        """
+        Описание узла и его потомков для команды EXPLAIN.
+
+        Args:
+            depth: Глубина узла (уровень отступа)
+
+        Returns:
+            Строки описания
+        """
+        raise NotImplementedError
+
+    def _line(self, depth: int, text: str) -> str:
+        """Строка описания с отступом и оценкой."""
+        return f"{'  ' * depth}{text} (оценка: {self.cost})"
+
+
+class IndexScan(PlanNode):
+    """Выборка атомарного условия через индекс."""
+
+    def __init__(self, container: 'EventContainer', condition: Condition,
+                 index_name: str, cost: int):
+        """
+        Инициализация узла.
+
+        Args:
+            container: Контейнер событий
+            condition: Атомарное условие
+            index_name: Название индекса для описания плана
+            cost: Оценка числа подходящих событий по индексу
+        """
+        super().__init__(cost)
+        self.container = container
+        self.condition = condition
+        self.index_name = index_name
+
+    def ids(self) -> Iterator[int]:
+        """Идентификаторы из индекса; диапазон дат упорядочивается."""
+        # pylint: disable=protected-access
+        ids = self.container._matches(self.condition)
+        if isinstance(self.condition, DateCompare):
+            return iter(sorted(ids))
+        return ids
+
+    def explain(self, depth: int = 0) -> List[str]:
+        """Описание выборки."""
+        return [self._line(depth, f"{self.index_name}: {self.condition}")]
+
+
+class Intersection(PlanNode):
+    """
+    Конъюнкция: кандидаты ведущего узла, отфильтрованные проверками по
+    хеш-индексам и остаточными условиями.
+    """
+
+    def __init__(self, container: 'EventContainer', driver: PlanNode,
+                 probes: Sequence[FieldEquals],
+                 residual: Sequence[AnyCondition]):
+        """
+        Инициализация узла.
+
+        Args:
+            container: Контейнер событий
+            driver: Самый избирательный узел-источник кандидатов
+            probes: Равенства, проверяемые по хеш-индексам
+            residual: Условия, проверяемые на событиях-кандидатах
+        """
+        super().__init__(driver.cost)
+        self.container = container
+        self.driver = driver
+        self.probes = tuple(probes)
+        self.residual = tuple(residual)
+
+    def ids(self) -> Iterator[int]:
+        """Кандидаты ведущего узла, прошедшие все проверки."""
+        # pylint: disable=protected-access
+        probes = [(self.container._indexes[probe.field], probe.value)
+                  for probe in self.probes]
+        residual = self.residual
+        get = self.container._get
+        for event_id in self.driver.ids():
+            if not all(index.contains(value, event_id) for index, value in probes):
+                continue
+            if residual:
+                event = get(event_id)
+                if not all(condition(event) for condition in residual):
+                    continue
+            yield event_id
+
+    def explain(self, depth: int = 0) -> List[str]:
+        """Описание пересечения."""
+        lines = [self._line(depth, "Пересечение")]
+        lines.extend(self.driver.explain(depth + 1))
+        indent = '  ' * (depth + 1)
+        lines.extend(f"{indent}Проверка по хеш-индексу: {probe}"
+                     for probe in self.probes)
+        lines.extend(f"{indent}Остаточное условие: {condition}"
+                     for condition in self.residual)
+        return lines
+
+
+class Union(PlanNode):
+    """Дизъюнкция: объединение кандидатов операндов."""
+
+    def __init__(self, children: Sequence[PlanNode]):
+        """
+        Инициализация узла.
+
+        Args:
+            children: Узлы операндов
+        """
+        super().__init__(sum(child.cost for child in children))
+        self.children = tuple(children)
+
+    def ids(self) -> Iterator[int]:
+        """Объединение без повторов в порядке возрастания."""
+        return iter(sorted(set(chain.from_iterable(
+            child.ids() for child in self.children))))
+
+    def explain(self, depth: int = 0) -> List[str]:
+        """Описание объединения."""
+        lines = [self._line(depth, "Объединение")]
+        for child in self.children:
+            lines.extend(child.explain(depth + 1))
+        return lines
+
+
+class FullScan(PlanNode):
+    """Проверка условия на каждом событии контейнера."""
+
+    def __init__(self, container: 'EventContainer', condition: AnyCondition):
+        """
+        Инициализация узла.
+
+        Args:
+            container: Контейнер событий
+            condition: Проверяемое условие
+        """
+        super().__init__(len(container))
+        self.container = container
+        self.condition = condition
+
+    def ids(self) -> Iterator[int]:
+        """Идентификаторы событий, прошедших проверку."""
+        condition = self.condition
+        # pylint: disable=protected-access
+        return (event_id for event_id, event in self.container._items()
+                if condition(event))
+
+    def explain(self, depth: int = 0) -> List[str]:
+        """Описание перебора."""
+        return [self._line(depth, f"Полный перебор: {self.condition}")]
+
+
+def plan_query(container: 'EventContainer', condition: AnyCondition) -> PlanNode:
+    """
+    Построить план выполнения условия над контейнером.
+
+    Комбинация, у которой оценка индексного плана не меньше числа
+    событий, выполняется полным перебором: он проверяет каждое событие
+    один раз.
+
+    Args:
+        container: Контейнер событий
+        condition: Атомарное условие или логическая комбинация
+
+    Returns:
+        Корневой узел плана
+    """
+    plan = _plan(container, condition)
+    if plan is None or (not isinstance(plan, IndexScan)
+                        and plan.cost >= len(container)):
+        return FullScan(container, condition)
+    return plan
+
+
+def _plan(container: 'EventContainer',
+          condition: AnyCondition) -> Optional[PlanNode]:
+    """
+    Индексный план условия.
+
+    Args:
+        container: Контейнер событий
+        condition: Условие
+
+    Returns:
+        Узел плана или None, если условие требует полного перебора
+    """
+    # pylint: disable=protected-access
+    if isinstance(condition, Condition):
+        access = container._index_access(condition)
+        if access is None:
+            return None
+        index_name, cost = access
+        return IndexScan(container, condition, index_name, cost)
+
+    if isinstance(condition, AndCondition):
+        planned = [(child, _plan(container, child)) for child in condition.children]
+        indexed = [(child, plan) for child, plan in planned if plan is not None]
+        if not indexed:
+            return None
+        driver_child, driver = min(indexed, key=lambda item: item[1].cost)
+        probes: List[FieldEquals] = []
+        residual: List[AnyCondition] = []
+        for child in condition.children:
+            if child is driver_child:
+                continue
+            if (isinstance(child, FieldEquals)
+                    and child.field in container._indexes):
+                probes.append(child)
+            else:
+                residual.append(child)
+        return Intersection(container, driver, probes, residual)
+
+    if isinstance(condition, OrCondition):
+        plans = [_plan(container, child) for child in condition.children]
+        if any(plan is None for plan in plans):
+            return None
+        return Union(plans)  # type: ignore[arg-type]
+
+    # Отрицание выполняется перебором
+    return None
@@ -1,10 +1,29 @@
 """
 Скрипт для автоматического запуска всех инструментов анализа кода.
+
+С --sizes скрипт дополнительно профилирует обработку синтетических файлов
+команд нескольких размеров (benchmarks/generate_commands.py): для каждого
+размера сохраняются профиль и свернутые стеки для flamegraph, а с
+--baseline профиль сравнивается с прежним профилем того же размера.
+
+Запуск:
+    python run_analysis.py
+    python run_analysis.py --profile-only --sizes 10000,100000
+    python run_analysis.py --profile-only --sizes 10000,100000 --baseline old
 """
 
+import argparse
 import subprocess
 import os
+import sys
+import tempfile
 from pathlib import Path
+from typing import List
+
+from benchmarks.generate_commands import write_commands
+from view_profile import (
+    DEFAULT_THRESHOLD, diff_profiles, load_functions, print_diff,
+    write_collapsed)
 
 
 def run_command(command, output_file=None):
@@ -36,8 +55,84 @@ def run_command(command, output_file=None):
     return True
 
 
-def main():
+def profile_workloads(sizes: List[int], results_dir: Path, seed: int = 1,
+                      baseline_dir: str = "",
+                      threshold: float = DEFAULT_THRESHOLD) -> int:
+    """
+    Профилирование обработки синтетических файлов команд.
+
+    Для каждого размера создается файл команд, main.py выполняется под
+    cProfile (вывод в режиме --quiet --output buffered отбрасывается), а
+    в results_dir сохраняются profile_<размер>.prof и
+    profile_<размер>.collapsed.
+
+    Args:
+        sizes: Размеры файлов команд (строк)
+        results_dir: Каталог результатов
+        seed: Зерно генератора команд
+        baseline_dir: Каталог с прежними profile_<размер>.prof для
+            сравнения ("" - без сравнения)
+        threshold: Допустимый рост собственного времени функции
+
+    Returns:
+        Общее количество регрессий
+    """
+    regressions = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            workload = os.path.join(workdir, f"commands_{size}.txt")
+            write_commands(workload, size, seed=seed)
+            profile = results_dir / f"profile_{size}.prof"
+            print(f"\n  Размер {size}: профилирование...")
+            subprocess.run(
+                [sys.executable, "-m", "cProfile", "-o", str(profile),
+                 "main.py", workload, "--quiet", "--output", "buffered"],
+                stdout=subprocess.DEVNULL, check=True)
+            collapsed = profile.with_suffix(".collapsed")
+            write_collapsed(str(profile), str(collapsed))
+            print(f"  [OK] Профиль: {profile}, стеки для flamegraph: {collapsed}")
+
+            baseline = Path(baseline_dir) / profile.name if baseline_dir else None
+            if baseline is not None and baseline.exists():
+                deltas = diff_profiles(load_functions(str(baseline)),
+                                       load_functions(str(profile)), threshold)
+                regressions += print_diff(deltas, 10)
+            elif baseline is not None:
+                print(f"  ⚠ Нет прежнего профиля {baseline}, сравнение пропущено")
+    return regressions
+
+
+def _sizes(text: str) -> List[int]:
+    """Разобрать список размеров через запятую."""
+    try:
+        sizes = [int(item) for item in text.split(',')]
+    except ValueError:
+        sizes = []
+    if not sizes or any(size <= 0 for size in sizes):
+        raise argparse.ArgumentTypeError(f"Неверные размеры: {text}")
+    return sizes
+
+
+def main(argv=None):
     """Главная функция для запуска анализа."""
+    parser = argparse.ArgumentParser(
+        description="Запуск инструментов анализа и профилирования.")
+    parser.add_argument('--sizes', type=_sizes, default=[],
+                        help="размеры синтетических файлов команд для "
+                             "профилирования через запятую, например "
+                             "10000,100000")
+    parser.add_argument('--seed', type=int, default=1,
+                        help="зерно генератора команд (по умолчанию: 1)")
+    parser.add_argument('--baseline', default="", metavar='DIR',
+                        help="каталог с прежними profile_<размер>.prof "
+                             "для сравнения; код возврата 1 при регрессиях")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимый рост собственного времени функции "
+                             "(по умолчанию: 0.1)")
+    parser.add_argument('--profile-only', action='store_true',
+                        help="только профилирование, без линтеров")
+    args = parser.parse_args(argv)
+
     print("=" * 80)
     print("АНАЛИЗ КОДА ПРОЕКТА 'ИСТОРИЧЕСКИЕ СОБЫТИЯ'")
     print("=" * 80)
@@ -46,6 +141,12 @@ def main():
     results_dir = Path("analysis_results")
     results_dir.mkdir(exist_ok=True)
 
+    if args.profile_only:
+        regressions = profile_workloads(args.sizes, results_dir, args.seed,
+                                        args.baseline, args.threshold)
+        print(f"\nРезультаты сохранены в директории: {results_dir}")
+        return 1 if regressions else 0
+
     python_files = [
         "main.py",
         "historical_event.py",
@@ -81,11 +182,18 @@ def main():
     else:
         print("⚠ Файл commands.txt не найден, пропускаем профилирование")
 
+    regressions = 0
+    if args.sizes:
+        print("\n5. Профилирование синтетических файлов команд...")
+        regressions = profile_workloads(args.sizes, results_dir, args.seed,
+                                        args.baseline, args.threshold)
+
     print("\n" + "=" * 80)
     print("АНАЛИЗ ЗАВЕРШЕН")
     print(f"Результаты сохранены в директории: {results_dir}")
     print("=" * 80)
+    return 1 if regressions else 0
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
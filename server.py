@@ -0,0 +1,244 @@
+"""
+Модуль сетевого сервера команд (asyncio, TCP или Unix-сокет).
+
+Клиенты присылают те же строки команд, что и в файле (ADD, REM, PRINT,
+SAVE, LOAD, FIND, COUNT, EXPLAIN, STATS), и выполняют их над одним общим
+контейнером. На каждую строку сервер отвечает выводом команды,
+завершенным строкой "."; клиент может отправлять команды, не дожидаясь
+ответов (конвейер), - ответы приходят в порядке команд. SAVE и LOAD
+клиентов работают только с файлами каталога снимков сервера.
+"""
+
+import asyncio
+import os
+import time
+from itertools import islice
+from typing import Iterable, List, Optional
+from container import EventContainer
+from command_parser import CommandParser
+from command_reader import LOAD, PRINT, SAVE, classify
+from metrics import Metrics
+from output import OutputSink
+
+# Строка, завершающая ответ на одну команду
+RESPONSE_END = "."
+
+# Число строк вывода PRINT в одной порции записи
+DEFAULT_PRINT_CHUNK_LINES = 1024
+
+# Максимальная длина строки команды в байтах
+MAX_LINE_LENGTH = 1 << 16
+
+
+class _ConnectionSink(OutputSink):
+    """Приемник, накапливающий ответ на команду для отправки клиенту."""
+
+    def __init__(self):
+        """Инициализация пустого ответа."""
+        super().__init__()
+        self._chunks: List[str] = []
+
+    def take(self) -> bytes:
+        """Забрать накопленный ответ в виде байтов UTF-8."""
+        data = ''.join(self._chunks).encode('utf-8')
+        self._chunks.clear()
+        return data
+
+    def flush(self) -> None:
+        """Ответ отправляет сервер, поток вывода не используется."""
+
+    def _emit(self, chunk: str) -> None:
+        """Добавить фрагмент к ответу."""
+        self._chunks.append(chunk)
+
+
+class CommandServer:
+    """
+    Сервер команд над общим контейнером.
+
+    Команды всех соединений выполняются в одном цикле событий, поэтому
+    каждая команда атомарна относительно других клиентов. После каждого
+    ответа сервер ждет освобождения буфера записи (drain): если клиент
+    не читает ответы, сервер перестает читать его команды, и давление
+    передается клиенту через управление потоком TCP. Для PRINT в момент
+    команды фиксируется список событий, а строки формируются по мере
+    отправки порциями.
+    """
+
+    def __init__(self, container: EventContainer,
+                 print_chunk_lines: int = DEFAULT_PRINT_CHUNK_LINES,
+                 metrics: Optional[Metrics] = None,
+                 snapshot_dir: Optional[str] = None):
+        """
+        Инициализация сервера.
+
+        Args:
+            container: Общий контейнер событий
+            print_chunk_lines: Число строк PRINT в одной порции записи
+            metrics: Общие метрики команд всех соединений (None - без
+                метрик)
+            snapshot_dir: Каталог снимков для команд SAVE и LOAD клиентов
+                (None - команды отклоняются)
+        """
+        self.container = container
+        self.print_chunk_lines = max(1, print_chunk_lines)
+        self.metrics = metrics
+        self.snapshot_dir = snapshot_dir
+        self.connections = 0
+
+    async def start(self, host: Optional[str] = None,
+                    port: Optional[int] = None,
+                    path: Optional[str] = None) -> asyncio.AbstractServer:
+        """
+        Начать прием соединений.
+
+        Args:
+            host: Адрес TCP
+            port: Порт TCP (0 - выбрать свободный)
+            path: Путь Unix-сокета (вместо host и port)
+
+        Returns:
+            Запущенный сервер asyncio
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(
+                self.handle, path=path, limit=MAX_LINE_LENGTH)
+        return await asyncio.start_server(
+            self.handle, host=host, port=port, limit=MAX_LINE_LENGTH)
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        """
+        Обслуживание одного соединения.
+
+        Args:
+            reader: Поток чтения команд
+            writer: Поток записи ответов
+        """
+        sink = _ConnectionSink()
+        parser = CommandParser(self.container, output=sink, metrics=self.metrics)
+        self.connections += 1
+        line_num = 0
+        try:
+            while True:
+                try:
+                    raw = await reader.readline()
+                except ValueError:
+                    sink.write("Ошибка: Слишком длинная строка команды")
+                    sink.write(RESPONSE_END)
+                    writer.write(sink.take())
+                    break
+                if not raw:
+                    break
+                line_num += 1
+                line = raw.decode('utf-8', errors='replace').strip()
+                kind = classify(line)
+                if kind == PRINT:
+                    start = time.perf_counter_ns()
+                    # Строки формируются по мере отправки; список событий
+                    # запоминается сразу, так как другие клиенты могут
+                    # изменить контейнер, пока вывод ждет освобождения
+                    # буфера записи
+                    lines = self.container.iter_print_lines(detach=True)
+                    await self._stream_lines(writer, lines)
+                    if self.metrics is not None:
+                        # Замеряется весь вывод, включая отправку клиенту
+                        self.metrics.observe(
+                            PRINT, time.perf_counter_ns() - start, 1, 0,
+                            len(self.container))
+                elif kind in (SAVE, LOAD):
+                    self._snapshot_command(parser, line_num, kind, line)
+                elif kind is not None:
+                    parser.execute_command(line_num, kind, line)
+                sink.write(RESPONSE_END)
+                writer.write(sink.take())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _snapshot_command(self, parser: CommandParser, line_num: int,
+                          kind: str, line: str) -> None:
+        """
+        Выполнить SAVE или LOAD клиента внутри каталога снимков.
+
+        Клиент указывает только имя файла: пути с каталогами отклоняются,
+        поэтому команда не может записать или прочитать файл вне
+        каталога, заданного при запуске сервера.
+
+        Args:
+            parser: Парсер соединения
+            line_num: Номер команды в соединении
+            kind: SAVE или LOAD
+            line: Строка команды
+        """
+        if self.snapshot_dir is None:
+            parser.output.write(f"Ошибка: Команда {kind} в режиме сервера "
+                                "отключена (--snapshot-dir)")
+            return
+        name = line[len(kind):].strip()
+        if (not name or name in (os.curdir, os.pardir)
+                or os.path.basename(name) != name
+                or (os.altsep is not None and os.altsep in name)):
+            parser.output.write(f"Ошибка: Недопустимое имя снимка: {name}")
+            return
+        parser.execute_command(
+            line_num, kind, f"{kind} {os.path.join(self.snapshot_dir, name)}")
+
+    async def _stream_lines(self, writer: asyncio.StreamWriter,
+                            lines: Iterable[str]) -> None:
+        """
+        Отправить строки порциями, дожидаясь освобождения буфера записи.
+
+        Args:
+            writer: Поток записи ответов
+            lines: Строки без завершающих переводов строк
+        """
+        iterator = iter(lines)
+        while True:
+            chunk = ''.join(line + '\n'
+                            for line in islice(iterator, self.print_chunk_lines))
+            if not chunk:
+                break
+            writer.write(chunk.encode('utf-8'))
+            await writer.drain()
+
+
+def run_server(container: EventContainer, output: OutputSink,
+               host: Optional[str] = None, port: Optional[int] = None,
+               path: Optional[str] = None,
+               metrics: Optional[Metrics] = None,
+               snapshot_dir: Optional[str] = None) -> None:
+    """
+    Запустить сервер и обслуживать клиентов до прерывания (Ctrl+C).
+
+    Args:
+        container: Общий контейнер событий
+        output: Приемник для сообщений о работе сервера
+        host: Адрес TCP
+        port: Порт TCP
+        path: Путь Unix-сокета (вместо host и port)
+        metrics: Общие метрики команд (None - без метрик)
+        snapshot_dir: Каталог снимков для SAVE и LOAD клиентов (None -
+            команды отклоняются)
+    """
+    async def serve() -> None:
+        server = await CommandServer(container, metrics=metrics,
+                                     snapshot_dir=snapshot_dir).start(
+            host, port, path)
+        addresses = ', '.join(str(sock.getsockname()) for sock in server.sockets)
+        output.write(f"Сервер запущен: {addresses}")
+        output.flush()
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        output.write("Сервер остановлен.")
@@ -0,0 +1,300 @@
+"""
+Модуль двоичных снимков контейнера событий.
+
+Формат (порядок байтов little-endian):
+- заголовок: сигнатура b'HEVS', версия (u16), резерв (u16),
+  число строк (u32), число событий (u32);
+- таблица интернированных строк: длины строк в байтах (u32 на строку),
+  затем байты всех строк в UTF-8 подряд; строка 0 - пустая;
+- столбцы событий: коды типов (u8 на событие), затем идентификаторы
+  строк названий, дат и специфичных параметров (u32 на событие).
+
+Снимок читается целиком через отображение файла в память: столбцы
+копируются в массивы одной операцией, без разбора команд ADD.
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from typing import IO, Any, Iterator, List, Tuple
+from historical_event import HistoricalEvent
+from container import EventContainer
+from columnar_container import (
+    ColumnarEventContainer, StringTable, EVENT_CLASSES, TYPE_CODES,
+    BATTLE_CODE, TREATY_CODE)
+
+SNAPSHOT_MAGIC = b'HEVS'
+SNAPSHOT_VERSION = 1
+
+_HEADER = struct.Struct('<4sHHII')
+
+# Столбцы снимка: (коды типов, названия, даты, параметры)
+Columns = Tuple[array, array, array, array]
+
+
+@contextmanager
+def atomic_write(filename: str, mode: str = 'wb', **options: Any) -> Iterator[IO]:
+    """
+    Открыть временный файл, который после записи заменит целевой.
+
+    Данные сбрасываются на диск (fsync) до атомарной замены, поэтому
+    после сбоя на месте файла остается либо прежняя, либо новая полная
+    версия. При ошибке записи временный файл удаляется.
+
+    Args:
+        filename: Имя целевого файла
+        mode: Режим открытия на запись ('wb' или 'w')
+        **options: Дополнительные параметры open (например, encoding)
+
+    Yields:
+        Открытый временный файл
+
+    Raises:
+        OSError: Если файл не удалось записать
+    """
+    temp_name = f"{filename}.tmp"
+    try:
+        with open(temp_name, mode, **options) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_name, filename)
+    except BaseException:
+        try:
+            os.remove(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+def _columns_of(container: EventContainer) -> Tuple[List[str], Columns]:
+    """
+    Таблица строк и столбцы событий контейнера.
+
+    Колоночный контейнер отдает свои столбцы без материализации событий;
+    для контейнера объектов строки интернируются заново.
+
+    Args:
+        container: Контейнер событий
+
+    Returns:
+        Пара (строки таблицы, столбцы)
+    """
+    if isinstance(container, ColumnarEventContainer):
+        # pylint: disable=protected-access
+        if container._tombstones():
+            container._compact()
+        return container._strings._values, (
+            container._type_codes, container._name_ids,
+            container._date_ids, container._param_ids)
+
+    strings = StringTable()
+    type_codes, name_ids = array('B'), array('I')
+    date_ids, param_ids = array('I'), array('I')
+    # Список событий берется целиком: у потокобезопасного контейнера это
+    # согласованная опубликованная версия
+    for event in container._events:  # pylint: disable=protected-access
+        type_code = TYPE_CODES.get(type(event))
+        if type_code is None:
+            raise TypeError(
+                f"Неподдерживаемый тип события: {type(event).__name__}")
+        if type_code == BATTLE_CODE:
+            param = event.place  # type: ignore[attr-defined]
+        elif type_code == TREATY_CODE:
+            param = event.parties  # type: ignore[attr-defined]
+        else:
+            param = ""
+        type_codes.append(type_code)
+        name_ids.append(strings.intern(event.name))
+        date_ids.append(strings.intern(event.date))
+        param_ids.append(strings.intern(param))
+    return strings._values, (  # pylint: disable=protected-access
+        type_codes, name_ids, date_ids, param_ids)
+
+
+def _little_endian(column: array) -> bytes:
+    """Байты столбца в порядке little-endian."""
+    if sys.byteorder == 'little' or column.itemsize == 1:
+        return column.tobytes()
+    swapped = array(column.typecode, column)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def save_snapshot(container: EventContainer, filename: str) -> int:
+    """
+    Сохранить контейнер в двоичный снимок.
+
+    Файл записывается во временный файл рядом, сбрасывается на диск и
+    затем атомарно заменяет целевой (atomic_write), поэтому прерванная
+    запись не портит прежний снимок.
+
+    Args:
+        container: Контейнер событий
+        filename: Имя файла снимка
+
+    Returns:
+        Количество сохраненных событий
+
+    Raises:
+        TypeError: Если в контейнере есть событие неподдерживаемого типа
+        OSError: Если файл не удалось записать
+    """
+    strings, columns = _columns_of(container)
+    encoded = [value.encode('utf-8') for value in strings]
+    lengths = array('I', map(len, encoded))
+    count = len(columns[0])
+
+    with atomic_write(filename) as f:
+        f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0,
+                             len(encoded), count))
+        f.write(_little_endian(lengths))
+        f.write(b''.join(encoded))
+        for column in columns:
+            f.write(_little_endian(column))
+    return count
+
+
+def _read_column(view: memoryview, offset: int, typecode: str,
+                 count: int) -> Tuple[array, int]:
+    """
+    Прочитать столбец из отображения файла.
+
+    Args:
+        view: Отображение файла
+        offset: Смещение начала столбца
+        typecode: Код типа элементов массива
+        count: Число элементов
+
+    Returns:
+        Пара (массив, смещение за концом столбца)
+
+    Raises:
+        ValueError: Если файл обрывается раньше конца столбца
+    """
+    column = array(typecode)
+    end = offset + column.itemsize * count
+    if end > len(view):
+        raise ValueError("Снимок поврежден: файл обрывается")
+    column.frombytes(view[offset:end])
+    if sys.byteorder != 'little' and column.itemsize > 1:
+        column.byteswap()
+    return column, end
+
+
+def read_snapshot(filename: str) -> Tuple[List[str], Columns]:
+    """
+    Прочитать снимок: таблицу строк и столбцы событий.
+
+    Args:
+        filename: Имя файла снимка
+
+    Returns:
+        Пара (строки таблицы, столбцы)
+
+    Raises:
+        ValueError: Если файл не является снимком, его версия не
+            поддерживается или он поврежден
+        OSError: Если файл не удалось прочитать
+    """
+    with open(filename, 'rb') as f:
+        if f.seek(0, 2) < _HEADER.size:
+            raise ValueError(f"Файл не является снимком контейнера: {filename}")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            view = memoryview(buffer)
+            try:
+                return _parse_snapshot(view, filename)
+            finally:
+                view.release()
+
+
+def _parse_snapshot(view: memoryview, filename: str) -> Tuple[List[str], Columns]:
+    """
+    Разбор отображенного в память снимка.
+
+    Args:
+        view: Отображение файла
+        filename: Имя файла (для сообщений об ошибках)
+
+    Returns:
+        Пара (строки таблицы, столбцы)
+
+    Raises:
+        ValueError: Если данные не являются корректным снимком
+    """
+    magic, version, _, string_count, count = _HEADER.unpack_from(view)
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"Файл не является снимком контейнера: {filename}")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Неподдерживаемая версия снимка: {version}")
+
+    lengths, offset = _read_column(view, _HEADER.size, 'I', string_count)
+    if offset + sum(lengths) > len(view):
+        raise ValueError("Снимок поврежден: файл обрывается")
+    strings = []
+    for length in lengths:
+        strings.append(str(view[offset:offset + length], 'utf-8'))
+        offset += length
+
+    type_codes, offset = _read_column(view, offset, 'B', count)
+    name_ids, offset = _read_column(view, offset, 'I', count)
+    date_ids, offset = _read_column(view, offset, 'I', count)
+    param_ids, offset = _read_column(view, offset, 'I', count)
+    if count and (max(type_codes) >= len(EVENT_CLASSES)
+                  or max(max(name_ids), max(date_ids),
+                         max(param_ids)) >= len(strings)):
+        raise ValueError("Снимок поврежден: неверные коды или строки")
+    return strings, (type_codes, name_ids, date_ids, param_ids)
+
+
+def load_snapshot(container: EventContainer, filename: str) -> int:
+    """
+    Заменить содержимое контейнера содержимым снимка.
+
+    Колоночный контейнер получает столбцы напрямую; контейнер объектов
+    получает все события одним пакетом add_many, индексы строятся
+    пакетно, без add на каждое событие.
+
+    Args:
+        container: Контейнер событий
+        filename: Имя файла снимка
+
+    Returns:
+        Количество загруженных событий
+
+    Raises:
+        ValueError: Если файл не является корректным снимком
+        OSError: Если файл не удалось прочитать
+    """
+    strings, columns = read_snapshot(filename)
+    container.clear()
+    if isinstance(container, ColumnarEventContainer):
+        container.restore_columns(strings, *columns)
+    else:
+        container.add_many(_materialize(strings, columns))
+    return len(columns[0])
+
+
+def _materialize(strings: List[str], columns: Columns) -> List[HistoricalEvent]:
+    """
+    Создать объекты событий из столбцов снимка.
+
+    Args:
+        strings: Строки таблицы
+        columns: Столбцы событий
+
+    Returns:
+        События в порядке снимка
+    """
+    events: List[HistoricalEvent] = []
+    for type_code, name_id, date_id, param_id in zip(*columns):
+        cls = EVENT_CLASSES[type_code]
+        if type_code in (BATTLE_CODE, TREATY_CODE):
+            events.append(cls(strings[name_id], strings[date_id],  # type: ignore[call-arg]
+                              strings[param_id]))
+        else:
+            events.append(cls(strings[name_id], strings[date_id]))
+    return events
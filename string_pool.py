@@ -0,0 +1,94 @@
+"""
+Модуль пула интернированных строк контейнера событий.
+
+Значения вроде мест битв, сторон договоров и дат повторяются в
+миллионах событий, но каждая команда ADD создает для них новые строки.
+Пул хранит по одному экземпляру каждого значения и счетчик ссылок на
+него: события получают общий экземпляр при добавлении, а при удалении
+последнего события со значением строка уходит из пула и освобождается.
+"""
+
+import sys
+from typing import Dict
+
+
+class StringPool:
+    """Пул строк со счетчиками ссылок."""
+
+    def __init__(self):
+        """Инициализация пустого пула."""
+        # Общий экземпляр строки по равному значению и число ссылок на него
+        self._strings: Dict[str, str] = {}
+        self._refs: Dict[str, int] = {}
+        self.reclaimed = 0
+
+    def __len__(self) -> int:
+        """Количество различных строк в пуле."""
+        return len(self._strings)
+
+    def intern(self, value: str) -> str:
+        """
+        Получить общий экземпляр строки и учесть ссылку на него.
+
+        Args:
+            value: Строка
+
+        Returns:
+            Строка из пула, равная value (value, если ее не было в пуле)
+        """
+        canonical = self._strings.get(value)
+        if canonical is None:
+            self._strings[value] = value
+            self._refs[value] = 1
+            return value
+        self._refs[canonical] += 1
+        return canonical
+
+    def release(self, value: str) -> None:
+        """
+        Снять ссылку на строку; строка без ссылок удаляется из пула.
+
+        Args:
+            value: Строка, полученная из intern
+        """
+        refs = self._refs.get(value)
+        if refs is None:
+            return
+        if refs > 1:
+            self._refs[value] = refs - 1
+        else:
+            del self._refs[value]
+            del self._strings[value]
+            self.reclaimed += 1
+
+    def refs(self, value: str) -> int:
+        """Число ссылок на строку (0, если ее нет в пуле)."""
+        return self._refs.get(value, 0)
+
+    def clear(self) -> None:
+        """Очистить пул."""
+        self._strings.clear()
+        self._refs.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Статистика пула.
+
+        Сэкономленная память - размер строк, которые без пула хранились
+        бы отдельными копиями: (ссылки - 1) * размер строки по всем
+        строкам пула; затраты пула - размер его словарей.
+
+        Returns:
+            Словарь с ключами strings, references, string_bytes,
+            saved_bytes, pool_bytes, reclaimed
+        """
+        refs = self._refs
+        return {
+            'strings': len(refs),
+            'references': sum(refs.values()),
+            'string_bytes': sum(map(sys.getsizeof, refs)),
+            'saved_bytes': sum((count - 1) * sys.getsizeof(value)
+                               for value, count in refs.items()),
+            'pool_bytes': sys.getsizeof(self._strings) + sys.getsizeof(refs),
+            'reclaimed': self.reclaimed,
+        }
@@ -0,0 +1,174 @@
+"""
+Модульные тесты для контрольных точек и возобновления обработки.
+"""
+
+import pytest
+from checkpoint import Checkpointer, read_checkpoint
+from command_parser import CommandParser
+from container import EventContainer
+
+COMMANDS = """ADD Битва|Битва 1|1000|Место 1
+ADD Битва|Битва 2|1100|Место 2
+# комментарий
+ADD Договор|Договор 1|900|Стороны 1
+REM date < "950"
+ADD Битва|Битва 3|1200|Место 3
+PRINT
+ADD Битва|Битва 4|1300|Место 4
+REM name contains "2"
+ADD Договор|Договор 2|1400|Стороны 2
+"""
+
+
+class CrashingContainer(EventContainer):
+    """Контейнер, аварийно завершающий обработку на заданном пакете ADD."""
+
+    def __init__(self, crash_on: int):
+        """Инициализация с номером пакета, на котором происходит сбой."""
+        super().__init__()
+        self.crash_on = crash_on
+
+    def add_many(self, events):
+        """Добавить пакет событий или завершиться сбоем на заданном пакете."""
+        self.crash_on -= 1
+        if self.crash_on == 0:
+            raise RuntimeError("авария")
+        super().add_many(events)
+
+
+class RecordingCheckpointer(Checkpointer):
+    """Checkpointer, запоминающий номера строк сохраненных точек."""
+
+    def __init__(self, *args, **kwargs):
+        """Инициализация с пустым списком точек."""
+        super().__init__(*args, **kwargs)
+        self.lines = []
+
+    def save(self, container, filename, position):
+        """Сохранить точку и запомнить ее строку."""
+        super().save(container, filename, position)
+        self.lines.append(position[1])
+
+
+def _interleaved(groups):
+    """Команды группами по три ADD и одной REM."""
+    lines = []
+    for i in range(groups):
+        lines.extend(f"ADD Битва|Битва {i}-{j}|{1000 + j}|Место {i}"
+                     for j in range(3))
+        lines.append(f'REM name == "Битва {i}-1"')
+    return '\n'.join(lines) + '\n'
+
+
+def _names(container):
+    """Названия событий контейнера по порядку."""
+    return [event.name for event in container._events]
+
+
+class TestCheckpoint:
+    """Тесты контрольных точек."""
+
+    @pytest.fixture
+    def commands_file(self, tmp_path):
+        """Файл команд с ADD, REM, PRINT и комментарием."""
+        path = tmp_path / "commands.txt"
+        path.write_text(COMMANDS, encoding='utf-8')
+        return str(path)
+
+    def test_due_by_lines(self, tmp_path):
+        """Тест интервала контрольных точек в строках."""
+        checkpointer = Checkpointer(str(tmp_path / "ck.json"), every_lines=3)
+        checkpointer.start((0, 2))
+        assert not checkpointer.due((10, 4))
+        assert checkpointer.due((20, 5))
+
+    def test_checkpoints_saved(self, commands_file, tmp_path):
+        """Тест сохранения точки и удаления устаревших снимков."""
+        path = str(tmp_path / "ck.json")
+        checkpointer = Checkpointer(path, every_lines=2)
+        parser = CommandParser(EventContainer(), add_batch_size=1,
+                               checkpointer=checkpointer)
+        parser.process_file(commands_file)
+        state = read_checkpoint(path)
+        assert checkpointer.saved > 1
+        assert state['line'] == 10
+        assert state['offset'] == len(COMMANDS.encode('utf-8'))
+        assert list(tmp_path.glob("ck.json.*.snap")) == [
+            tmp_path / f"ck.json.{state['line']}.snap"]
+
+    @pytest.mark.parametrize("crash_on", [2, 4, 6])
+    def test_resume_after_crash(self, commands_file, tmp_path, capsys,
+                                crash_on):
+        """Тест возобновления после аварии: итог как при полной обработке."""
+        reference = CommandParser(EventContainer(), add_batch_size=1)
+        reference.process_file(commands_file)
+
+        path = str(tmp_path / "ck.json")
+        parser = CommandParser(CrashingContainer(crash_on), add_batch_size=1,
+                               checkpointer=Checkpointer(path, every_lines=1))
+        with pytest.raises(RuntimeError):
+            parser.process_file(commands_file)
+        line = read_checkpoint(path)['line']
+        capsys.readouterr()
+
+        resumed = CommandParser(EventContainer(), add_batch_size=1,
+                                checkpointer=Checkpointer(path, every_lines=1))
+        resumed.process_file(commands_file, resume=True)
+        output = capsys.readouterr().out
+        assert f"Возобновление со строки {line + 1}" in output
+        assert _names(resumed.container) == _names(reference.container)
+
+    def test_resume_other_file(self, commands_file, tmp_path, capsys):
+        """Тест отказа возобновлять обработку другого файла."""
+        path = str(tmp_path / "ck.json")
+        CommandParser(EventContainer(), checkpointer=Checkpointer(
+            path, every_lines=1)).process_file(commands_file)
+        other = tmp_path / "other.txt"
+        other.write_text(COMMANDS, encoding='utf-8')
+
+        parser = CommandParser(EventContainer(),
+                               checkpointer=Checkpointer(path))
+        parser.process_file(str(other), resume=True)
+        assert "другому файлу" in capsys.readouterr().out
+        assert len(parser.container) == 0
+
+    def test_resume_without_checkpoint(self, commands_file, capsys, tmp_path):
+        """Тест возобновления без сохраненной точки - обработка с начала."""
+        parser = CommandParser(EventContainer(), checkpointer=Checkpointer(
+            str(tmp_path / "ck.json")))
+        parser.process_file(commands_file, resume=True)
+        assert "Возобновление" not in capsys.readouterr().out
+        assert _names(parser.container) == [
+            "Битва 1", "Битва 3", "Битва 4", "Договор 2"]
+
+    def test_interleaved_add_rem(self, tmp_path, capsys):
+        """Тест точек на границах серий ADD и REM и возобновления с середины."""
+        commands = tmp_path / "interleaved.txt"
+        commands.write_text(_interleaved(50), encoding='utf-8')
+        reference = CommandParser(EventContainer())
+        reference.process_file(str(commands))
+
+        # Точка сохраняется на каждом интервале, а не только в конце файла
+        path = str(tmp_path / "ck.json")
+        checkpointer = RecordingCheckpointer(path, every_lines=20)
+        CommandParser(EventContainer(), checkpointer=checkpointer).process_file(
+            str(commands))
+        assert len(checkpointer.lines) >= 8
+        assert checkpointer.lines[-1] == 200
+        gaps = [b - a for a, b in zip([0] + checkpointer.lines, checkpointer.lines)]
+        assert all(20 <= gap < 24 for gap in gaps)
+
+        # Авария на 30-м пакете ADD и возобновление с последней точки
+        parser = CommandParser(CrashingContainer(30),
+                               checkpointer=Checkpointer(path, every_lines=20))
+        with pytest.raises(RuntimeError):
+            parser.process_file(str(commands))
+        line = read_checkpoint(path)['line']
+        assert 0 < line < 200
+        capsys.readouterr()
+
+        resumed = CommandParser(EventContainer(),
+                                checkpointer=Checkpointer(path, every_lines=20))
+        resumed.process_file(str(commands), resume=True)
+        assert f"Возобновление со строки {line + 1}" in capsys.readouterr().out
+        assert _names(resumed.container) == _names(reference.container)
@@ -0,0 +1,162 @@
+"""
+Модульные тесты для класса ColumnarEventContainer.
+"""
+
+import pytest
+from columnar_container import ColumnarEventContainer, StringTable
+from container import EventContainer
+from conditions import FieldEquals, NameContains, DateCompare
+from historical_event import HistoricalEvent, Battle, Treaty
+
+
+def _fill(container):
+    """Заполнить контейнер одинаковым набором событий."""
+    container.add(Battle("Куликовская битва", "1380", "Куликово поле"))
+    container.add(Battle("Бородинское сражение", "1812", "Бородино"))
+    container.add(Treaty("Версальский договор", "1919", "Германия и союзники"))
+    container.add(Treaty("Брестский мир", "1918", "Бородино"))
+    container.add(HistoricalEvent("Крещение Руси", "988"))
+
+
+class TestStringTable:
+    """Тесты для класса StringTable."""
+
+    def test_intern(self):
+        """Тест повторного интернирования строки."""
+        table = StringTable()
+        first = table.intern("1380")
+        assert table.intern("1380") == first
+        assert table[first] == "1380"
+        assert table.lookup("1812") == -1
+
+    def test_sweep(self):
+        """Тест удаления строк без ссылок и перенумерации остальных."""
+        table = StringTable()
+        ids = [table.intern(value) for value in ("a", "b", "c")]
+        remap = table.sweep({ids[0], ids[2]})
+        assert len(table) == 3
+        assert table[remap[ids[2]]] == "c"
+        assert table.lookup("c") == remap[ids[2]]
+        assert table.lookup("b") == -1
+        assert table.reclaimed == 1
+
+
+class TestColumnarEventContainer:
+    """Тесты для класса ColumnarEventContainer."""
+
+    def test_add_and_materialize(self):
+        """Тест материализации событий из столбцов."""
+        container = ColumnarEventContainer()
+        _fill(container)
+        events = container._events
+        assert len(container) == 5
+        assert isinstance(events[0], Battle)
+        assert events[0].place == "Куликово поле"
+        assert isinstance(events[2], Treaty)
+        assert type(events[4]) is HistoricalEvent
+
+    def test_unsupported_type(self):
+        """Тест добавления события неизвестного класса."""
+        class Uprising(HistoricalEvent):
+            """Восстание."""
+
+        container = ColumnarEventContainer()
+        with pytest.raises(TypeError):
+            container.add(Uprising("Восстание", "1825"))
+
+    @pytest.mark.parametrize("condition", [
+        FieldEquals("type", "Битва"),
+        FieldEquals("name", "Брестский мир"),
+        FieldEquals("date", "1812"),
+        FieldEquals("place", "Бородино"),
+        FieldEquals("parties", "Бородино"),
+        FieldEquals("name", "Нет такого"),
+        NameContains("ск"),
+        NameContains("договор"),
+        DateCompare("<", "1500"),
+        DateCompare(">", "1900"),
+        lambda e: e.date.startswith("19"),
+    ])
+    def test_remove_matches_object_container(self, condition):
+        """Тест совпадения результатов с объектным контейнером."""
+        columnar = ColumnarEventContainer()
+        objects = EventContainer()
+        _fill(columnar)
+        _fill(objects)
+
+        assert columnar.remove(condition) == objects.remove(condition)
+        assert [repr(e) for e in columnar._events] == \
+            [repr(e) for e in objects._events]
+
+    def test_parallel_remove_matches_serial(self):
+        """Тест проверки условий REM в пуле процессов с удаленными строками."""
+        conditions = [
+            FieldEquals("type", "Битва"), FieldEquals("date", "1812"),
+            FieldEquals("parties", "Бородино"), FieldEquals("name", "Нет такого"),
+            NameContains("ск"), DateCompare("<", "1900"),
+        ]
+        for condition in conditions:
+            parallel = ColumnarEventContainer(scan_workers=2, parallel_threshold=0)
+            serial = ColumnarEventContainer()
+            try:
+                for container in (parallel, serial):
+                    _fill(container)
+                    _fill(container)
+                    # Удаленные строки не попадают в маску
+                    container.remove(FieldEquals("name", "Бородинское сражение"))
+                assert parallel._scan(condition) == serial._scan(condition)
+                assert parallel.remove(condition) == serial.remove(condition)
+                assert list(map(repr, parallel._events)) == \
+                    list(map(repr, serial._events))
+            finally:
+                parallel.close()
+
+    def test_compaction(self):
+        """Тест сжатия столбцов после массового удаления."""
+        container = ColumnarEventContainer()
+        for i in range(3000):
+            container.add(Battle(f"Битва {i}", str(1000 + i % 10), "Место"))
+        assert container.remove(DateCompare("<", "1009")) == 2700
+        assert len(container._type_codes) == 300
+        assert container.remove(FieldEquals("date", "1009")) == 300
+        assert len(container) == 0
+
+    def test_compaction_sweeps_strings(self):
+        """Тест освобождения строк удаленных событий при сжатии."""
+        container = ColumnarEventContainer()
+        for i in range(3000):
+            container.add(Battle(f"Битва {i}", str(1000 + i % 10), f"Место {i % 10}"))
+        assert container.remove(DateCompare("<", "1009")) == 2700
+        assert container.intern_stats()['strings'] == 302
+        assert container.intern_stats()['references'] == 900
+        assert set(container._date_keys.values()) == {(0, 1009, '')}
+        assert container.remove(FieldEquals("place", "Место 9")) == 300
+        container.add(Battle("Битва", "1009", "Место 9"))
+        assert [repr(e) for e in container._events] == [
+            "Battle(name='Битва', date='1009', place='Место 9')"]
+
+    def test_print_all(self, capsys):
+        """Тест вывода событий на экран."""
+        container = ColumnarEventContainer()
+        _fill(container)
+        container.print_all()
+        captured = capsys.readouterr()
+        assert "Всего событий в контейнере: 5" in captured.out
+        assert "1. Битва: Куликовская битва" in captured.out
+
+    @pytest.mark.parametrize("condition", [
+        FieldEquals("type", "Договор"),
+        FieldEquals("place", "Бородино"),
+        NameContains("бит"),
+        DateCompare(">", "1000"),
+        DateCompare("<", "1900"),
+    ])
+    def test_find_matches_object_container(self, condition):
+        """Тест совпадения поиска и подсчета с контейнером объектов."""
+        columnar = ColumnarEventContainer()
+        objects = EventContainer()
+        _fill(columnar)
+        _fill(objects)
+        assert (list(map(str, columnar.find(condition, offset=1, limit=2)))
+                == list(map(str, objects.find(condition, offset=1, limit=2))))
+        assert columnar.count(condition) == objects.count(condition)
@@ -2,12 +2,16 @@
 Модульные тесты для класса CommandParser.
 """
 
+import io
+import json
 import pytest
 import tempfile
 import os
-from command_parser import CommandParser
+from command_parser import CommandParser, normalize_condition, parse_pagination
 from container import EventContainer
 from historical_event import Battle, Treaty
+from metrics import Metrics
+from output import OutputSink, WRITE_CHUNK_LINES
 
 
 class TestCommandParser:
@@ -305,3 +309,294 @@ PRINT
         captured = capsys.readouterr()
         assert "Неизвестная команда" in captured.out
 
+    def test_condition_cache(self, parser):
+        """Тест кеширования разобранных условий."""
+        first = parser._parse_condition('date == "1000"')
+        second = parser._parse_condition('  date   ==  "1000" ')
+        assert first is second
+        info = parser.condition_cache_info()
+        assert info['hits'] == 1
+        assert info['misses'] == 1
+        assert info['size'] == 1
+
+    def test_condition_cache_bounded(self, container):
+        """Тест вытеснения давно не использованных условий."""
+        parser = CommandParser(container, condition_cache_size=2)
+        parser._parse_condition('date == "1"')
+        parser._parse_condition('date == "2"')
+        parser._parse_condition('date == "1"')
+        parser._parse_condition('date == "3"')
+        assert parser.condition_cache_info()['size'] == 2
+        parser._parse_condition('date == "1"')
+        assert parser.cache_hits == 2
+        parser._parse_condition('date == "2"')
+        assert parser.cache_misses == 4
+
+    def test_normalize_condition_keeps_quoted_spaces(self):
+        """Тест нормализации условия без изменения значения в кавычках."""
+        assert normalize_condition(' name  ==   "Куликово  поле" ') == \
+            'name == "Куликово  поле"'
+
+    def test_parse_add_commands_batch(self, parser, capsys):
+        """Тест пакетной обработки команд ADD с ошибкой в середине."""
+        added = parser.parse_add_commands([
+            "ADD Битва|Битва 1|1000|Место 1",
+            "ADD Неизвестный|Название|Дата|Параметр",
+            "ADD Договор|Договор 1|2000|Стороны 1",
+        ])
+        assert added == 2
+        assert len(parser.container) == 2
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0].startswith("Добавлено событие: Битва: Битва 1")
+        assert lines[1] == "Ошибка: Неизвестный тип события: Неизвестный"
+        assert lines[2].startswith("Добавлено событие: Договор: Договор 1")
+
+    @pytest.mark.parametrize("batch_size", [1, 2, 1000])
+    def test_process_file_batch_sizes(self, container, tmp_path, capsys,
+                                      batch_size):
+        """Тест одинакового вывода при разных размерах пакета ADD."""
+        test_file = tmp_path / "test_commands.txt"
+        test_file.write_text("""ADD Битва|Битва 1|1000|Место 1
+ADD Битва|Битва 2|1100|Место 2
+ADD Договор|Договор 1|900|Стороны 1
+PRINT
+REM date < "1050"
+ADD Битва|Битва 3|1200|Место 3
+PRINT
+""", encoding='utf-8')
+        CommandParser(EventContainer()).process_file(str(test_file))
+        expected = capsys.readouterr().out
+
+        parser = CommandParser(container, add_batch_size=batch_size)
+        parser.process_file(str(test_file))
+        assert capsys.readouterr().out == expected
+        assert [e.name for e in container._events] == ["Битва 2", "Битва 3"]
+
+    def test_parse_rem_commands_series(self, capsys):
+        """Тест серии REM с ошибкой: счетчики и сообщения по порядку."""
+        parser = CommandParser(EventContainer(indexed=False))
+        parser.parse_add_commands([
+            "ADD Битва|Битва 1|1841|Место 1",
+            "ADD Битва|Битва 2|1942|Место 2",
+            "ADD Договор|Договор 1|1841|Стороны 1",
+        ])
+        capsys.readouterr()
+
+        parser.parse_rem_commands([
+            'REM date == "1841"',
+            'REM invalid condition',
+            'REM name contains "2"',
+            'REM type == "Битва"',
+        ])
+        assert capsys.readouterr().out.splitlines() == [
+            "Удалено событий: 2",
+            "Ошибка при удалении событий: "
+            "Неизвестный формат условия: invalid condition",
+            "Удалено событий: 1",
+            "Удалено событий: 0",
+        ]
+        assert len(parser.container) == 0
+
+    def test_parse_rem_commands_sequential_error(self, capsys):
+        """Тест серии REM без общего прохода: ошибка не повторяет удаления."""
+
+        class FailingContainer(EventContainer):
+            """Контейнер, завершающий ошибкой удаление по месту."""
+
+            def remove(self, condition):
+                """Удалить события; условие по месту вызывает ошибку."""
+                if getattr(condition, 'field', None) == 'place':
+                    raise AttributeError("сбой удаления")
+                return super().remove(condition)
+
+        parser = CommandParser(FailingContainer())
+        parser.parse_add_commands([
+            "ADD Битва|Битва 1|1841|Место 1",
+            "ADD Битва|Битва 2|1942|Место 2",
+        ])
+        capsys.readouterr()
+
+        errors = parser.parse_rem_commands([
+            'REM date == "1841"',
+            'REM place == "Место 2"',
+            'REM name == "Битва 2"',
+        ])
+        assert errors == 1
+        assert capsys.readouterr().out.splitlines() == [
+            "Удалено событий: 1",
+            "Ошибка при удалении событий: сбой удаления",
+            "Удалено событий: 1",
+        ]
+        assert len(parser.container) == 0
+
+    def test_process_file_parallel_matches_sequential(self, tmp_path, capsys):
+        """Тест совпадения вывода при разборе ADD в пуле процессов."""
+        test_file = tmp_path / "test_commands.txt"
+        test_file.write_text("""ADD Битва|Битва 1|1000|Место 1
+ADD Неизвестный|Название|Дата|Параметр
+ADD Договор|Договор 1|900|Стороны 1
+ADD Битва|Неполная
+PRINT
+REM date < "950"
+REM name contains "1"
+ADD Битва|Битва 2|1200|Место 2
+UNKNOWN
+ADD Договор|Договор 2|1300|Стороны 2
+ADD Битва|Битва 3|1400|Место 3
+PRINT
+""", encoding='utf-8')
+        CommandParser(EventContainer()).process_file(str(test_file))
+        expected = capsys.readouterr().out
+
+        parser = CommandParser(EventContainer(), add_batch_size=2, workers=2)
+        parser.process_file(str(test_file))
+        assert capsys.readouterr().out == expected
+        assert [e.name for e in parser.container._events] == [
+            "Битва 2", "Договор 2", "Битва 3"]
+
+    def test_save_and_load_commands(self, tmp_path, capsys):
+        """Тест команд SAVE и LOAD в файле команд."""
+        snapshot_file = tmp_path / "state.snap"
+        test_file = tmp_path / "test_commands.txt"
+        test_file.write_text(f"""ADD Битва|Битва 1|1000|Место 1
+ADD Договор|Договор 1|900|Стороны 1
+SAVE {snapshot_file}
+REM type == "Битва"
+LOAD {snapshot_file}
+LOAD {tmp_path / "нет.snap"}
+PRINT
+""", encoding='utf-8')
+        parser = CommandParser(EventContainer())
+        parser.process_file(str(test_file))
+        output = capsys.readouterr().out
+        assert f"Снимок сохранен: {snapshot_file} (событий: 2)" in output
+        assert f"Снимок загружен: {snapshot_file} (событий: 2)" in output
+        assert "Ошибка при загрузке снимка:" in output
+        assert [e.name for e in parser.container._events] == [
+            "Битва 1", "Договор 1"]
+
+    def test_find_and_count_commands(self, tmp_path, capsys):
+        """Тест команд FIND и COUNT в файле команд."""
+        test_file = tmp_path / "test_commands.txt"
+        test_file.write_text("""ADD Битва|Битва 1|1000|Место 1
+ADD Договор|Договор 1|900|Стороны 1
+ADD Битва|Битва 2|1100|Место 2
+FIND type == "Битва" LIMIT 1 OFFSET 1
+FIND date < "1050"
+COUNT type == "Битва"
+FIND type == "Битва" LIMIT -1
+COUNT неверное условие
+""", encoding='utf-8')
+        parser = CommandParser(EventContainer())
+        parser.process_file(str(test_file))
+        output = capsys.readouterr().out
+        assert ("2. Битва: Битва 2, Дата: 1100, Место: Место 2\n"
+                "Найдено событий: 1\n") in output
+        assert ("1. Договор: Договор 1, Дата: 900, Стороны: Стороны 1\n"
+                "2. Битва: Битва 1, Дата: 1000, Место: Место 1\n"
+                "Найдено событий: 2\n") in output
+        assert "Количество событий: 2" in output
+        assert "Ошибка при поиске событий: Неверное значение LIMIT: -1" in output
+        assert "Ошибка при подсчете событий:" in output
+        assert len(parser.container) == 3
+
+    def test_find_streams_output(self):
+        """Тест вывода результата FIND порциями по мере поиска."""
+        writes = []
+
+        class RecordingStream(io.StringIO):
+            """Поток, запоминающий каждую запись."""
+
+            def write(self, text):
+                writes.append(text)
+                return super().write(text)
+
+        container = EventContainer()
+        total = 2 * WRITE_CHUNK_LINES + 1
+        container.add_many([Battle(f"Битва {i}", "1000", "Место")
+                            for i in range(total)])
+        stream = RecordingStream()
+        parser = CommandParser(container, output=OutputSink(stream))
+        assert parser.parse_find_command('FIND type == "Битва"')
+
+        # Три порции строк и итоговая строка
+        assert len(writes) == 4
+        assert all(chunk.count('\n') <= WRITE_CHUNK_LINES for chunk in writes)
+        lines = stream.getvalue().splitlines()
+        assert lines[0] == "1. Битва: Битва 0, Дата: 1000, Место: Место"
+        assert lines[-1] == f"Найдено событий: {total}"
+        assert len(lines) == total + 1
+
+    @pytest.mark.parametrize("query, expected", [
+        ('type == "Битва"', ('type == "Битва"', 0, None)),
+        ('type == "Битва" LIMIT 5', ('type == "Битва"', 0, 5)),
+        ('type == "Битва" OFFSET 3 LIMIT 5', ('type == "Битва"', 3, 5)),
+        ('name == "a LIMIT 5"', ('name == "a LIMIT 5"', 0, None)),
+    ])
+    def test_parse_pagination(self, query, expected):
+        """Тест разбора предложений LIMIT и OFFSET."""
+        assert parse_pagination(query) == expected
+
+    def test_parse_pagination_repeated(self):
+        """Тест повторного предложения LIMIT."""
+        with pytest.raises(ValueError):
+            parse_pagination('type == "Битва" LIMIT 1 LIMIT 2')
+
+    def test_compound_conditions_and_explain(self, tmp_path, capsys):
+        """Тест составных условий REM и команды EXPLAIN."""
+        test_file = tmp_path / "test_commands.txt"
+        test_file.write_text("""ADD Битва|Битва 1|1000|Место 1
+ADD Договор|Договор 1|900|Стороны 1
+ADD Битва|Битва 2|1100|Место 2
+EXPLAIN type == "Битва" AND date < "1050"
+REM type == "Битва" AND date < "1050"
+REM (place == "Место 2" OR parties == "Стороны 1") AND NOT date > "1000"
+EXPLAIN type == "Битва" AND
+""", encoding='utf-8')
+        parser = CommandParser(EventContainer())
+        parser.process_file(str(test_file))
+        output = capsys.readouterr().out
+        assert ('План запроса: (type == "Битва" AND date < "1050")\n'
+                'Пересечение (оценка: 2)\n'
+                '  Хеш-индекс: type == "Битва" (оценка: 2)\n'
+                '  Остаточное условие: date < "1050"\n') in output
+        assert "Удалено событий: 1\nУдалено событий: 1\n" in output
+        assert "Ошибка при построении плана: Неизвестный формат условия" in output
+        assert [e.name for e in parser.container._events] == ["Битва 2"]
+
+    def test_stats_command(self, tmp_path, capsys):
+        """Тест метрик команд и команды STATS."""
+        test_file = tmp_path / "test_commands.txt"
+        test_file.write_text("""ADD Битва|Битва 1|1000|Место 1
+ADD Битва|Битва 2|1100|Место 2
+ADD Неизвестно|x|1|y
+REM name == "Битва 1"
+REM name ==
+COUNT type == "Битва"
+UNKNOWN
+STATS
+""", encoding='utf-8')
+        parser = CommandParser(EventContainer(), metrics=Metrics())
+        parser.process_file(str(test_file))
+        output = capsys.readouterr().out
+        stats = json.loads(output[output.index('{'):])
+        commands = stats['commands']
+        assert (commands['ADD']['count'], commands['ADD']['errors']) == (3, 1)
+        assert (commands['REM']['count'], commands['REM']['errors']) == (2, 1)
+        assert (commands['COUNT']['count'], commands['COUNT']['errors']) == (1, 0)
+        assert commands['UNKNOWN']['errors'] == 1
+        assert stats['container']['size'] == 1
+        assert stats['container']['max_size'] == 2
+        assert stats['string_pool']['strings'] == 2
+        assert stats['string_pool']['reclaimed'] == 2
+
+    def test_stats_command_disabled(self, parser, capsys):
+        """Тест команды STATS без сбора метрик и с неизвестным форматом."""
+        parser.execute_command(1, 'STATS', "STATS")
+        parser.metrics = Metrics()
+        parser.execute_command(2, 'STATS', "STATS xml")
+        parser.execute_command(3, 'STATS', "STATS prometheus")
+        output = capsys.readouterr().out
+        assert "Ошибка: Сбор статистики не включен (--stats)" in output
+        assert "Ошибка: Неизвестный формат статистики: xml" in output
+        assert 'historical_events_command_errors_total{command="STATS"} 1' in output
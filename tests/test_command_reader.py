@@ -0,0 +1,121 @@
+"""
+Модульные тесты для чтения файла команд.
+"""
+
+import mmap
+import pytest
+from command_reader import (
+    ADD, REM, PRINT, SAVE, LOAD, FIND, COUNT, EXPLAIN, STATS, UNKNOWN, classify,
+    iter_mmap_commands, open_commands)
+from command_parser import CommandParser
+from container import EventContainer
+
+CONTENT = """# Комментарий
+ADD Битва|Куликовская битва|1380|Куликово поле
+
+  ADD Договор|Версальский договор|1919|Германия и союзники  
+PRINT
+UNKNOWN COMMAND
+REM date < "1920"
+ PRINT 
+"""
+
+
+class TestCommandReader:
+    """Тесты для чтения команд из файла."""
+
+    def test_classify(self):
+        """Тест определения вида команды."""
+        assert classify("") is None
+        assert classify("# ADD") is None
+        assert classify("ADD Битва|a|b|c") == ADD
+        assert classify("REM type == \"Битва\"") == REM
+        assert classify("PRINT") == PRINT
+        assert classify("PRINTALL") == UNKNOWN
+        assert classify("SAVE state.snap") == SAVE
+        assert classify("LOAD state.snap") == LOAD
+        assert classify("FIND type == \"Битва\" LIMIT 5") == FIND
+        assert classify("COUNT type == \"Битва\"") == COUNT
+        assert classify("EXPLAIN type == \"Битва\"") == EXPLAIN
+        assert classify("STATS") == STATS
+        assert classify("STATS prometheus") == STATS
+        assert classify("STATSX") == UNKNOWN
+
+    @pytest.mark.parametrize("newline", ["\n", "\r\n"])
+    def test_mmap_matches_text(self, tmp_path, newline):
+        """Тест совпадения потоков команд при разных способах чтения."""
+        test_file = tmp_path / "commands.txt"
+        test_file.write_bytes(CONTENT.replace("\n", newline).encode('utf-8'))
+
+        with open_commands(str(test_file), 'text') as commands:
+            text_commands = list(commands)
+        with open_commands(str(test_file), 'mmap') as commands:
+            mmap_commands = list(commands)
+        assert mmap_commands == text_commands
+        assert [line_num for line_num, _, _ in mmap_commands] == [2, 4, 5, 6, 7, 8]
+        assert mmap_commands[-1] == (8, PRINT, "PRINT")
+
+    def test_mmap_empty_file(self, tmp_path):
+        """Тест чтения пустого файла через отображение в память."""
+        test_file = tmp_path / "empty.txt"
+        test_file.write_bytes(b"")
+        with open_commands(str(test_file), 'mmap') as commands:
+            assert not list(commands)
+
+    def test_unknown_reader(self, tmp_path):
+        """Тест неизвестного способа чтения."""
+        with pytest.raises(ValueError):
+            with open_commands(str(tmp_path / "x.txt"), 'stream'):
+                pass
+
+    def test_parser_mmap_reader(self, tmp_path, capsys):
+        """Тест обработки файла парсером в режиме mmap."""
+        test_file = tmp_path / "commands.txt"
+        test_file.write_text(CONTENT, encoding='utf-8')
+
+        CommandParser(EventContainer()).process_file(str(test_file))
+        expected = capsys.readouterr().out
+        CommandParser(EventContainer(), reader='mmap').process_file(str(test_file))
+        assert capsys.readouterr().out == expected
+        assert "Строка 6: Неизвестная команда: UNKNOWN COMMAND" in expected
+
+    def test_parser_mmap_missing_file(self, capsys):
+        """Тест отсутствующего файла в режиме mmap."""
+        CommandParser(EventContainer(), reader='mmap').process_file("нет.txt")
+        assert "не найден" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("block_size", [1, 7, 64])
+    def test_mmap_small_blocks(self, tmp_path, block_size):
+        """Тест номеров строк при разбиении файла на мелкие блоки."""
+        test_file = tmp_path / "commands.txt"
+        test_file.write_text(CONTENT + "PRINT", encoding='utf-8')
+
+        with open_commands(str(test_file), 'text') as commands:
+            expected = list(commands)
+        with open(test_file, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            assert list(iter_mmap_commands(buffer, block_size)) == expected
+            buffer.close()
+        assert expected[-1] == (9, PRINT, "PRINT")
+
+    @pytest.mark.parametrize("reader", ['text', 'mmap'])
+    def test_command_stream_positions(self, tmp_path, reader):
+        """Тест позиций CommandStream и чтения с сохраненной позиции."""
+        test_file = tmp_path / "commands.txt"
+        test_file.write_text(CONTENT, encoding='utf-8')
+        with open_commands(str(test_file), reader) as commands:
+            expected = list(commands)
+
+        with open_commands(str(test_file), reader, (0, 0)) as stream:
+            iterator = iter(stream)
+            assert next(iterator) == expected[0]
+            first = stream.position
+            assert stream.previous == (0, 0)
+            assert next(iterator) == expected[1]
+            assert stream.previous == first
+            middle = stream.position
+            assert list(iterator) == expected[2:]
+            assert stream.position == (len(CONTENT.encode('utf-8')),
+                                       CONTENT.count('\n'))
+        with open_commands(str(test_file), reader, middle) as stream:
+            assert list(stream) == expected[2:]
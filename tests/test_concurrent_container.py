@@ -0,0 +1,98 @@
+"""
+Модульные тесты для потокобезопасного контейнера.
+"""
+
+import threading
+from collections import Counter
+from concurrent_container import ConcurrentEventContainer, SEGMENT_SIZE
+from conditions import FieldEquals, NameContains
+from historical_event import Battle, Treaty
+
+
+class TestConcurrentEventContainer:
+    """Тесты для класса ConcurrentEventContainer."""
+
+    def test_snapshot_is_immutable(self):
+        """Тест: опубликованная версия не меняется после записи."""
+        container = ConcurrentEventContainer()
+        container.add(Battle("Битва 1", "1000", "Место 1"))
+        snapshot = container.snapshot()
+        container.add(Treaty("Договор 1", "1100", "Стороны 1"))
+        container.remove(FieldEquals("name", "Битва 1"))
+        assert [event.name for event in snapshot] == ["Битва 1"]
+        assert [event.name for event in container.snapshot()] == ["Договор 1"]
+        assert container.snapshot().version > snapshot.version
+
+    def test_unchanged_segments_shared(self):
+        """Тест копирования при записи: общие неизмененные сегменты."""
+        container = ConcurrentEventContainer()
+        container.add_many([Battle(f"Битва {i}", "1000", "Место")
+                            for i in range(3 * SEGMENT_SIZE)])
+        before = container.snapshot()
+        container.remove(FieldEquals("name", "Битва 5"))
+        after = container.snapshot()
+        assert len(after) == 3 * SEGMENT_SIZE - 1
+        assert after.segments[0] is not before.segments[0]
+        assert after.segments[1] is before.segments[1]
+        assert after.segments[2] is before.segments[2]
+
+    def test_compaction_rebuilds_version(self):
+        """Тест публикации версии после сжатия хранилища."""
+        container = ConcurrentEventContainer(indexed=False)
+        container.add_many([Battle(f"Битва {i}", str(1000 + (i % 3 == 0)),
+                                   "Место") for i in range(4 * SEGMENT_SIZE)])
+        container.remove(FieldEquals("date", "1000"))
+        assert container._tombstones() == 0
+        assert [event.name for event in container.snapshot()] == [
+            f"Битва {i}" for i in range(0, 4 * SEGMENT_SIZE, 3)]
+
+    def test_many_readers_and_writers(self):
+        """Тест согласованных версий при параллельных читателях и писателях."""
+        container = ConcurrentEventContainer()
+        errors = []
+        stop = threading.Event()
+
+        def writer(number):
+            for i in range(150):
+                tag = f"{number}-{i}"
+                # Пара событий добавляется и удаляется одной записью
+                container.add_many([Battle(f"Битва {tag}", "1000", tag),
+                                    Treaty(f"Договор {tag}", "1000", tag)])
+                if i % 3:
+                    container.remove_many([FieldEquals("place", tag),
+                                           FieldEquals("parties", tag)])
+
+        def reader():
+            while not stop.is_set():
+                snapshot = container.snapshot()
+                tags = Counter(getattr(event, 'place', None)
+                               or getattr(event, 'parties', None)
+                               for event in snapshot)
+                if len(snapshot) != sum(tags.values()) or any(
+                        count != 2 for count in tags.values()):
+                    errors.append(snapshot.version)
+                container.print_lines()
+
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        writers = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+        assert errors == []
+        assert len(container) == len(container.snapshot()) == 4 * 50 * 2
+        assert container.remove(NameContains("Договор")) == 200
+
+    def test_find_and_count(self):
+        """Тест поиска и подсчета в потокобезопасном контейнере."""
+        container = ConcurrentEventContainer()
+        container.add_many([Battle(f"Битва {i}", "1812", "Бородино")
+                            for i in range(5)])
+        events = container.find(FieldEquals("type", "Битва"), offset=3)
+        container.remove(FieldEquals("type", "Битва"))
+        assert [e.name for e in events] == ["Битва 3", "Битва 4"]
+        assert container.count(FieldEquals("type", "Битва")) == 0
@@ -0,0 +1,129 @@
+"""
+Модульные тесты для структурированных условий.
+"""
+
+import pytest
+from conditions import (
+    FieldEquals, NameContains, DateCompare, AndCondition, OrCondition,
+    NotCondition, parse_condition)
+from historical_event import HistoricalEvent, Battle, Treaty
+
+
+class TestFieldEquals:
+    """Тесты для условия FieldEquals."""
+
+    def test_match(self):
+        """Тест совпадения значения поля."""
+        condition = FieldEquals("name", "Битва 1")
+        assert condition(Battle("Битва 1", "1000", "Место")) is True
+        assert condition(Battle("Битва 2", "1000", "Место")) is False
+
+    def test_missing_field(self):
+        """Тест события без проверяемого поля."""
+        condition = FieldEquals("place", "Место")
+        assert condition(Treaty("Договор", "2000", "Место")) is False
+        assert FieldEquals("type", "Битва")(
+            HistoricalEvent("Событие", "1000")) is False
+
+    def test_equality_and_hash(self):
+        """Тест сравнения условий между собой."""
+        assert FieldEquals("date", "1000") == FieldEquals("date", "1000")
+        assert FieldEquals("date", "1000") != FieldEquals("name", "1000")
+        assert len({FieldEquals("date", "1"), FieldEquals("date", "1")}) == 1
+
+
+class TestNameContains:
+    """Тесты для условия NameContains."""
+
+    def test_case_insensitive(self):
+        """Тест поиска подстроки без учета регистра."""
+        condition = NameContains("битва")
+        assert condition(Battle("НАПОЛЕОНОВСКАЯ БИТВА", "1841", "Москва")) is True
+        assert condition(Battle("Бородинское сражение", "1812", "Бородино")) is False
+
+
+class TestDateCompare:
+    """Тесты для условия DateCompare."""
+
+    def test_operators(self):
+        """Тест операторов сравнения дат."""
+        battle = Battle("Битва", "1380", "Место")
+        assert DateCompare("<", "1500")(battle) is True
+        assert DateCompare(">", "1500")(battle) is False
+
+    def test_unknown_operator(self):
+        """Тест неизвестного оператора."""
+        with pytest.raises(ValueError):
+            DateCompare("!=", "1500")
+
+    def test_match_value(self):
+        """Тест проверки условий по значению поля без объекта события."""
+        assert DateCompare("<", "1500").match_value("1380") is True
+        assert DateCompare(">", "1500").match_value(None) is False
+        assert NameContains("КУЛИК").match_value("Куликовская битва") is True
+        assert FieldEquals("place", "Бородино").match_value(None) is False
+
+
+class TestParseCondition:
+    """Тесты для грамматики условий."""
+
+    @pytest.mark.parametrize("text, expected", [
+        ('type == "Битва"', FieldEquals("type", "Битва")),
+        ('place=="Куликово поле"', FieldEquals("place", "Куликово поле")),
+        ('name contains "война"', NameContains("война")),
+        ('date  >  "1500"', DateCompare(">", "1500")),
+        ('date<"1500"', DateCompare("<", "1500")),
+    ])
+    def test_valid(self, text, expected):
+        """Тест разбора допустимых условий."""
+        assert parse_condition(text) == expected
+
+    @pytest.mark.parametrize("text", [
+        'invalid condition',
+        'name > "1500"',
+        'date contains "15"',
+        'type == ""',
+        'type == "Битва" лишнее',
+        'color == "красный"',
+        'name == "незакрытая',
+        'type == "Битва" AND',
+        '(type == "Битва"',
+        'NOT',
+        'type == "Битва" OR OR date < "1500"',
+    ])
+    def test_invalid(self, text):
+        """Тест отклонения недопустимых условий."""
+        with pytest.raises(ValueError, match="Неизвестный формат условия"):
+            parse_condition(text)
+
+
+class TestCompoundConditions:
+    """Тесты для логических комбинаций условий."""
+
+    def test_precedence(self):
+        """Тест приоритета операций NOT, AND, OR и скобок."""
+        battle = FieldEquals("type", "Битва")
+        early = DateCompare("<", "1500")
+        peace = NameContains("мир")
+        assert parse_condition(
+            'type == "Битва" or date < "1500" AND not name contains "мир"'
+        ) == OrCondition([battle, AndCondition([early, NotCondition(peace)])])
+        assert parse_condition(
+            '(type == "Битва" OR date < "1500") AND name contains "мир"'
+        ) == AndCondition([OrCondition([battle, early]), peace])
+
+    def test_flatten(self):
+        """Тест раскрытия вложенных комбинаций одной операции."""
+        condition = parse_condition(
+            'type == "Битва" AND (date < "1500" AND place == "Полтава")')
+        assert isinstance(condition, AndCondition)
+        assert len(condition.children) == 3
+
+    def test_call_and_str(self):
+        """Тест проверки событий и записи комбинации."""
+        condition = parse_condition(
+            'NOT (type == "Битва" AND date > "1500")')
+        assert str(condition) == 'NOT (type == "Битва" AND date > "1500")'
+        assert condition(Battle("Куликовская битва", "1380", "Куликово поле"))
+        assert not condition(Battle("Бородинское сражение", "1812", "Бородино"))
+        assert condition(Treaty("Тильзитский мир", "1807", "Россия, Франция"))
@@ -5,6 +5,7 @@
 import pytest
 from container import EventContainer
 from historical_event import HistoricalEvent, Battle, Treaty
+from conditions import FieldEquals, NameContains, DateCompare
 
 
 class TestEventContainer:
@@ -118,3 +119,232 @@ class TestEventContainer:
         assert "Битва 1" in captured.out
         assert "Договор 1" in captured.out
 
+    def test_iter_print_lines(self):
+        """Тест ленивых строк PRINT и отвязанного от изменений перебора."""
+        container = EventContainer()
+        assert list(container.iter_print_lines()) == ["Контейнер пуст."]
+        container.add(Battle("Битва 1", "1000", "Место 1"))
+        container.add(Battle("Битва 2", "1100", "Место 2"))
+        lines = container.iter_print_lines(detach=True)
+        container.remove(FieldEquals("name", "Битва 1"))
+        assert list(lines)[2:4] == ["1. Битва: Битва 1, Дата: 1000, Место: Место 1",
+                                    "2. Битва: Битва 2, Дата: 1100, Место: Место 2"]
+        assert container.print_lines()[2] == "1. Битва: Битва 2, Дата: 1100, Место: Место 2"
+
+    def test_remove_by_index(self):
+        """Тест удаления по условию равенства через хеш-индекс."""
+        container = EventContainer()
+        container.add(Battle("Битва 1", "1000", "Место 1"))
+        container.add(Treaty("Договор 1", "1000", "Стороны 1"))
+        container.add(Battle("Битва 2", "1100", "Место 1"))
+
+        assert container.remove(FieldEquals("place", "Место 1")) == 2
+        assert [e.name for e in container._events] == ["Договор 1"]
+        assert container.remove(FieldEquals("place", "Место 1")) == 0
+
+    def test_indexes_updated_after_scan_removal(self):
+        """Тест согласованности индексов после удаления перебором."""
+        container = EventContainer()
+        container.add(Battle("Битва 1", "1000", "Место 1"))
+        container.add(Battle("Битва 2", "1100", "Место 2"))
+
+        container.remove(lambda e: e.name == "Битва 1")
+        assert container.remove(FieldEquals("date", "1000")) == 0
+        assert container.remove(FieldEquals("type", "Битва")) == 1
+        assert len(container) == 0
+
+    def test_remove_date_range_numeric(self):
+        """Тест диапазонного удаления с числовым сравнением годов."""
+        container = EventContainer()
+        container.add(Battle("Битва 1", "1380", "Место 1"))
+        container.add(Battle("Битва 2", "800", "Место 2"))
+        container.add(Treaty("Договор 1", "1919", "Стороны 1"))
+
+        assert container.remove(DateCompare("<", "1000")) == 1
+        assert container.remove(DateCompare(">", "1500")) == 1
+        assert [e.name for e in container._events] == ["Битва 1"]
+        assert container.remove(FieldEquals("date", "1919")) == 0
+
+    @pytest.mark.parametrize("trigram_index", [True, False])
+    def test_remove_name_contains(self, trigram_index):
+        """Тест удаления по подстроке с индексом триграмм и без него."""
+        container = EventContainer(trigram_index=trigram_index)
+        container.add(Battle("Куликовская битва", "1380", "Куликово поле"))
+        container.add(Battle("НАПОЛЕОНОВСКАЯ БИТВА", "1841", "Москва"))
+        container.add(Treaty("Брестский мир", "1918", "Стороны"))
+
+        assert container.remove(NameContains("битва")) == 2
+        assert container.remove(NameContains("ир")) == 1
+        assert len(container) == 0
+
+    def test_add_many(self):
+        """Тест пакетного добавления событий."""
+        container = EventContainer()
+        container.add(Battle("Битва 0", "1500", "Место 1"))
+        container.add_many([
+            Battle("Битва 1", "1000", "Место 1"),
+            Treaty("Договор 1", "2000", "Стороны 1"),
+            Battle("Битва 2", "800", "Место 2"),
+        ])
+        assert [e.name for e in container._events] == [
+            "Битва 0", "Битва 1", "Договор 1", "Битва 2"]
+        assert container._date_index.range() == [3, 1, 0, 2]
+        assert container.remove(FieldEquals("place", "Место 1")) == 2
+        assert container.remove(DateCompare("<", "1000")) == 1
+        assert container.remove(NameContains("договор")) == 1
+        assert len(container) == 0
+
+    def test_remove_leaves_tombstones(self):
+        """Тест отложенного сжатия после небольших удалений."""
+        container = EventContainer()
+        container.add(Battle("Битва 1", "1000", "Место 1"))
+        container.add(Battle("Битва 2", "1100", "Место 2"))
+        container.add(Battle("Битва 3", "1200", "Место 3"))
+
+        assert container.remove(FieldEquals("name", "Битва 2")) == 1
+        assert len(container) == 2
+        assert len(container._slots) == 3
+        assert [e.name for e in container._events] == ["Битва 1", "Битва 3"]
+        assert container.remove(FieldEquals("name", "Битва 3")) == 1
+
+    def test_print_all_compacts(self, capsys):
+        """Тест сжатия хранилища перед выводом."""
+        container = EventContainer()
+        container.add(Battle("Битва 1", "1000", "Место 1"))
+        container.add(Battle("Битва 2", "1100", "Место 2"))
+        container.remove(FieldEquals("name", "Битва 1"))
+
+        container.print_all()
+        assert len(container._slots) == 1
+        assert "1. Битва: Битва 2" in capsys.readouterr().out
+        assert container.remove(FieldEquals("date", "1100")) == 1
+
+    def test_compaction_threshold(self):
+        """Тест сжатия при превышении доли пустых ячеек."""
+        container = EventContainer(compact_ratio=0.5)
+        container.add_many([Battle(f"Битва {i}", str(1000 + i), "Место")
+                            for i in range(3000)])
+        assert container.remove(DateCompare("<", "2000")) == 1000
+        assert len(container._slots) == 3000
+        assert container.remove(DateCompare("<", "2600")) == 600
+        assert len(container._slots) == 1400
+        assert container.remove(FieldEquals("name", "Битва 2999")) == 1
+
+    def test_interned_strings(self):
+        """Тест общих строк пула и их освобождения при удалении."""
+        container = EventContainer()
+        container.add(Battle("Битва 1", "".join(["10", "00"]), "".join(["Мес", "то"])))
+        container.add_many([Battle("Битва 2", "".join(["10", "00"]), "".join(["Мес", "то"])),
+                            Treaty("Договор", "1100", "".join(["Мес", "то"]))])
+        first, second, treaty = container._events
+        assert second.place is first.place
+        assert second.date is first.date
+        assert treaty.parties is first.place
+        assert container.intern_stats()['references'] == 6
+
+        assert container.remove(FieldEquals("date", "1000")) == 2
+        stats = container.intern_stats()
+        assert stats['strings'] == 2
+        assert stats['reclaimed'] == 1
+        container.clear()
+        assert container.intern_stats()['strings'] == 0
+        assert EventContainer(intern_strings=False).intern_stats() == {}
+
+    @pytest.mark.parametrize("indexed", [True, False])
+    def test_remove_many_attribution(self, indexed):
+        """Тест распределения удалений по условиям серии."""
+        container = EventContainer(indexed=indexed)
+        container.add(Battle("Битва 1", "1841", "Место 1"))
+        container.add(Battle("Битва 2", "1942", "Место 2"))
+        container.add(Treaty("Договор 1", "1841", "Стороны 1"))
+        container.add(Treaty("Договор 2", "1700", "Стороны 2"))
+
+        counts = container.remove_many([
+            FieldEquals("date", "1841"),
+            FieldEquals("type", "Битва"),
+            NameContains("1"),
+            lambda e: e.date < "1800",
+        ])
+        assert counts == [2, 1, 0, 1]
+        assert len(container) == 0
+
+    def test_remove_many_single_pass(self):
+        """Тест одного общего прохода для условий, требующих перебора."""
+        container = EventContainer(indexed=False)
+        checked = []
+        for i in range(3):
+            container.add(Battle(f"Битва {i}", "1000", "Место"))
+
+        def first(event):
+            checked.append(event.name)
+            return event.name == "Битва 0"
+
+        assert container.remove_many([first, lambda e: True]) == [1, 2]
+        assert checked == ["Битва 0", "Битва 1", "Битва 2"]
+
+    def test_structured_scan_without_indexes(self):
+        """Тест перебора структурированных условий без индексов."""
+        container = EventContainer(indexed=False)
+        for i in range(40):
+            container.add(Battle(f"Битва {i}", str(1000 + i), "Место"))
+            container.add(Treaty(f"Договор {i}", str(1000 + i), "Стороны"))
+        assert container.remove(FieldEquals("date", "1005")) == 2
+        assert container.remove(NameContains("3")) == 26
+        assert container.remove(DateCompare("<", "1010")) == 16
+        assert container.remove(FieldEquals("parties", "Стороны")) == 18
+        assert len(container) == 18
+        assert all(isinstance(event, Battle) for event in container._events)
+
+    @pytest.mark.parametrize("indexed", [True, False])
+    def test_find_and_count(self, indexed):
+        """Тест поиска и подсчета без изменения контейнера."""
+        container = EventContainer(indexed=indexed)
+        container.add_many([Battle(f"Битва {i}", str(1900 - i), f"Место {i % 2}")
+                            for i in range(10)])
+        container.add(Treaty("Договор", "1500", "Стороны"))
+
+        places = [e.name for e in container.find(FieldEquals("place", "Место 1"))]
+        assert places == ["Битва 1", "Битва 3", "Битва 5", "Битва 7", "Битва 9"]
+        page = container.find(FieldEquals("type", "Битва"), offset=2, limit=3)
+        assert [e.name for e in page] == ["Битва 2", "Битва 3", "Битва 4"]
+        # Сравнение дат выдает события по возрастанию даты
+        dates = container.find(DateCompare(">", "1892"), limit=2)
+        assert [e.date for e in dates] == ["1893", "1894"]
+        names = container.find(NameContains("Битва 1"))
+        assert [e.name for e in names] == ["Битва 1"]
+
+        assert container.count(FieldEquals("type", "Битва")) == 10
+        assert container.count(DateCompare("<", "1895")) == 5
+        assert container.count(NameContains("договор")) == 1
+        assert container.count(FieldEquals("name", "нет")) == 0
+        assert len(container) == 11
+
+    def test_count_without_sorting(self):
+        """Тест подсчета по сравнению дат без индекса: совпадения не сортируются."""
+        container = EventContainer(indexed=False)
+        container.add_many([Battle(f"Битва {i}", str(1900 - i), "Место")
+                            for i in range(10)])
+        condition = DateCompare("<", "1895")
+
+        # Для подсчета порядок не важен: совпадения идут в порядке добавления
+        assert list(container._matches(condition, ordered=False)) == [6, 7, 8, 9]
+        assert list(container._matches(condition)) == [9, 8, 7, 6]
+        assert container.count(condition) == 4
+
+    def test_find_is_lazy(self):
+        """Тест ленивого поиска: извлекаются только события страницы."""
+        container = EventContainer()
+        container.add_many([Battle(f"Битва {i}", "1812", "Бородино")
+                            for i in range(100)])
+        fetched = []
+        original_get = container._get
+
+        def tracking_get(event_id):
+            fetched.append(event_id)
+            return original_get(event_id)
+
+        container._get = tracking_get
+        events = container.find(FieldEquals("date", "1812"), offset=10, limit=2)
+        assert fetched == []
+        assert [e.name for e in events] == ["Битва 10", "Битва 11"]
+        assert fetched == [10, 11]
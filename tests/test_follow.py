@@ -0,0 +1,111 @@
+"""
+Модульные тесты для режима слежения за файлом команд.
+"""
+
+import os
+import threading
+import time
+import pytest
+from command_parser import CommandParser
+from container import EventContainer
+from follow import FileFollower
+
+
+def _wait_for(predicate, timeout=5.0):
+    """Дождаться выполнения условия или истечения времени."""
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def _append(path, text):
+    """Дописать текст в конец файла."""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+class TestFileFollower:
+    """Тесты источника пакетов из дописываемого файла."""
+
+    @pytest.fixture(params=[True, False], ids=['inotify', 'poll'])
+    def follower(self, request, tmp_path):
+        """Источник пакетов (с inotify и с опросом) и поток его чтения."""
+        path = tmp_path / "commands.txt"
+        path.write_text("ADD Битва|Битва 1|1000|Место 1\nPRI", encoding='utf-8')
+        follower = FileFollower(str(path), poll_interval=0.02,
+                                use_inotify=request.param)
+        stop = threading.Event()
+        received = []
+
+        def run():
+            for commands, _ in follower.batches(stop):
+                received.extend(commands)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        yield path, received
+        stop.set()
+        thread.join(5)
+
+    def test_complete_lines_only(self, follower):
+        """Тест: незавершенная строка ждет перевода строки."""
+        path, received = follower
+        assert _wait_for(lambda: len(received) == 1)
+        assert received[0][0] == 1
+        _append(path, "NT\nADD Битва|Битва 2|1100|Место 2\n")
+        assert _wait_for(lambda: len(received) == 3)
+        assert [command[:2] for command in received[1:]] == [
+            (2, 'PRINT'), (3, 'ADD')]
+
+    def test_truncation(self, follower):
+        """Тест чтения с начала после усечения файла."""
+        path, received = follower
+        assert _wait_for(lambda: len(received) == 1)
+        path.write_text("PRINT\n", encoding='utf-8')
+        assert _wait_for(lambda: len(received) == 2)
+        assert received[1] == (1, 'PRINT', 'PRINT')
+
+    def test_rotation(self, follower):
+        """Тест дочитывания прежнего файла и перехода на новый."""
+        path, received = follower
+        assert _wait_for(lambda: len(received) == 1)
+        os.rename(path, str(path) + ".1")
+        _append(str(path) + ".1", "NT\n")
+        path.write_text("ADD Битва|Битва 3|1200|Место 3\n", encoding='utf-8')
+        assert _wait_for(lambda: len(received) == 3)
+        assert received[1] == (2, 'PRINT', 'PRINT')
+        assert received[2][:2] == (1, 'ADD')
+
+
+class TestFollowFile:
+    """Тесты обработки дописываемого файла парсером."""
+
+    def test_follow_file(self, tmp_path, capsys):
+        """Тест выполнения новых команд и отчета о задержке пакета."""
+        path = tmp_path / "commands.txt"
+        path.write_text("ADD Битва|Битва 1|1000|Место 1\n", encoding='utf-8')
+        parser = CommandParser(EventContainer())
+        stop = threading.Event()
+        thread = threading.Thread(target=parser.follow_file,
+                                  args=(str(path), stop, 0.02))
+        thread.start()
+        try:
+            assert _wait_for(lambda: len(parser.container) == 1)
+            _append(path, 'ADD Битва|Битва 2|1100|Место 2\nREM date < "1050"\n')
+            assert _wait_for(
+                lambda: [e.name for e in parser.container._events] == ["Битва 2"])
+        finally:
+            stop.set()
+            thread.join(5)
+        output = capsys.readouterr().out
+        assert "Пакет: команд 1, задержка" in output
+        assert "Пакет: команд 2, задержка" in output
+        assert "Удалено событий: 1" in output
+
+    def test_follow_missing_file(self, capsys):
+        """Тест отсутствующего файла в режиме слежения."""
+        CommandParser(EventContainer()).follow_file("нет.txt")
+        assert "не найден" in capsys.readouterr().out
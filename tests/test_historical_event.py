@@ -3,7 +3,7 @@
 """
 
 import pytest
-from historical_event import HistoricalEvent, Battle, Treaty
+from historical_event import HistoricalEvent, Battle, Treaty, make_date_key
 
 
 class TestHistoricalEvent:
@@ -100,3 +100,44 @@ class TestTreaty:
         assert "1919" in result
         assert "Германия и союзники" in result
 
+
+class TestDateKey:
+    """Тесты для нормализованного ключа даты."""
+
+    def test_numeric_years(self):
+        """Тест сравнения лет с разным количеством цифр."""
+        assert make_date_key("800") < make_date_key("1380")
+        assert make_date_key("-490") < make_date_key("800")
+
+    def test_date_with_suffix(self):
+        """Тест уточнения порядка внутри одного года."""
+        assert make_date_key("1812") < make_date_key("1812-09-07")
+        assert make_date_key("1812-09-07") < make_date_key("1813")
+
+    def test_non_numeric_after_numeric(self):
+        """Тест дат без ведущего года."""
+        assert make_date_key("9999") < make_date_key("неизвестно")
+
+    def test_computed_on_init(self):
+        """Тест вычисления ключа при создании события."""
+        battle = Battle("Битва", "800", "Место")
+        assert battle.date_key == make_date_key("800")
+
+
+class TestSlots:
+    """Тесты для компактного представления событий."""
+
+    @pytest.mark.parametrize("event", [
+        HistoricalEvent("Событие", "1000"),
+        Battle("Битва", "1000", "Место"),
+        Treaty("Договор", "1000", "Стороны"),
+    ])
+    def test_no_instance_dict(self, event):
+        """Тест отсутствия __dict__ у экземпляров."""
+        assert not hasattr(event, '__dict__')
+
+    def test_type_is_class_constant(self):
+        """Тест хранения типа события в классе."""
+        assert Battle.type == "Битва"
+        assert Treaty.type == "Договор"
+        assert not hasattr(HistoricalEvent("Событие", "1000"), 'type')
@@ -0,0 +1,133 @@
+"""
+Модульные тесты для вторичных индексов контейнера.
+"""
+
+from historical_event import make_date_key
+from indexes import HashIndex, SortedDateIndex, TrigramIndex
+
+
+class TestHashIndex:
+    """Тесты для класса HashIndex."""
+
+    def test_add_and_lookup(self):
+        """Тест добавления и поиска идентификаторов."""
+        index = HashIndex()
+        index.add("1380", 0)
+        index.add("1380", 2)
+        index.add("1812", 1)
+        assert index.lookup("1380") == {0, 2}
+        assert index.count("1812") == 1
+        assert index.lookup("1900") == frozenset()
+
+    def test_discard(self):
+        """Тест удаления идентификаторов из индекса."""
+        index = HashIndex()
+        index.add("1380", 0)
+        index.discard("1380", 0)
+        index.discard("1380", 0)
+        index.discard("1812", 5)
+        assert index.count("1380") == 0
+
+    def test_iter_ids_insertion_order(self):
+        """Тест перебора идентификаторов в порядке добавления."""
+        index = HashIndex()
+        index.add_many([("1380", 5), ("1380", 1), ("1812", 2), ("1380", 9)])
+        index.discard("1380", 1)
+        assert list(index.iter_ids("1380")) == [5, 9]
+        assert list(index.iter_ids("1900")) == []
+
+    def test_contains(self):
+        """Тест проверки наличия события в списке значения."""
+        index = HashIndex()
+        index.add("1380", 3)
+        assert index.contains("1380", 3)
+        assert not index.contains("1380", 4)
+        assert not index.contains("1812", 3)
+
+
+class TestSortedDateIndex:
+    """Тесты для класса SortedDateIndex."""
+
+    @staticmethod
+    def _index(*dates):
+        """Построить индекс по списку дат (идентификатор - позиция)."""
+        index = SortedDateIndex()
+        for event_id, date in enumerate(dates):
+            index.add(make_date_key(date), event_id)
+        return index
+
+    def test_range(self):
+        """Тест диапазонных запросов со строгими и нестрогими границами."""
+        index = self._index("1380", "800", "1812", "1380")
+        assert index.range(high=make_date_key("1380")) == [1]
+        assert index.range(low=make_date_key("1380")) == [2]
+        assert index.range(low=make_date_key("1380"), high=make_date_key("1380"),
+                           low_inclusive=True, high_inclusive=True) == [0, 3]
+
+    def test_pop_range(self):
+        """Тест извлечения диапазона из индекса."""
+        index = self._index("1380", "800", "1812")
+        assert index.pop_range(low=make_date_key("1000")) == [0, 2]
+        assert len(index) == 1
+
+    def test_discard(self):
+        """Тест удаления отдельной записи."""
+        index = self._index("1380", "1380")
+        index.discard(make_date_key("1380"), 0)
+        index.discard(make_date_key("1380"), 7)
+        assert index.range() == [1]
+
+    def test_discard_many(self):
+        """Тест пакетного удаления малого и крупного пакетов."""
+        dates = [str(1000 + i % 50) for i in range(300)]
+        index = self._index(*dates)
+        index.discard_many([(make_date_key(dates[i]), i) for i in range(0, 10)])
+        index.discard_many([(make_date_key(dates[i]), i) for i in range(10, 300, 2)])
+        expected = sorted(range(11, 300, 2), key=lambda i: (make_date_key(dates[i]), i))
+        assert index.range() == expected
+
+    def test_iter_range_and_count(self):
+        """Тест ленивого перебора и подсчета диапазона."""
+        index = self._index("1380", "800", "1812", "1380")
+        assert list(index.iter_range(low=make_date_key("1000"))) == [0, 3, 2]
+        assert index.count_range(low=make_date_key("1000")) == 3
+        assert index.count_range(high=make_date_key("800")) == 0
+        assert index.count_range() == 4
+
+
+class TestTrigramIndex:
+    """Тесты для класса TrigramIndex."""
+
+    def test_candidates(self):
+        """Тест поиска кандидатов без учета регистра."""
+        index = TrigramIndex()
+        index.add("Куликовская битва", 0)
+        index.add("НАПОЛЕОНОВСКАЯ БИТВА", 1)
+        index.add("Бородинское сражение", 2)
+        assert index.candidates("битв") == {0, 1}
+        assert index.candidates("ялта") == set()
+
+    def test_short_needle(self):
+        """Тест подстроки короче триграммы."""
+        index = TrigramIndex()
+        index.add("Битва", 0)
+        assert index.candidates("ит") is None
+
+    def test_discard(self):
+        """Тест удаления названия из индекса."""
+        index = TrigramIndex()
+        index.add("Битва", 0)
+        index.add("Битва", 1)
+        index.discard("Битва", 0)
+        assert index.candidates("битва") == {1}
+
+    def test_estimate(self):
+        """Тест оценки числа кандидатов по самому короткому списку."""
+        index = TrigramIndex()
+        index.add("Куликовская битва", 0)
+        index.add("Полтавская битва", 1)
+        index.add("Бородинская битва", 2)
+        assert index.estimate("битва") == 3
+        assert index.estimate("полтав") == 1
+        assert index.estimate("ялта") == 0
+        assert index.estimate("ит") is None
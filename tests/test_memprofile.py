@@ -0,0 +1,69 @@
+"""
+Модульные тесты для профилирования памяти обработки команд.
+"""
+
+import tracemalloc
+from command_parser import CommandParser
+from container import EventContainer
+from memprofile import MemoryProfiler, format_size
+
+
+def _commands(count):
+    """Строки файла команд: count событий, удаление и вывод."""
+    lines = [f"ADD Битва|Битва {i}|{1000 + i % 500}|Место {i % 7}"
+             for i in range(count)]
+    lines += ['REM place == "Место 1"', "PRINT"]
+    return '\n'.join(lines) + '\n'
+
+
+class TestMemoryProfiler:
+    """Тесты для профилировщика памяти."""
+
+    def test_profile_commands(self, tmp_path, capsys):
+        """Тест снимков и пиков по видам команд при обработке файла."""
+        test_file = tmp_path / "commands.txt"
+        test_file.write_text(_commands(3000), encoding='utf-8')
+        profiler = MemoryProfiler(every=1000)
+        profiler.start()
+        parser = CommandParser(EventContainer(), add_batch_size=500,
+                               memory_profiler=profiler)
+        parser.process_file(str(test_file))
+        profiler.stop()
+        capsys.readouterr()
+
+        assert not tracemalloc.is_tracing()
+        assert set(profiler.kinds) == {'ADD', 'REM', 'PRINT'}
+        assert profiler.kinds['ADD'].segments == 6
+        assert profiler.kinds['ADD'].commands == 3000
+        assert profiler.kinds['ADD'].peak_increase > 0
+        assert [sample.commands for sample in profiler.samples] == [1000, 2000, 3000, 3002]
+        assert profiler.samples[2].events == 3000
+        assert profiler.samples[-1].events == len(parser.container)
+        assert profiler.samples[2].bytes_per_event > 0
+
+    def test_report(self, tmp_path, capsys):
+        """Тест отчета: ряд снимков, пики и места выделения памяти."""
+        test_file = tmp_path / "commands.txt"
+        test_file.write_text(_commands(500), encoding='utf-8')
+        profiler = MemoryProfiler(every=200, top=5)
+        profiler.start()
+        CommandParser(EventContainer(), memory_profiler=profiler).process_file(
+            str(test_file))
+        profiler.stop()
+        capsys.readouterr()
+
+        report_file = tmp_path / "memory_profile.txt"
+        profiler.write_report(str(report_file))
+        report = report_file.read_text(encoding='utf-8')
+        assert "Снимки памяти:" in report
+        assert "Пиковая память по видам команд:" in report
+        assert "Места выделения памяти (последний снимок, топ 5):" in report
+        assert "Рост с первого снимка (топ 5):" in report
+        assert "tracemalloc.py" not in report.split("Места выделения")[1]
+
+    def test_format_size(self):
+        """Тест вывода размеров."""
+        assert format_size(512) == "512 Б"
+        assert format_size(1536) == "1.5 КиБ"
+        assert format_size(3 * 1024 ** 2) == "3.0 МиБ"
+        assert format_size(5 * 1024 ** 3) == "5.0 ГиБ"
@@ -0,0 +1,108 @@
+"""
+Модульные тесты для метрик выполнения команд.
+"""
+
+import json
+import pytest
+from metrics import LatencyHistogram, Metrics, bucket_index, bucket_upper_bound
+
+
+class TestMetrics:
+    """Тесты для метрик выполнения команд."""
+
+    def test_buckets_cover_values(self):
+        """Тест корзин: значение меньше границы своей корзины и не меньше предыдущей."""
+        previous = 0
+        for index in range(120):
+            bound = bucket_upper_bound(index)
+            assert bound > previous
+            assert bucket_index(previous) == index
+            assert bucket_index(bound - 1) == index
+            previous = bound
+
+    def test_bucket_precision(self):
+        """Тест точности корзин: граница не более чем на 25% выше значения."""
+        for value in (5, 100, 12_345, 10 ** 6, 987_654_321):
+            assert value < bucket_upper_bound(bucket_index(value)) <= value * 1.25 + 1
+
+    def test_histogram_quantiles(self):
+        """Тест квантилей и счетчиков гистограммы."""
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.observe(value * 1000)
+        histogram.observe(5_000_000, times=10)
+
+        assert histogram.count == 1010
+        assert histogram.maximum == 5_000_000
+        assert histogram.total == sum(range(1, 1001)) * 1000 + 50_000_000
+        assert 500_000 <= histogram.quantile(0.5) <= 625_000
+        assert histogram.quantile(1.0) == 5_000_000
+        assert sum(count for _, count in histogram.buckets()) == 1010
+        assert LatencyHistogram().quantile(0.5) == 0
+
+    def test_observe_segment(self):
+        """Тест учета сегмента: каждой команде приписывается средняя задержка."""
+        metrics = Metrics()
+        metrics.observe('ADD', 4000, 4, 1, 3)
+        metrics.observe('REM', 500, 1, 0, 2)
+
+        add = metrics.commands['ADD']
+        assert (add.count, add.errors) == (4, 1)
+        assert add.latency.buckets() == [(bucket_upper_bound(bucket_index(1000)), 4)]
+        assert metrics.container_size == 2
+        assert metrics.container_size_max == 3
+
+    def test_size_series_bounded(self):
+        """Тест ряда размеров: длина ограничена, ряд покрывает все команды."""
+        metrics = Metrics(series_length=16)
+        for size in range(1, 10_001):
+            metrics.observe('ADD', 100, 1, 0, size)
+
+        series = metrics.snapshot()['container']['series']
+        assert len(series) <= 17
+        assert series[0][1:] == [1, 1]
+        assert series[-1][1:] == [10_000, 10_000]
+        assert [point[1] for point in series] == sorted(point[1] for point in series)
+
+    def test_json(self):
+        """Тест вывода в JSON."""
+        metrics = Metrics()
+        metrics.observe('FIND', 2_000_000, 1, 1, 0)
+        data = json.loads(metrics.render('json'))
+
+        assert data['commands']['FIND']['count'] == 1
+        assert data['commands']['FIND']['errors'] == 1
+        assert data['commands']['FIND']['latency_us']['max'] == 2000
+        assert data['container']['size'] == 0
+
+    def test_prometheus(self):
+        """Тест вывода в текстовом формате Prometheus."""
+        metrics = Metrics()
+        metrics.observe('ADD', 3000, 3, 0, 3)
+        metrics.observe('ADD', 10 ** 9, 1, 1, 3)
+        lines = metrics.render('prometheus').splitlines()
+
+        assert 'historical_events_commands_total{command="ADD"} 4' in lines
+        assert 'historical_events_command_errors_total{command="ADD"} 1' in lines
+        assert ('historical_events_command_duration_seconds_bucket'
+                '{command="ADD",le="+Inf"} 4') in lines
+        assert 'historical_events_command_duration_seconds_count{command="ADD"} 4' in lines
+        assert 'historical_events_container_size 3' in lines
+        buckets = [int(line.rsplit(' ', 1)[1]) for line in lines
+                   if line.startswith('historical_events_command_duration_seconds_bucket')]
+        assert buckets == sorted(buckets)
+
+    def test_string_pool(self):
+        """Тест вывода статистики пула строк."""
+        metrics = Metrics()
+        assert 'string_pool' not in metrics.snapshot()
+        metrics.set_string_pool({'strings': 2, 'saved_bytes': 120})
+        assert metrics.snapshot()['string_pool'] == {'strings': 2, 'saved_bytes': 120}
+        lines = metrics.render('prometheus').splitlines()
+        assert '# TYPE historical_events_string_pool_saved_bytes gauge' in lines
+        assert 'historical_events_string_pool_saved_bytes 120' in lines
+
+    def test_unknown_format(self):
+        """Тест неизвестного формата вывода."""
+        with pytest.raises(ValueError, match="Неизвестный формат статистики"):
+            Metrics().render('xml')
@@ -0,0 +1,98 @@
+"""
+Модульные тесты для приемников вывода.
+"""
+
+import io
+import pytest
+from output import (
+    OutputSink, BufferedSink, ThreadedSink, WRITE_CHUNK_LINES, create_sink)
+from container import EventContainer
+from command_parser import CommandParser
+
+
+class TestOutputSink:
+    """Тесты для приемников вывода."""
+
+    def test_direct_uses_current_stdout(self, capsys):
+        """Тест прямой записи в текущий sys.stdout."""
+        sink = OutputSink()
+        sink.write("строка")
+        sink.write_lines(["a", "b"])
+        assert capsys.readouterr().out == "строка\na\nb\n"
+
+    def test_write_lines_streams_chunks(self):
+        """Тест записи строк из итератора порциями по мере чтения."""
+        writes = []
+        consumed = []
+
+        class RecordingStream(io.StringIO):
+            """Поток, запоминающий число прочитанных строк при каждой записи."""
+
+            def write(self, text):
+                writes.append(len(consumed))
+                return super().write(text)
+
+        def lines():
+            """Строки, отмечающие свое чтение."""
+            for i in range(2 * WRITE_CHUNK_LINES + 1):
+                consumed.append(i)
+                yield str(i)
+
+        stream = RecordingStream()
+        OutputSink(stream).write_lines(lines())
+        assert len(writes) == 3
+        assert writes[0] <= WRITE_CHUNK_LINES + 1
+        assert stream.getvalue().splitlines()[-1] == str(2 * WRITE_CHUNK_LINES)
+
+    def test_buffered_writes_on_flush(self):
+        """Тест накопления вывода до сброса буфера."""
+        stream = io.StringIO()
+        sink = BufferedSink(stream, buffer_size=1000)
+        sink.write("строка")
+        assert stream.getvalue() == ""
+        sink.close()
+        assert stream.getvalue() == "строка\n"
+
+    def test_buffered_writes_when_full(self):
+        """Тест записи при заполнении буфера."""
+        stream = io.StringIO()
+        sink = BufferedSink(stream, buffer_size=10)
+        sink.write("0123456789")
+        assert stream.getvalue() == "0123456789\n"
+
+    def test_threaded_preserves_order(self):
+        """Тест порядка строк при фоновой записи."""
+        stream = io.StringIO()
+        sink = ThreadedSink(stream, buffer_size=64, max_pending=2)
+        for i in range(1000):
+            sink.write(str(i))
+        sink.close()
+        assert stream.getvalue() == "".join(f"{i}\n" for i in range(1000))
+
+    def test_quiet_suppresses_echo(self):
+        """Тест тихого режима: эхо подавляется, сводка выводится."""
+        stream = io.StringIO()
+        sink = OutputSink(stream, quiet=True)
+        sink.echo("Добавлено событие: 1")
+        sink.echo("Добавлено событие: 2")
+        sink.write("Удалено событий: 1")
+        sink.close()
+        assert stream.getvalue() == (
+            "Удалено событий: 1\nДобавлено событий (эхо подавлено): 2\n")
+
+    def test_create_sink_unknown_mode(self):
+        """Тест неизвестного режима вывода."""
+        with pytest.raises(ValueError):
+            create_sink("unknown")
+
+    def test_parser_and_container_use_sink(self, capsys):
+        """Тест вывода парсера и контейнера через внедренный приемник."""
+        stream = io.StringIO()
+        container = EventContainer()
+        parser = CommandParser(container, output=BufferedSink(stream))
+        parser.parse_add_command("ADD Битва|Битва 1|1000|Место 1")
+        container.print_all(parser.output)
+        parser.output.close()
+        assert capsys.readouterr().out == ""
+        assert "Добавлено событие: Битва: Битва 1" in stream.getvalue()
+        assert "1. Битва: Битва 1" in stream.getvalue()
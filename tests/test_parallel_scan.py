@@ -0,0 +1,35 @@
+"""
+Модульные тесты для параллельной проверки условий по столбцам.
+"""
+
+from array import array
+from multiprocessing import shared_memory
+from parallel_scan import ParallelScanner, mask_chunk
+
+
+class TestParallelScanner:
+    """Тесты для проверки столбцов участками в пуле процессов."""
+
+    def test_mask_chunk(self):
+        """Тест маски участка столбца из разделяемой памяти."""
+        column = array('I', [5, 1, 5, 7])
+        block = shared_memory.SharedMemory(create=True, size=len(column) * column.itemsize)
+        try:
+            block.buf[:len(column) * column.itemsize] = column.tobytes()
+            assert mask_chunk(block.name, 'I', 1, 4, frozenset({5, 7})) == b'\x00\x01\x01'
+        finally:
+            block.close()
+            block.unlink()
+
+    def test_mask_merges_chunks(self):
+        """Тест склейки масок участков в исходном порядке."""
+        scanner = ParallelScanner(workers=3)
+        column = array('I', (i % 4 for i in range(10)))
+        try:
+            assert scanner.mask(column, {1, 3}) == bytes(
+                value in (1, 3) for value in column)
+            assert scanner.mask(array('B', [2, 1, 2]), {2}) == b'\x01\x00\x01'
+            assert scanner.mask(column, set()) == bytes(10)
+            assert scanner.mask(array('I'), {1}) == b''
+        finally:
+            scanner.close()
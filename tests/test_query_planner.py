@@ -0,0 +1,81 @@
+"""
+Модульные тесты для планировщика запросов.
+"""
+
+import random
+import pytest
+from columnar_container import ColumnarEventContainer
+from conditions import parse_condition
+from container import EventContainer
+from historical_event import Battle, Treaty
+from query_planner import FullScan, IndexScan, Intersection, Union, plan_query
+
+
+def _events():
+    """Набор событий со случайными, но воспроизводимыми полями."""
+    rng = random.Random(7)
+    events = []
+    for i in range(500):
+        date = str(rng.randint(800, 2000))
+        if rng.random() < 0.6:
+            events.append(Battle(f"Битва {i}", date, f"Место {rng.randint(0, 9)}"))
+        else:
+            events.append(Treaty(f"Мирный договор {i}", date,
+                                 f"Стороны {rng.randint(0, 9)}"))
+    return events
+
+
+QUERIES = [
+    'type == "Битва" AND date < "1200"',
+    'place == "Место 1" OR parties == "Стороны 2"',
+    'NOT type == "Битва"',
+    '(place == "Место 1" OR place == "Место 2") AND NOT date > "1500"',
+    'name contains "мирн" AND parties == "Стороны 3"',
+    'date < "850" OR date > "1990" OR name contains "99"',
+]
+
+
+class TestQueryPlanner:
+    """Тесты для планировщика запросов."""
+
+    def test_most_selective_driver(self):
+        """Тест выбора самого избирательного индекса конъюнкции."""
+        container = EventContainer()
+        container.add_many(_events())
+        plan = plan_query(container, parse_condition(
+            'type == "Битва" AND place == "Место 1" AND date > "1000"'))
+        assert isinstance(plan, Intersection)
+        assert isinstance(plan.driver, IndexScan)
+        assert str(plan.driver.condition) == 'place == "Место 1"'
+        assert [str(probe) for probe in plan.probes] == ['type == "Битва"']
+        assert [str(c) for c in plan.residual] == ['date > "1000"']
+
+    def test_union_and_fallback(self):
+        """Тест объединения индексов и перебора без индекса."""
+        container = EventContainer()
+        container.add_many(_events())
+        assert isinstance(plan_query(container, parse_condition(
+            'place == "Место 1" OR date < "900"')), Union)
+        assert isinstance(plan_query(container, parse_condition(
+            'place == "Место 1" OR NOT date < "900"')), FullScan)
+        assert isinstance(plan_query(EventContainer(indexed=False), parse_condition(
+            'type == "Битва" AND date < "1200"')), FullScan)
+
+    @pytest.mark.parametrize("query", QUERIES)
+    @pytest.mark.parametrize("factory", [
+        EventContainer,
+        lambda: EventContainer(indexed=False),
+        ColumnarEventContainer,
+    ])
+    def test_matches_full_scan(self, factory, query):
+        """Тест совпадения результатов плана с проверкой каждого события."""
+        events = _events()
+        condition = parse_condition(query)
+        expected = [str(event) for event in events if condition(event)]
+        container = factory()
+        container.add_many(events)
+        assert [str(event) for event in container.find(condition)] == expected
+        assert container.count(condition) == len(expected)
+        assert container.remove(condition) == len(expected)
+        assert len(container) == len(events) - len(expected)
+        assert not any(condition(event) for event in container._events)
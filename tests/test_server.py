@@ -0,0 +1,113 @@
+"""
+Модульные тесты для сетевого сервера команд.
+"""
+
+import asyncio
+from container import EventContainer
+from server import CommandServer, RESPONSE_END
+
+
+async def _request(reader, writer, lines):
+    """Отправить строки конвейером и прочитать ответ на каждую."""
+    writer.write(''.join(line + '\n' for line in lines).encode('utf-8'))
+    await writer.drain()
+    responses = []
+    for _ in lines:
+        response = []
+        while True:
+            line = (await reader.readline()).decode('utf-8').rstrip('\n')
+            if line == RESPONSE_END:
+                break
+            response.append(line)
+        responses.append(response)
+    return responses
+
+
+class TestCommandServer:
+    """Тесты сервера команд."""
+
+    def test_pipelined_commands(self):
+        """Тест конвейера команд двух клиентов над общим контейнером."""
+        container = EventContainer()
+
+        async def scenario():
+            server = await CommandServer(container, print_chunk_lines=2).start(
+                '127.0.0.1', 0)
+            host, port = server.sockets[0].getsockname()[:2]
+            first = await asyncio.open_connection(host, port)
+            second = await asyncio.open_connection(host, port)
+            added = await _request(*first, [
+                "ADD Битва|Битва 1|1000|Место 1",
+                "# комментарий",
+                "ADD Договор|Договор 1|900|Стороны 1",
+                "UNKNOWN",
+            ])
+            removed = await _request(*second, ['REM date < "950"', "PRINT"])
+            for _, writer in (first, second):
+                writer.close()
+            server.close()
+            await server.wait_closed()
+            return added, removed
+
+        added, removed = asyncio.run(scenario())
+        assert added[0] == [
+            "Добавлено событие: Битва: Битва 1, Дата: 1000, Место: Место 1"]
+        assert added[1] == []
+        assert added[3] == ["Строка 4: Неизвестная команда: UNKNOWN"]
+        assert removed[0] == ["Удалено событий: 1"]
+        assert removed[1][:2] == ["", "Всего событий в контейнере: 1"]
+        assert removed[1][3] == "1. Битва: Битва 1, Дата: 1000, Место: Место 1"
+        assert len(container) == 1
+
+    def test_unix_socket(self, tmp_path):
+        """Тест сервера на Unix-сокете."""
+        path = str(tmp_path / "server.sock")
+
+        async def scenario():
+            server = await CommandServer(EventContainer()).start(path=path)
+            connection = await asyncio.open_unix_connection(path)
+            responses = await _request(*connection, ["PRINT"])
+            connection[1].close()
+            server.close()
+            await server.wait_closed()
+            return responses
+
+        assert asyncio.run(scenario()) == [["Контейнер пуст."]]
+
+    def test_snapshot_commands_restricted(self, tmp_path):
+        """Тест SAVE и LOAD клиентов: отключены без каталога, внутри каталога."""
+        outside = tmp_path / "outside.snap"
+
+        async def scenario(snapshot_dir, lines):
+            server = await CommandServer(EventContainer(),
+                                         snapshot_dir=snapshot_dir).start(
+                '127.0.0.1', 0)
+            connection = await asyncio.open_connection(
+                *server.sockets[0].getsockname()[:2])
+            responses = await _request(*connection, lines)
+            connection[1].close()
+            server.close()
+            await server.wait_closed()
+            return responses
+
+        disabled = asyncio.run(scenario(None, [f"SAVE {outside}", f"LOAD {outside}"]))
+        assert disabled == [
+            ["Ошибка: Команда SAVE в режиме сервера отключена (--snapshot-dir)"],
+            ["Ошибка: Команда LOAD в режиме сервера отключена (--snapshot-dir)"]]
+        assert not outside.exists()
+
+        snapshots = tmp_path / "snapshots"
+        snapshots.mkdir()
+        responses = asyncio.run(scenario(str(snapshots), [
+            "ADD Битва|Битва 1|1000|Место 1",
+            f"SAVE {outside}",
+            "SAVE ../outside.snap",
+            "SAVE a.snap",
+            "LOAD a.snap",
+        ]))
+        assert responses[1] == [f"Ошибка: Недопустимое имя снимка: {outside}"]
+        assert responses[2] == ["Ошибка: Недопустимое имя снимка: ../outside.snap"]
+        assert responses[3][0].startswith("Снимок сохранен:")
+        assert responses[4][0].startswith("Снимок загружен:")
+        assert not outside.exists()
+        assert (snapshots / "a.snap").exists()
@@ -0,0 +1,121 @@
+"""
+Модульные тесты для двоичных снимков контейнера.
+"""
+
+import pytest
+from container import EventContainer
+from columnar_container import ColumnarEventContainer
+from conditions import FieldEquals, NameContains, DateCompare
+from historical_event import HistoricalEvent, Battle, Treaty
+import snapshot
+from snapshot import SNAPSHOT_MAGIC, atomic_write, save_snapshot, load_snapshot
+
+EVENTS = [
+    Battle("Куликовская битва", "1380", "Куликово поле"),
+    Treaty("Версальский договор", "1919", "Германия и союзники"),
+    HistoricalEvent("Крещение Руси", "988"),
+    Battle("Бородинское сражение", "1812", "Бородино"),
+    Battle("Битва на Калке", "1223", "Калка"),
+]
+
+
+def _describe(container):
+    """Описания событий контейнера по порядку."""
+    return [str(event) for event in container._events]
+
+
+class TestSnapshot:
+    """Тесты сохранения и загрузки снимков."""
+
+    @pytest.mark.parametrize("source_cls",
+                             [EventContainer, ColumnarEventContainer])
+    @pytest.mark.parametrize("target_cls",
+                             [EventContainer, ColumnarEventContainer])
+    def test_round_trip(self, tmp_path, source_cls, target_cls):
+        """Тест сохранения и загрузки между реализациями хранилища."""
+        source = source_cls()
+        source.add_many(EVENTS)
+        source.remove(FieldEquals("name", "Крещение Руси"))
+        path = str(tmp_path / "state.snap")
+        assert save_snapshot(source, path) == 4
+
+        target = target_cls()
+        target.add(Battle("Лишнее событие", "2000", "Место"))
+        assert load_snapshot(target, path) == 4
+        assert _describe(target) == _describe(source)
+        assert target.remove(DateCompare("<", "1400")) == 2
+        assert target.remove(NameContains("бород")) == 1
+        assert target.remove(FieldEquals("type", "Договор")) == 1
+        assert len(target) == 0
+
+    def test_indexes_restored(self, tmp_path):
+        """Тест восстановления индексов при загрузке."""
+        source = EventContainer()
+        source.add_many(EVENTS)
+        path = str(tmp_path / "state.snap")
+        save_snapshot(source, path)
+
+        for target in (EventContainer(), ColumnarEventContainer(indexed=True)):
+            load_snapshot(target, path)
+            assert len(target._indexes["place"].lookup("Калка")) == 1
+            assert len(target._date_index.range(high=(0, 1300, ""))) == 2
+
+    def test_columnar_append_after_load(self, tmp_path):
+        """Тест добавления событий в колоночный контейнер после загрузки."""
+        source = ColumnarEventContainer()
+        source.add_many(EVENTS[:3])
+        path = str(tmp_path / "state.snap")
+        save_snapshot(source, path)
+
+        target = ColumnarEventContainer()
+        load_snapshot(target, path)
+        target.add(EVENTS[3])
+        assert _describe(target) == [str(event) for event in EVENTS[:4]]
+
+    def test_empty_container(self, tmp_path):
+        """Тест снимка пустого контейнера."""
+        path = str(tmp_path / "empty.snap")
+        assert save_snapshot(EventContainer(), path) == 0
+        container = EventContainer()
+        container.add(EVENTS[0])
+        assert load_snapshot(container, path) == 0
+        assert len(container) == 0
+
+    def test_invalid_files(self, tmp_path):
+        """Тест ошибок при загрузке не снимка, другой версии и обрыва."""
+        path = tmp_path / "bad.snap"
+        path.write_text("ADD Битва|Битва|1000|Место\n", encoding='utf-8')
+        with pytest.raises(ValueError, match="не является снимком"):
+            load_snapshot(EventContainer(), str(path))
+
+        path.write_bytes(SNAPSHOT_MAGIC + b'\x02\x00' + bytes(12))
+        with pytest.raises(ValueError, match="версия"):
+            load_snapshot(EventContainer(), str(path))
+
+        source = EventContainer()
+        source.add_many(EVENTS)
+        save_snapshot(source, str(path))
+        path.write_bytes(path.read_bytes()[:-3])
+        with pytest.raises(ValueError, match="поврежден"):
+            load_snapshot(EventContainer(), str(path))
+
+    def test_save_syncs_before_replace(self, tmp_path, monkeypatch):
+        """Тест сброса данных на диск до замены файла снимка."""
+        path = tmp_path / "a.snap"
+        synced = []
+        monkeypatch.setattr(snapshot.os, 'fsync', lambda fd: synced.append(
+            (tmp_path / "a.snap.tmp").exists() and not path.exists()))
+        save_snapshot(EventContainer(), str(path))
+        assert synced == [True]
+        assert path.exists()
+
+    def test_failed_write_keeps_previous(self, tmp_path):
+        """Тест ошибки записи: прежний файл цел, временный удален."""
+        path = tmp_path / "a.snap"
+        path.write_bytes(b"old")
+        with pytest.raises(RuntimeError):
+            with atomic_write(str(path)) as f:
+                f.write(b"new")
+                raise RuntimeError("сбой")
+        assert path.read_bytes() == b"old"
+        assert not (tmp_path / "a.snap.tmp").exists()
@@ -0,0 +1,48 @@
+"""
+Модульные тесты для пула интернированных строк.
+"""
+
+import sys
+from string_pool import StringPool
+
+
+class TestStringPool:
+    """Тесты для класса StringPool."""
+
+    def test_intern_shares_instance(self):
+        """Тест выдачи общего экземпляра равных строк."""
+        pool = StringPool()
+        first = pool.intern("".join(["Куликово", " поле"]))
+        second = pool.intern("".join(["Куликово", " поле"]))
+        assert second is first
+        assert len(pool) == 1
+        assert pool.refs("Куликово поле") == 2
+
+    def test_release_reclaims(self):
+        """Тест удаления строки после снятия последней ссылки."""
+        pool = StringPool()
+        pool.intern("1380")
+        pool.intern("1380")
+        pool.release("1380")
+        assert pool.refs("1380") == 1
+        pool.release("1380")
+        assert len(pool) == 0
+        assert pool.reclaimed == 1
+        pool.release("1380")
+        assert pool.refs("1380") == 0
+
+    def test_stats(self):
+        """Тест статистики пула и сэкономленной памяти."""
+        pool = StringPool()
+        for _ in range(3):
+            pool.intern("Бородино")
+        pool.intern("1812")
+        stats = pool.stats()
+        assert stats['strings'] == 2
+        assert stats['references'] == 4
+        assert stats['saved_bytes'] == 2 * sys.getsizeof("Бородино")
+        assert stats['string_bytes'] == (sys.getsizeof("Бородино")
+                                         + sys.getsizeof("1812"))
+        assert stats['pool_bytes'] > 0
+        pool.clear()
+        assert pool.stats()['references'] == 0
@@ -0,0 +1,141 @@
+"""
+Модульные тесты для сравнения и выгрузки профилей.
+"""
+
+import cProfile
+import marshal
+import pstats
+from view_profile import (
+    FunctionStats, collapsed_stacks, diff_profiles, function_name,
+    load_functions, main, print_diff)
+
+
+def _leaf(n):
+    """Функция с собственной работой."""
+    return sum(i * i for i in range(n))
+
+
+def _middle(n):
+    """Функция, вызывающая _leaf."""
+    return _leaf(n) + _leaf(n // 2)
+
+
+def _root():
+    """Корень профилируемой работы."""
+    return [_middle(20000) for _ in range(5)]
+
+
+def _profile(path):
+    """Сохранить профиль _root в файл и вернуть его имя."""
+    profiler = cProfile.Profile()
+    profiler.runcall(_root)
+    profiler.dump_stats(str(path))
+    return str(path)
+
+
+def _dag_profile(path, depth):
+    """
+    Сохранить профиль графа вызовов из depth слоев по две функции.
+
+    Каждая функция слоя вызывает обе функции следующего слоя, поэтому
+    путей от корня до листа 2 ** depth; все время приходится на лист.
+    """
+    root, leaf = ('dag.py', 1, 'root'), ('dag.py', 2, 'leaf')
+    stats = {root: (1, 1, 0.0, 1.0, {})}
+    previous = [root]
+    for i in range(depth):
+        layer = [('dag.py', 10 + 2 * i, f'left{i}'), ('dag.py', 11 + 2 * i, f'right{i}')]
+        edge = 0.5 / len(previous)
+        for key in layer:
+            stats[key] = (len(previous), len(previous), 0.0, 0.5,
+                          {caller: (1, 1, 0.0, edge) for caller in previous})
+        previous = layer
+    stats[leaf] = (2, 2, 1.0, 1.0, {caller: (1, 1, 0.5, 0.5) for caller in previous})
+    with open(path, 'wb') as f:
+        marshal.dump(stats, f)
+    return str(path)
+
+
+class TestViewProfile:
+    """Тесты для сравнения и выгрузки профилей."""
+
+    def test_function_name(self):
+        """Тест имен функций без каталога проекта."""
+        assert function_name(('~', 0, "<built-in method len>")) == "<built-in method len>"
+        assert function_name(('/usr/lib/python3/re/_parser.py', 5, '_parse')) == \
+            "re/_parser.py:5(_parse)"
+
+    def test_load_functions(self, tmp_path):
+        """Тест чтения статистики функций профиля."""
+        functions = load_functions(_profile(tmp_path / "a.prof"))
+        leaf = next(stats for name, stats in functions.items()
+                    if name.endswith("(_leaf)"))
+        assert leaf.calls == 10
+        assert 0 < leaf.tottime <= leaf.cumtime
+
+    def test_diff_profiles(self):
+        """Тест сравнения профилей и пометки регрессий."""
+        old = {'f': FunctionStats(10, 1.0, 2.0), 'g': FunctionStats(5, 0.5, 0.5),
+               'gone': FunctionStats(1, 0.2, 0.2)}
+        new = {'f': FunctionStats(20, 1.5, 2.5), 'g': FunctionStats(5, 0.52, 0.52),
+               'added': FunctionStats(3, 0.3, 0.3)}
+        deltas = {delta.name: delta for delta in diff_profiles(old, new, 0.1, 0.01)}
+
+        assert deltas['f'].regression
+        assert deltas['f'].calls_delta == 10
+        assert abs(deltas['f'].tottime_delta - 0.5) < 1e-9
+        assert not deltas['g'].regression
+        assert deltas['added'].regression and deltas['added'].old is None
+        assert not deltas['gone'].regression
+        assert abs(deltas['gone'].cumtime_delta + 0.2) < 1e-9
+        assert list(deltas) == ['f', 'added', 'gone', 'g']
+
+    def test_print_diff_shows_all_regressions(self, capsys):
+        """Тест вывода регрессий, не попавших в таблицу."""
+        old = {f'f{i}': FunctionStats(1, 1.0, 1.0) for i in range(5)}
+        old['slow'] = FunctionStats(1, 0.2, 0.2)
+        new = {f'f{i}': FunctionStats(1, 0.5, 0.5) for i in range(5)}
+        new['slow'] = FunctionStats(1, 0.3, 0.3)
+        deltas = diff_profiles(old, new, 0.1, 0.01)
+
+        assert print_diff(deltas, num_stats=3) == 1
+        output = capsys.readouterr().out
+        # Три строки таблицы и регрессия за ее пределами
+        shown = [line.split()[4] for line in output.splitlines()
+                 if line.lstrip().startswith(('+', '-'))]
+        assert shown == ['f0', 'f1', 'f2', 'slow']
+        assert "slow  РЕГРЕССИЯ" in output
+
+    def test_collapsed_stacks(self, tmp_path):
+        """Тест свернутых стеков: формат и сумма времени по функциям."""
+        profile = _profile(tmp_path / "a.prof")
+        lines = collapsed_stacks(profile)
+        assert lines
+        leaf_total = 0
+        for line in lines:
+            stack, value = line.rsplit(' ', 1)
+            assert int(value) > 0
+            if stack.endswith("(_leaf)"):
+                assert "(_root);" in stack and "(_middle);" in stack
+                leaf_total += int(value)
+
+        raw = pstats.Stats(profile).stats  # type: ignore[attr-defined]
+        leaf_time = sum(value[2] for key, value in raw.items() if key[2] == '_leaf')
+        assert abs(leaf_total - leaf_time * 1e6) <= 2
+
+    def test_collapsed_stacks_dag(self, tmp_path):
+        """Тест свернутых стеков графа с экспоненциальным числом путей."""
+        # 2 ** 12 путей по 244 мкс: все выводятся, время листа сохраняется
+        lines = collapsed_stacks(_dag_profile(tmp_path / "small.prof", 12))
+        assert len(lines) == 2 ** 12
+        assert abs(sum(int(line.rsplit(' ', 1)[1]) for line in lines) - 1e6) <= 2 ** 12
+
+        # 2 ** 60 путей короче порога: подграфы не перебираются по путям
+        assert collapsed_stacks(_dag_profile(tmp_path / "large.prof", 60)) == []
+
+    def test_main_diff_exit_code(self, tmp_path, capsys):
+        """Тест кода возврата сравнения профиля с самим собой."""
+        profile = _profile(tmp_path / "a.prof")
+        assert main([profile, '--diff', profile]) == 0
+        assert "Регрессий: 0" in capsys.readouterr().out
+        assert main([str(tmp_path / "missing.prof")]) == 1
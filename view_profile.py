@@ -1,9 +1,283 @@
 """
 Скрипт для просмотра результатов профилирования.
+
+Кроме таблиц самых затратных функций одного профиля, скрипт сравнивает
+два профиля по функциям (изменения числа вызовов, собственного и
+накопленного времени) с пометкой регрессий и выгружает свернутые стеки
+(collapsed stacks) для построения flamegraph стандартными средствами
+(flamegraph.pl, speedscope, inferno).
+
+Запуск:
+    python view_profile.py
+    python view_profile.py new.prof --diff old.prof --threshold 0.1
+    python view_profile.py new.prof --collapsed new.collapsed
 """
 
+import argparse
+import os
 import pstats
+import sys
 from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+# Допустимый относительный рост собственного времени функции
+DEFAULT_THRESHOLD = 0.10
+
+# Изменения меньше этого собственного времени (секунды) считаются шумом
+DEFAULT_MIN_TIME = 0.005
+
+# Ветви стеков с долей времени меньше этой (секунды) отбрасываются
+COLLAPSED_MIN_TIME = 1e-6
+
+# Ключ функции в pstats: (файл, строка, имя)
+FunctionKey = Tuple[str, int, str]
+
+# Путь в графе вызовов: (функции пути, время последней функции)
+StackPath = Tuple[Tuple[FunctionKey, ...], float]
+
+
+class FunctionStats(NamedTuple):
+    """Статистика одной функции профиля."""
+
+    calls: int
+    tottime: float
+    cumtime: float
+
+
+class FunctionDelta(NamedTuple):
+    """Изменение статистики функции между двумя профилями."""
+
+    name: str
+    old: Optional[FunctionStats]
+    new: Optional[FunctionStats]
+    regression: bool
+
+    @property
+    def calls_delta(self) -> int:
+        """Изменение числа вызовов."""
+        return ((self.new.calls if self.new else 0)
+                - (self.old.calls if self.old else 0))
+
+    @property
+    def tottime_delta(self) -> float:
+        """Изменение собственного времени в секундах."""
+        return ((self.new.tottime if self.new else 0.0)
+                - (self.old.tottime if self.old else 0.0))
+
+    @property
+    def cumtime_delta(self) -> float:
+        """Изменение накопленного времени в секундах."""
+        return ((self.new.cumtime if self.new else 0.0)
+                - (self.old.cumtime if self.old else 0.0))
+
+
+def function_name(key: FunctionKey) -> str:
+    """
+    Имя функции, не зависящее от каталога проекта.
+
+    Пути внутри текущего каталога записываются относительно него,
+    остальные - двумя последними компонентами, поэтому профили разных
+    копий проекта сравниваются по одинаковым именам.
+
+    Args:
+        key: Ключ функции pstats
+
+    Returns:
+        Строка вида "файл:строка(имя)" или имя встроенной функции
+    """
+    filename, line, name = key
+    if filename == '~' and line == 0:
+        return name
+    path = filename
+    if os.path.isabs(filename):
+        relative = os.path.relpath(filename)
+        if not relative.startswith('..'):
+            path = relative
+        else:
+            path = '/'.join(Path(filename).parts[-2:])
+    return f"{path}:{line}({name})"
+
+
+def load_functions(profile_file: str) -> Dict[str, FunctionStats]:
+    """
+    Статистика функций профиля.
+
+    Args:
+        profile_file: Файл профиля cProfile
+
+    Returns:
+        Словарь имя функции -> статистика
+
+    Raises:
+        OSError: Если файл не удалось прочитать
+    """
+    raw = pstats.Stats(profile_file).stats  # type: ignore[attr-defined]
+    functions: Dict[str, FunctionStats] = {}
+    for key, (_, calls, tottime, cumtime, _) in raw.items():
+        name = function_name(key)
+        previous = functions.get(name)
+        if previous is not None:
+            # Одноименные функции из разных копий файла суммируются
+            calls += previous.calls
+            tottime += previous.tottime
+            cumtime += previous.cumtime
+        functions[name] = FunctionStats(calls, tottime, cumtime)
+    return functions
+
+
+def diff_profiles(old: Dict[str, FunctionStats], new: Dict[str, FunctionStats],
+                  threshold: float = DEFAULT_THRESHOLD,
+                  min_time: float = DEFAULT_MIN_TIME) -> List[FunctionDelta]:
+    """
+    Сравнить два профиля по функциям.
+
+    Регрессия - рост собственного времени функции больше чем на
+    threshold (доля) и больше чем на min_time секунд; новая функция
+    считается регрессией, если ее собственное время больше min_time.
+
+    Args:
+        old: Статистика прежнего профиля
+        new: Статистика нового профиля
+        threshold: Допустимый относительный рост собственного времени
+        min_time: Порог шума в секундах
+
+    Returns:
+        Изменения по всем функциям обоих профилей, по убыванию модуля
+        изменения собственного времени
+    """
+    deltas = []
+    for name in old.keys() | new.keys():
+        before, after = old.get(name), new.get(name)
+        growth = ((after.tottime if after else 0.0)
+                  - (before.tottime if before else 0.0))
+        regression = growth > min_time and (
+            before is None or growth > before.tottime * threshold)
+        deltas.append(FunctionDelta(name, before, after, regression))
+    deltas.sort(key=lambda delta: (-abs(delta.tottime_delta), delta.name))
+    return deltas
+
+
+def print_diff(deltas: List[FunctionDelta], num_stats: int = 20) -> int:
+    """
+    Вывести сравнение профилей.
+
+    Args:
+        deltas: Результат diff_profiles
+        num_stats: Число строк таблицы (регрессии выводятся все)
+
+    Returns:
+        Количество регрессий
+    """
+    regressions = [delta for delta in deltas if delta.regression]
+    shown = deltas[:num_stats] + [delta for delta in regressions
+                                  if delta not in deltas[:num_stats]]
+    print("=" * 80)
+    print("СРАВНЕНИЕ ПРОФИЛЕЙ (изменения нового относительно прежнего)")
+    print("=" * 80)
+    print(f"{'Δ вызовов':>10} {'Δ tottime':>11} {'Δ cumtime':>11} "
+          f"{'tottime':>9}  функция")
+    for delta in shown:
+        tottime = delta.new.tottime if delta.new else 0.0
+        mark = "  РЕГРЕССИЯ" if delta.regression else ""
+        state = " [новая]" if delta.old is None else (
+            " [удалена]" if delta.new is None else "")
+        print(f"{delta.calls_delta:>+10} {delta.tottime_delta:>+11.4f} "
+              f"{delta.cumtime_delta:>+11.4f} {tottime:>9.4f}  "
+              f"{delta.name}{state}{mark}")
+    print(f"\nРегрессий: {len(regressions)}")
+    return len(regressions)
+
+
+def collapsed_stacks(profile_file: str,
+                     min_time: float = COLLAPSED_MIN_TIME) -> List[str]:
+    """
+    Свернутые стеки профиля для flamegraph.
+
+    cProfile хранит не полные стеки, а пары вызывающий - вызываемый с
+    временем каждой пары. Стеки восстанавливаются обходом графа вызовов
+    от корней: доля вызываемой функции на пути равна доле накопленного
+    времени, пришедшейся на вызовы из предыдущей функции пути.
+    Корнем считается функция, вызванная хотя бы раз вне профилируемых
+    функций; рекурсивные вызовы (функция уже на пути) не раскрываются.
+    Рекурсия искажает доли, поэтому в конце время каждой функции по всем
+    путям приводится к ее собственному времени в профиле: суммы по
+    функциям точные, приближенно лишь распределение по путям. Поддерево
+    функции при одной доле строится один раз, поэтому общие подграфы не
+    перебираются заново для каждого ведущего в них пути.
+
+    Args:
+        profile_file: Файл профиля cProfile
+        min_time: Ветви с меньшим временем (секунды) отбрасываются
+
+    Returns:
+        Строки "f1;f2;f3 N", где N - собственное время последней функции
+        на этом пути в микросекундах
+    """
+    raw = pstats.Stats(profile_file).stats  # type: ignore[attr-defined]
+    callees: Dict[FunctionKey, List[Tuple[FunctionKey, float]]] = {}
+    for key, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((key, edge[3]))
+    names = {key: function_name(key).replace(';', ':') for key in raw}
+
+    # Стек -> (последняя функция, время); время по функциям
+    totals: Dict[str, Tuple[FunctionKey, float]] = {}
+    emitted: Dict[FunctionKey, float] = {}
+
+    # Пути вниз от функции при данной доле: (функции пути, время последней).
+    # В DAG функция достигается многими путями с одной и той же долей, и
+    # ее поддерево обходится один раз, а не заново для каждого пути
+    subtrees: Dict[Tuple[FunctionKey, float], List[StackPath]] = {}
+    active: Set[FunctionKey] = set()
+
+    def walk(key: FunctionKey, share: float) -> List[StackPath]:
+        cached = subtrees.get((key, share))
+        if cached is not None:
+            return cached
+        active.add(key)
+        paths: List[StackPath] = []
+        own = raw[key][2] * share
+        if own >= min_time:
+            paths.append(((key,), own))
+        for callee, edge_cumtime in callees.get(key, ()):
+            callee_cumtime = raw[callee][3]
+            if callee in active or not callee_cumtime:
+                continue
+            # Доля вызываемой функции на этом пути
+            part = share * min(1.0, edge_cumtime / callee_cumtime)
+            if part * callee_cumtime >= min_time:
+                paths.extend(((key,) + path, seconds)
+                             for path, seconds in walk(callee, part))
+        active.discard(key)
+        subtrees[(key, share)] = paths
+        return paths
+
+    # Корни - функции, часть вызовов которых пришлась на верхний уровень,
+    # кроме достижимых из уже выбранного корня (рекурсивные функции)
+    candidates = sorted((key for key, value in raw.items()
+                         if value[1] > sum(edge[1] for edge in value[4].values())),
+                        key=lambda key: (-raw[key][3], key))
+    reachable: Set[FunctionKey] = set()
+    for root in candidates:
+        if root in reachable:
+            continue
+        for path, seconds in walk(root, 1.0):
+            joined = ';'.join(names[item] for item in path)
+            key = path[-1]
+            totals[joined] = (key, totals.get(joined, (key, 0.0))[1] + seconds)
+            emitted[key] = emitted.get(key, 0.0) + seconds
+        stack = [root]
+        while stack:
+            for callee, _ in callees.get(stack.pop(), ()):
+                if callee not in reachable:
+                    reachable.add(callee)
+                    stack.append(callee)
+    lines = []
+    for stack, (key, seconds) in sorted(totals.items()):
+        micros = round(seconds * raw[key][2] / emitted[key] * 1e6)
+        if micros > 0:
+            lines.append(f"{stack} {micros}")
+    return lines
 
 
 def view_profile(profile_file="analysis_results/profile.prof", num_stats=20):
@@ -33,5 +307,65 @@ def view_profile(profile_file="analysis_results/profile.prof", num_stats=20):
     stats.print_stats(num_stats)
 
 
+def write_collapsed(profile_file: str, output_file: str) -> int:
+    """
+    Записать свернутые стеки профиля в файл.
+
+    Args:
+        profile_file: Файл профиля cProfile
+        output_file: Файл для свернутых стеков
+
+    Returns:
+        Количество записанных стеков
+    """
+    lines = collapsed_stacks(profile_file)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n' if lines else '')
+    return len(lines)
+
+
+def main(argv=None) -> int:
+    """Запуск просмотра, сравнения или выгрузки профиля."""
+    parser = argparse.ArgumentParser(
+        description="Просмотр, сравнение и выгрузка профилей cProfile.")
+    parser.add_argument('profile', nargs='?',
+                        default="analysis_results/profile.prof",
+                        help="файл профиля (по умолчанию: "
+                             "analysis_results/profile.prof)")
+    parser.add_argument('--top', type=int, default=20, metavar='N',
+                        help="число строк таблиц (по умолчанию: 20)")
+    parser.add_argument('--diff', metavar='OLD',
+                        help="сравнить профиль с прежним профилем OLD; код "
+                             "возврата 1 при регрессиях")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="допустимый рост собственного времени функции "
+                             "(по умолчанию: 0.1)")
+    parser.add_argument('--min-time', type=float, default=DEFAULT_MIN_TIME,
+                        metavar='S',
+                        help="изменения меньше S секунд не считаются "
+                             "регрессией (по умолчанию: 0.005)")
+    parser.add_argument('--collapsed', metavar='FILE',
+                        help="записать свернутые стеки для flamegraph в FILE")
+    args = parser.parse_args(argv)
+
+    if not Path(args.profile).exists():
+        print(f"Файл профиля {args.profile} не найден!")
+        return 1
+    if args.collapsed:
+        count = write_collapsed(args.profile, args.collapsed)
+        print(f"Свернутые стеки сохранены: {args.collapsed} (стеков: {count})")
+    if args.diff:
+        if not Path(args.diff).exists():
+            print(f"Файл профиля {args.diff} не найден!")
+            return 1
+        deltas = diff_profiles(load_functions(args.diff),
+                               load_functions(args.profile),
+                               args.threshold, args.min_time)
+        return 1 if print_diff(deltas, args.top) else 0
+    if not args.collapsed:
+        view_profile(args.profile, args.top)
+    return 0
+
+
 if __name__ == "__main__":
-    view_profile()
+    sys.exit(main())